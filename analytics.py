@@ -0,0 +1,175 @@
+import gc
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+KINDS = ['user', 'post', 'event']
+# users.role, posts.type and events.event_type values, fixed by CHECK constraints
+# ('alumni' is both a role and an event type)
+CATEGORIES = ['student', 'alumni', 'admin', 'confession', 'announcement', 'normal',
+              'campus', 'club', 'charity']
+COLUMNS = ['kind', 'created_at', 'category', 'department', 'batch_year']
+
+# Users, posts and events in one pass; `category` carries role, post type or
+# event type depending on `kind`. Rows past the ids already loaded are all
+# that is read when the frame is refreshed.
+ACTIVITY_SQL = '''
+SELECT 0, CAST(strftime('%s', created_at) AS INTEGER), role, department, batch_year FROM users WHERE id > ?
+UNION ALL SELECT 1, CAST(strftime('%s', created_at) AS INTEGER), type, NULL, NULL FROM posts WHERE id > ?
+UNION ALL SELECT 2, CAST(strftime('%s', created_at) AS INTEGER), event_type, NULL, NULL FROM events WHERE id > ?
+'''
+
+VERSION_SQL = '''
+SELECT (SELECT value FROM global_counters WHERE name = 'users'), (SELECT MAX(id) FROM users),
+       (SELECT value FROM global_counters WHERE name = 'posts'), (SELECT MAX(id) FROM posts),
+       (SELECT value FROM global_counters WHERE name = 'events'), (SELECT MAX(id) FROM events)
+'''
+
+ACTIVITY_TABLES = ('users', 'posts', 'events')
+# Write actions that leave every loaded row as it was: new rows, and changes
+# to columns the frame doesn't hold (likes, moderation status, counters,
+# seats, archiving, user approval and blocking)
+FRAME_UNCHANGED_ACTIONS = ('insert', 'likes', 'moderation', 'counters', 'registration', 'archive',
+                           'approve', 'block')
+
+
+class Analytics:
+    """Admin analytics computed with pandas over a cached activity frame.
+
+    The frame is loaded once and then kept current cheaply: new rows are
+    appended by id, while updates or deletes reported through
+    ``Database.on_write`` (or row counts that no longer add up, when another
+    process wrote) trigger a full reload. Aggregates are memoized per date
+    range until the frame changes.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.Lock()
+        self._frame = None
+        self._version = None
+        self._results = {}
+        for table in ACTIVITY_TABLES:
+            db.on_write(table, self._on_write)
+
+    def _on_write(self, table, action=None, **details):
+        # Inserts are picked up incrementally; other writes may have changed
+        # rows already in the frame
+        if action not in FRAME_UNCHANGED_ACTIONS:
+            self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._frame = None
+            self._results.clear()
+
+    def activity_frame(self):
+        with self.db.pool.read() as conn:
+            version = tuple(value or 0 for value in conn.execute(VERSION_SQL).fetchone())
+        with self._lock:
+            frame, previous = self._frame, self._version
+        if frame is not None and version == previous:
+            return frame
+
+        if frame is not None:
+            new_rows = self._read(previous[1::2])
+            counts = np.bincount(new_rows['kind'].cat.codes, minlength=3)
+            expected = [version[i] - previous[i] for i in (0, 2, 4)]
+            frame = self._append(frame, new_rows) if counts.tolist() == expected else None
+        if frame is None:
+            frame = self._read((0, 0, 0))
+
+        with self._lock:
+            self._frame, self._version = frame, version
+            self._results.clear()
+        return frame
+
+    def _read(self, after_ids):
+        # Building a few hundred thousand tuples trips the cyclic GC repeatedly
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with self.db.pool.read() as conn:
+                rows = conn.execute(ACTIVITY_SQL, after_ids).fetchall()
+            frame = pd.DataFrame.from_records(rows, columns=COLUMNS, nrows=len(rows))
+        finally:
+            if gc_enabled:
+                gc.enable()
+        frame['kind'] = pd.Categorical.from_codes(frame['kind'].astype('int8'), categories=KINDS)
+        frame['created_at'] = pd.to_datetime(frame['created_at'], unit='s')
+        frame['month'] = frame['created_at'].values.astype('datetime64[M]')
+        frame['category'] = pd.Categorical(frame['category'], categories=CATEGORIES)
+        return frame.astype({'department': 'category', 'batch_year': 'Int16'})
+
+    @staticmethod
+    def _append(frame, new_rows):
+        if new_rows.empty:
+            return frame
+        # Column by column so categoricals keep (and merge) their categories
+        return pd.DataFrame({
+            column: union_categoricals([frame[column].array, new_rows[column].array])
+            if isinstance(frame[column].dtype, pd.CategoricalDtype)
+            else pd.concat([frame[column], new_rows[column]], ignore_index=True)
+            for column in frame.columns
+        })
+
+    def _cached(self, name, start, end, compute):
+        frame = self.activity_frame()
+        key = (name, start, end)
+        with self._lock:
+            if key in self._results:
+                return self._results[key]
+        result = compute(self._filter(frame, start, end))
+        with self._lock:
+            self._results[key] = result
+        return result
+
+    @staticmethod
+    def _filter(frame, start, end):
+        if start is None and end is None:
+            return frame
+        mask = np.ones(len(frame), dtype=bool)
+        if start is not None:
+            mask &= frame['created_at'].values >= np.datetime64(pd.Timestamp(start))
+        if end is not None:
+            # `end` is inclusive of the whole day
+            mask &= frame['created_at'].values < np.datetime64(pd.Timestamp(end) + pd.Timedelta(days=1))
+        return frame[mask]
+
+    def monthly_activity(self, start=None, end=None):
+        """New users, posts and events per month, plus the running user total."""
+        def compute(frame):
+            counts = frame.groupby(['month', 'kind'], observed=False).size().unstack('kind', fill_value=0)
+            counts = counts.reindex(columns=KINDS, fill_value=0)
+            if len(counts):
+                counts = counts.resample('MS').sum()
+            counts.columns = ['New Users', 'Posts', 'Events']
+            counts['Total Users'] = counts['New Users'].cumsum()
+            counts.index.name = 'Month'
+            return counts
+        return self._cached('monthly_activity', start, end, compute)
+
+    def role_distribution(self, start=None, end=None):
+        return self._cached('roles', start, end, lambda frame: self._value_counts(frame, 'category', 'Role'))
+
+    def department_distribution(self, start=None, end=None):
+        return self._cached('departments', start, end,
+                            lambda frame: self._value_counts(frame, 'department', 'Department'))
+
+    def batch_distribution(self, start=None, end=None):
+        return self._cached('batches', start, end,
+                            lambda frame: self._value_counts(frame, 'batch_year', 'Batch'))
+
+    @staticmethod
+    def _value_counts(frame, column, label):
+        users = frame.loc[frame['kind'] == 'user', column]
+        counts = users.value_counts(sort=False).rename_axis(label).reset_index(name='Count')
+        return counts[counts['Count'] > 0].sort_values(label).reset_index(drop=True)
+
+    def date_bounds(self):
+        frame = self.activity_frame()
+        if frame.empty:
+            return None, None
+        return frame['created_at'].min().date(), frame['created_at'].max().date()
@@ -1,10 +1,15 @@
 import streamlit as st
-from streamlit_option_menu import option_menu
-import pandas as pd
-import plotly.express as px
 from datetime import datetime, timedelta
 import hashlib
+import html
+import time
 from database import db
+from instrumentation import set_page
+from password_hasher import HasherBusy
+
+# pandas, plotly, streamlit_option_menu, the numpy-backed services and the
+# JWT session store are imported where they are first used, so the login
+# page doesn't load them
 
 # Page configuration
 st.set_page_config(
@@ -62,6 +67,57 @@ if 'user_role' not in st.session_state:
 if 'current_page' not in st.session_state:
     st.session_state.current_page = "Dashboard"
 
+# Dashboard counters are served from the trigger-maintained counter tables and
+# cached briefly so widget interactions don't hit the database on every rerun
+@st.cache_data(ttl=60, show_spinner=False)
+def load_global_counters():
+    return db.get_global_counters()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def load_user_counters(user_id):
+    return db.get_user_counters(user_id)
+
+# One suggestion index per process, kept current by the Database write hooks
+@st.cache_resource
+def get_suggestion_engine():
+    from suggestions import SuggestionEngine
+    return SuggestionEngine(db)
+
+@st.cache_resource
+def get_like_buffer():
+    from likes import LikeBuffer
+    return LikeBuffer(db)
+
+@st.cache_resource
+def get_message_writer():
+    from messaging import MessageWriter
+    return MessageWriter(db)
+
+@st.cache_resource
+def get_timeline_maintenance():
+    from timeline import TimelineMaintenance
+    return TimelineMaintenance(db)
+
+@st.cache_resource
+def get_prescreener():
+    from prescreen import PreScreener
+    return PreScreener(db)
+
+@st.cache_resource
+def get_scheduler():
+    from scheduler import JobScheduler
+    return JobScheduler(db)
+
+@st.cache_resource
+def get_analytics():
+    from analytics import Analytics
+    return Analytics(db)
+
+@st.cache_resource
+def get_session_store():
+    from sessions import SessionStore
+    return SessionStore(db)
+
 class AuthSystem:
     @staticmethod
     def login():
@@ -76,12 +132,14 @@ class AuthSystem:
                 role = st.selectbox("Role", ["Student", "Alumni", "Admin"])
                 
                 if st.form_submit_button("Login", use_container_width=True):
-                    user = db.authenticate_user(email, password)
+                    try:
+                        user = db.authenticate_user(email, password)
+                    except HasherBusy:
+                        st.warning("The server is busy, please try again in a moment.")
+                        return
                     if user and user['role'].lower() == role.lower():
-                        st.session_state.authenticated = True
-                        st.session_state.user_id = user['id']
-                        st.session_state.user_role = user['role']
-                        st.session_state.user_data = user
+                        token = get_session_store().create(user['id'])
+                        AuthSystem.start_session(user, token)
                         st.success("Login successful!")
                         st.rerun()
                     else:
@@ -93,6 +151,60 @@ class AuthSystem:
                 st.session_state.current_page = "Sign Up"
                 st.rerun()
     
+    @staticmethod
+    def start_session(user, token):
+        st.session_state.authenticated = True
+        st.session_state.user_id = user['id']
+        st.session_state.user_role = user['role']
+        st.session_state.session_token = token
+        AuthSystem.refresh_resume_token()
+    
+    @staticmethod
+    def refresh_resume_token():
+        # Only a short-lived, single-use resume token goes in the URL, never the
+        # session token; it is swapped for a new one while the user is active
+        from sessions import RESUME_REFRESH_SECONDS
+        if time.time() - st.session_state.get('resume_issued_at', 0) < RESUME_REFRESH_SECONDS:
+            return
+        resume = get_session_store().resume_token(st.session_state.session_token,
+                                                  replaces=st.session_state.get('resume_token'))
+        st.session_state.resume_token = resume
+        st.session_state.resume_issued_at = time.time()
+        st.experimental_set_query_params(resume=resume)
+    
+    @staticmethod
+    def restore_session():
+        """Resume the session after a reload via the URL's resume token, or end one that has expired."""
+        token = st.session_state.get('session_token')
+        if token is None:
+            resume = st.experimental_get_query_params().get('resume', [None])[0]
+            redeemed = get_session_store().redeem(resume) if resume else None
+            if redeemed is not None:
+                AuthSystem.start_session(*redeemed)
+            elif resume:
+                st.experimental_set_query_params()
+            return
+        user = get_session_store().validate(token)
+        if user is not None:
+            AuthSystem.start_session(user, token)
+        else:
+            if st.session_state.authenticated:
+                st.warning("Your session has expired, please log in again.")
+            AuthSystem.logout()
+    
+    @staticmethod
+    def logout():
+        token = st.session_state.get('session_token')
+        if token is not None:
+            get_session_store().revoke(token)
+        st.experimental_set_query_params()
+        st.session_state.authenticated = False
+        st.session_state.user_id = None
+        st.session_state.user_role = None
+        st.session_state.session_token = None
+        st.session_state.resume_token = None
+        st.session_state.resume_issued_at = 0
+    
     @staticmethod
     def signup():
         st.markdown('<h2 class="main-header">Create Account</h2>', unsafe_allow_html=True)
@@ -137,7 +249,11 @@ class AuthSystem:
                         user_data['current_company'] = current_company
                         user_data['position'] = position
                     
-                    user_id = db.create_user(password=password, **user_data)
+                    try:
+                        user_id = db.create_user(password=password, **user_data)
+                    except HasherBusy:
+                        st.warning("The server is busy, please try again in a moment.")
+                        return
                     if user_id:
                         st.success("Account created successfully! Please login.")
                         st.session_state.current_page = "Login"
@@ -155,15 +271,19 @@ class StudentDashboard:
         st.markdown('<h1 class="main-header">Student Dashboard</h1>', unsafe_allow_html=True)
         
         # Dashboard metrics
-        col1, col2, col3, col4 = st.columns(4)
+        counters = load_user_counters(st.session_state.user_id)
+        global_counters = load_global_counters()
+        col1, col2, col3, col4, col5 = st.columns(5)
         with col1:
-            st.metric("Friends", "24", "+3")
+            st.metric("Friends", f"{counters['connections']:,}")
         with col2:
-            st.metric("Groups", "5", "+1")
+            st.metric("Groups", f"{counters['groups']:,}")
         with col3:
-            st.metric("Events", "3", "0")
+            st.metric("Events", f"{global_counters['approved_events']:,}")
         with col4:
-            st.metric("Messages", "12", "+2")
+            st.metric("Posts", f"{counters['posts']:,}")
+        with col5:
+            st.metric("Unread Messages", f"{counters['unread_messages']:,}")
         
         st.markdown("---")
         
@@ -173,17 +293,17 @@ class StudentDashboard:
         with col1:
             st.markdown('<h3 class="sub-header">Recent Announcements</h3>', unsafe_allow_html=True)
             
-            announcements = [
-                {"title": "Campus Hackathon", "date": "2024-03-15", "content": "Annual hackathon registration open"},
-                {"title": "Exam Schedule", "date": "2024-03-10", "content": "Final exam schedule released"},
-                {"title": "Library Hours", "date": "2024-03-05", "content": "Extended library hours for exams"}
-            ]
-            
-            for ann in announcements:
-                with st.expander(f"{ann['title']} - {ann['date']}"):
-                    st.write(ann['content'])
-                    if st.button("View Details", key=f"ann_{ann['title']}"):
-                        st.info("Detailed view would open here")
+            # Announcements and posts from the user's groups, from their precomputed timeline
+            get_timeline_maintenance()
+            posts, _ = db.get_home_feed(st.session_state.user_id, limit=5)
+            if not posts:
+                st.info("Nothing new from your groups or the campus yet.")
+            for post in posts:
+                source = post['group_name'] or "Campus"
+                author = "Anonymous" if post['first_name'] is None else f"{post['first_name']} {post['last_name']}"
+                with st.expander(f"{source} · {author} - {post['created_at'][:10]}",
+                                 expanded=post['type'] == 'announcement'):
+                    st.write(post['content'])
             
             # Quick actions
             st.markdown('<h3 class="sub-header">Quick Actions</h3>', unsafe_allow_html=True)
@@ -204,40 +324,64 @@ class StudentDashboard:
         with col2:
             st.markdown('<h3 class="sub-header">Upcoming Events</h3>', unsafe_allow_html=True)
             
-            events = [
-                {"name": "Alumni Talk", "date": "Mar 20", "time": "3 PM"},
-                {"name": "Coding Contest", "date": "Mar 22", "time": "10 AM"},
-                {"name": "Career Fair", "date": "Mar 25", "time": "9 AM"}
-            ]
+            events = db.get_upcoming_events(limit=3)
+            registrations = db.get_event_registrations(st.session_state.user_id, [event['id'] for event in events])
+            if not events:
+                st.info("No upcoming events.")
             
             for event in events:
+                start = datetime.strptime(event['start_time'], '%Y-%m-%d %H:%M:%S')
+                seats = '' if event['max_participants'] is None else \
+                    f"<br>🎟️ {event['current_participants']}/{event['max_participants']} registered"
                 st.markdown(f"""
                 <div class="card">
-                    <b>{event['name']}</b><br>
-                    📅 {event['date']} | ⏰ {event['time']}
+                    <b>{html.escape(event['title'])}</b><br>
+                    📅 {start:%b %d} | ⏰ {start:%I:%M %p}{seats}
                 </div>
                 """, unsafe_allow_html=True)
+                
+                status = registrations.get(event['id'])
+                if status is None:
+                    if st.button("Register", key=f"register_{event['id']}", use_container_width=True):
+                        status = db.register_for_event(event['id'], st.session_state.user_id)
+                        if status == 'registered':
+                            st.success("You're registered!")
+                        elif status == 'waitlisted':
+                            st.info("The event is full; you're on the waitlist.")
+                else:
+                    st.caption("✅ Registered" if status == 'registered' else "⏳ On the waitlist")
+                    if st.button("Cancel registration", key=f"cancel_{event['id']}", use_container_width=True):
+                        db.cancel_event_registration(event['id'], st.session_state.user_id)
+                        st.rerun()
             
             st.markdown('<h3 class="sub-header">Suggested Groups</h3>', unsafe_allow_html=True)
-            groups = ["Coding Club", "Robotics Team", "Music Society", "Debate Club"]
+            groups = db.suggest_groups(st.session_state.user_id, limit=4)
+            if not groups:
+                st.caption("No group suggestions right now.")
             for group in groups:
-                if st.button(f"Join {group}", key=f"join_{group}", use_container_width=True):
-                    st.success(f"Request sent to join {group}")
+                if group['connections_in_group']:
+                    st.caption(f"{group['connections_in_group']} of your connections are in {group['name']}")
+                if st.button(f"Join {group['name']}", key=f"join_{group['id']}", use_container_width=True):
+                    db.join_group(group['id'], st.session_state.user_id)
+                    load_user_counters.clear()
+                    st.success(f"You joined {group['name']}")
 
 class AlumniDashboard:
     @staticmethod
     def display():
         st.markdown('<h1 class="main-header">Alumni Dashboard</h1>', unsafe_allow_html=True)
         
+        counters = load_user_counters(st.session_state.user_id)
+        global_counters = load_global_counters()
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Connections", "156", "+8")
+            st.metric("Connections", f"{counters['connections']:,}")
         with col2:
-            st.metric("Networking Events", "4", "+1")
+            st.metric("Networking Events", f"{global_counters['approved_events']:,}")
         with col3:
-            st.metric("Mentees", "3", "+1")
+            st.metric("Groups", f"{counters['groups']:,}")
         with col4:
-            st.metric("Contributions", "$2,500", "+$500")
+            st.metric("Events Organized", f"{counters['events']:,}")
         
         st.markdown("---")
         
@@ -303,110 +447,302 @@ class AlumniDashboard:
             if st.button("Make Contribution", use_container_width=True):
                 st.success(f"Thank you for your ${amount} {contribution_type} contribution!")
 
+SYSTEM_SETTINGS = {
+    'allow_registrations': True,
+    'enable_confessions': True,
+    'auto_approve_alumni': False,
+    'max_group_size': 100,
+}
+
 class AdminDashboard:
     @staticmethod
     def display():
         st.markdown('<h1 class="main-header">Admin Dashboard</h1>', unsafe_allow_html=True)
         
         # Stats
+        counters = load_global_counters()
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Total Users", "1,245", "+23")
+            st.metric("Total Users", f"{counters['users']:,}")
         with col2:
-            st.metric("Active Today", "342", "-12")
+            st.metric("Posts", f"{counters['posts']:,}")
         with col3:
-            st.metric("Pending Approvals", "15", "+3")
+            st.metric("Pending Approvals", f"{counters['pending_approvals']:,}")
         with col4:
-            st.metric("Groups", "48", "+2")
+            st.metric("Groups", f"{counters['groups']:,}")
         
         st.markdown("---")
         
         # Tabs for different admin sections
-        tab1, tab2, tab3, tab4 = st.tabs(["User Management", "Content", "Analytics", "Settings"])
+        tab1, tab2, tab3, tab4, tab5 = st.tabs(["User Management", "Content", "Analytics", "Settings",
+                                                "Performance"])
         
         with tab1:
             st.subheader("User Management")
             
-            # Sample user data
-            users = pd.DataFrame({
-                'ID': [1, 2, 3, 4, 5],
-                'Name': ['John Doe', 'Jane Smith', 'Bob Wilson', 'Alice Brown', 'Charlie Davis'],
-                'Email': ['john@mes.edu', 'jane@mes.edu', 'bob@alumni.mes', 'alice@mes.edu', 'charlie@alumni.mes'],
-                'Role': ['Student', 'Student', 'Alumni', 'Student', 'Alumni'],
-                'Status': ['Active', 'Pending', 'Active', 'Blocked', 'Active']
-            })
+            # Filters, sorting and paging all run in SQL; only the visible page is loaded
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                role = st.selectbox("Role", ["All", "Student", "Alumni", "Admin"])
+            with col2:
+                status = st.selectbox("Status", ["All", "Active", "Pending", "Blocked"])
+            with col3:
+                department = st.selectbox("Department", ["All"] + db.get_user_departments())
+            with col4:
+                batch_year = st.number_input("Batch Year (0 = all)", min_value=0, max_value=2100, value=0)
             
-            st.dataframe(users, use_container_width=True)
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                sort_labels = {"Joined": "created_at", "Name": "name", "Email": "email", "Role": "role",
+                               "Department": "department", "Batch": "batch_year", "ID": "id"}
+                sort = st.selectbox("Sort by", list(sort_labels))
+            with col2:
+                descending = st.selectbox("Order", ["Descending", "Ascending"]) == "Descending"
+            with col3:
+                page_size = st.selectbox("Rows per page", [25, 50, 100])
+            
+            filters = {
+                'role': None if role == "All" else role.lower(),
+                'status': None if status == "All" else status.lower(),
+                'department': None if department == "All" else department,
+                'batch_year': batch_year or None,
+            }
+            _, total = db.list_users(page_size=1, **filters)
+            pages = max(1, -(-total // page_size))
+            page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+            users, total = db.list_users(sort=sort_labels[sort], descending=descending,
+                                         page=page, page_size=page_size, columnar=True, **filters)
+            
+            import pandas as pd
+            # Column arrays go straight into the frame, with no per-row objects
+            users = pd.DataFrame(users)
+            grid = pd.DataFrame({
+                'Select': False,
+                'ID': users['id'],
+                'Name': users['first_name'] + ' ' + users['last_name'],
+                'Email': users['email'],
+                'Role': users['role'].str.title(),
+                'Department': users['department'],
+                'Batch': users['batch_year'],
+                'Status': ['Blocked' if not active else 'Active' if verified else 'Pending'
+                           for active, verified in zip(users['is_active'], users['is_verified'])],
+            })
+            edited = st.data_editor(grid, use_container_width=True, hide_index=True,
+                                    disabled=[column for column in grid.columns if column != 'Select'],
+                                    key=f"user_grid_{page}")
+            st.caption(f"{total:,} users")
             
             col1, col2 = st.columns(2)
             with col1:
                 user_action = st.selectbox("Action", ["Approve", "Block", "Delete", "Make Admin"])
             with col2:
-                user_id = st.text_input("User ID")
+                extra_ids = st.text_input("Additional User IDs (comma separated)")
             
             if st.button("Apply Action"):
-                st.success(f"Action '{user_action}' applied to user {user_id}")
+                selected = edited.loc[edited['Select'], 'ID'].tolist()
+                selected += [int(part) for part in extra_ids.split(',') if part.strip().isdigit()]
+                if st.session_state.user_id in selected and user_action in ("Block", "Delete"):
+                    st.error("You can't block or delete your own account.")
+                elif not selected:
+                    st.warning("Select at least one user.")
+                else:
+                    changed = db.bulk_user_action(user_action.lower().replace(' ', '_'), selected)
+                    load_global_counters.clear()
+                    st.success(f"Action '{user_action}' applied to {changed} users")
         
         with tab2:
             st.subheader("Content Moderation")
             
-            # Confession moderation queue
-            st.write("**Confession Queue**")
-            confessions = [
-                {"id": 1, "content": "Anonymous confession about campus life...", "reports": 3},
-                {"id": 2, "content": "Another anonymous post...", "reports": 1}
-            ]
-            
-            for conf in confessions:
-                cols = st.columns([4, 1, 1])
-                with cols[0]:
-                    st.write(conf['content'])
-                    st.caption(f"Reports: {conf['reports']}")
-                with cols[1]:
-                    if st.button("Approve", key=f"app_c{conf['id']}"):
-                        st.success(f"Confession {conf['id']} approved")
-                with cols[2]:
-                    if st.button("Reject", key=f"rej_c{conf['id']}"):
-                        st.info(f"Confession {conf['id']} rejected")
+            AdminDashboard.moderation_queue()
         
         with tab3:
             st.subheader("Analytics Dashboard")
             
-            # Sample charts
-            data = pd.DataFrame({
-                'Month': ['Jan', 'Feb', 'Mar', 'Apr', 'May'],
-                'New Users': [120, 150, 180, 200, 220],
-                'Active Users': [300, 320, 350, 380, 400]
-            })
-            
-            fig = px.line(data, x='Month', y=['New Users', 'Active Users'], 
-                         title='User Growth Trend')
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Pie chart for user roles
-            role_data = pd.DataFrame({
-                'Role': ['Students', 'Alumni', 'Admins'],
-                'Count': [800, 400, 45]
-            })
-            
-            fig2 = px.pie(role_data, values='Count', names='Role', title='User Distribution by Role')
-            st.plotly_chart(fig2, use_container_width=True)
+            analytics = get_analytics()
+            first_day, last_day = analytics.date_bounds()
+            if first_day is None:
+                st.info("No activity recorded yet.")
+            else:
+                import plotly.express as px
+                date_range = st.date_input("Date range", value=(first_day, last_day),
+                                           min_value=first_day, max_value=last_day)
+                # The picker returns a single date while a range is half-selected
+                start, end = (date_range + (last_day,))[:2] if isinstance(date_range, tuple) \
+                    else (date_range, last_day)
+                
+                monthly = analytics.monthly_activity(start, end).reset_index()
+                fig = px.line(monthly, x='Month', y=['New Users', 'Posts', 'Events'],
+                              title='Monthly Growth and Activity')
+                st.plotly_chart(fig, use_container_width=True)
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    roles = analytics.role_distribution(start, end)
+                    fig2 = px.pie(roles, values='Count', names='Role', title='User Distribution by Role')
+                    st.plotly_chart(fig2, use_container_width=True)
+                with col2:
+                    departments = analytics.department_distribution(start, end)
+                    fig3 = px.bar(departments, x='Department', y='Count', title='Users by Department')
+                    st.plotly_chart(fig3, use_container_width=True)
+                
+                batches = analytics.batch_distribution(start, end)
+                fig4 = px.bar(batches, x='Batch', y='Count', title='Users by Batch Year')
+                st.plotly_chart(fig4, use_container_width=True)
         
         with tab4:
             st.subheader("System Settings")
             
+            from sessions import DEFAULT_TIMEOUT_MINUTES
+            settings = db.get_settings(dict(SYSTEM_SETTINGS, session_timeout_minutes=DEFAULT_TIMEOUT_MINUTES))
             col1, col2 = st.columns(2)
             with col1:
-                st.checkbox("Allow New Registrations", value=True)
-                st.checkbox("Enable Confessions", value=True)
-                st.checkbox("Auto-approve Alumni", value=False)
+                allow_registrations = st.checkbox("Allow New Registrations", value=settings['allow_registrations'])
+                enable_confessions = st.checkbox("Enable Confessions", value=settings['enable_confessions'])
+                auto_approve_alumni = st.checkbox("Auto-approve Alumni", value=settings['auto_approve_alumni'])
             
             with col2:
-                st.number_input("Max Group Size", min_value=10, max_value=500, value=100)
-                st.number_input("Session Timeout (minutes)", min_value=5, max_value=120, value=30)
+                max_group_size = st.number_input("Max Group Size", min_value=10, max_value=500,
+                                                 value=settings['max_group_size'])
+                session_timeout = st.number_input("Session Timeout (minutes)", min_value=5, max_value=120,
+                                                  value=settings['session_timeout_minutes'])
             
             if st.button("Save Settings", use_container_width=True):
+                db.set_settings(allow_registrations=allow_registrations, enable_confessions=enable_confessions,
+                                auto_approve_alumni=auto_approve_alumni, max_group_size=int(max_group_size),
+                                session_timeout_minutes=int(session_timeout))
                 st.success("Settings saved successfully!")
+            
+            AdminDashboard.data_export()
+        
+        with tab5:
+            AdminDashboard.performance()
+    
+    @staticmethod
+    def moderation_queue():
+        """Reported and pre-screened posts, highest priority first."""
+        get_prescreener()
+        st.write(f"**Review Queue** ({db.get_review_queue_size()} awaiting review)")
+        queue = db.get_review_queue()
+        if not queue:
+            st.info("Nothing to review.")
+        
+        for post in queue:
+            cols = st.columns([4, 1, 1])
+            with cols[0]:
+                st.write(post['content'])
+                status = f"held ({post['hold_reason']})" if post['status'] == 'held' else post['status']
+                st.caption(f"{post['type'].title()} #{post['id']} · {status} · "
+                           f"Reports: {post['report_count']} · Priority: {post['review_priority']}")
+            with cols[1]:
+                if st.button("Approve", key=f"app_p{post['id']}"):
+                    if db.review_post(post['id'], 'approve'):
+                        st.success(f"Post {post['id']} approved")
+                    st.rerun()
+            with cols[2]:
+                if st.button("Remove", key=f"rem_p{post['id']}"):
+                    if db.review_post(post['id'], 'remove'):
+                        st.info(f"Post {post['id']} removed")
+                    st.rerun()
+    
+    @staticmethod
+    def data_export():
+        st.markdown("---")
+        st.subheader("Data Export")
+        from exports import EXPORTS, FORMATS, export
+        col1, col2 = st.columns(2)
+        with col1:
+            name = st.selectbox("Dataset", list(EXPORTS), format_func=lambda key: key.replace('_', ' ').title())
+        with col2:
+            fmt = st.selectbox("Format", list(FORMATS), format_func=str.upper)
+        # The export streams to disk, but the download itself is served from
+        # memory, so whole-table dumps of the big tables belong on the CLI
+        st.caption("For very large dumps, run `python exports.py <dataset> --format <format> "
+                   "--output <file>` on the server instead.")
+        
+        if st.button("Prepare Export"):
+            import tempfile
+            with st.spinner("Exporting..."), tempfile.TemporaryFile() as f:
+                rows = export(db, name, fmt, f)
+                f.seek(0)
+                st.download_button(f"Download {rows:,} rows", f.read(), file_name=f"{name}.{fmt}",
+                                   mime=FORMATS[fmt], use_container_width=True)
+    
+    @staticmethod
+    def performance():
+        st.subheader("Query Cache")
+        stats = db.query_cache.stats()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Entries", f"{stats['size']:,} / {stats['maxsize']:,}")
+        col2.metric("Hit Rate", f"{stats['hit_rate']:.1%}")
+        col3.metric("Evictions", f"{stats['evictions']:,}")
+        col4.metric("Invalidations", f"{stats['invalidations']:,}")
+        
+        st.subheader("Maintenance Jobs")
+        scheduler = get_scheduler()
+        # Stored in the database, so runs by a standalone scheduler show too
+        jobs = db.get_setting('maintenance_jobs', {})
+        rows = []
+        for name in scheduler.jobs:
+            job = jobs.get(name, {})
+            rows.append({
+                'Job': name,
+                'Every (h)': round(scheduler.intervals[name] / 3600, 1),
+                'Last Run': datetime.fromtimestamp(job['last_run']).strftime('%Y-%m-%d %H:%M') if job else '',
+                'Runs': job.get('runs', 0),
+                'Failures': job.get('failures', 0),
+                'Last (ms)': round(job['last_ms'], 1) if job else None,
+                'Max (ms)': round(job['max_ms'], 1) if job else None,
+                'Last Result': str(job['last_error'] or job['last_result']) if job else '',
+            })
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            job = st.selectbox("Job", list(scheduler.jobs), label_visibility="collapsed")
+        with col2:
+            if st.button("Run Now", use_container_width=True):
+                scheduler.run(job)
+                st.rerun()
+        
+        st.subheader("Top Queries")
+        if db.query_stats is None:
+            st.info("Query instrumentation is turned off.")
+            return
+        queries = db.query_stats.top(limit=25)
+        if not queries:
+            st.info("No queries recorded yet.")
+            return
+        st.dataframe([{
+            'Query': query['fingerprint'],
+            'Calls': query['calls'],
+            'Total (ms)': round(query['total_ms'], 1),
+            'Mean (ms)': round(query['mean_ms'], 3),
+            'p95 (ms)': round(query['p95_ms'], 3),
+            'Max (ms)': round(query['max_ms'], 3),
+            'Rows': query['rows'],
+            'Pages': ', '.join(page or 'background' for page in query['pages']),
+        } for query in queries], use_container_width=True, hide_index=True)
+        
+        # EXPLAIN binds NULL for every parameter: the plan doesn't depend on values
+        explainable = [query for query in queries
+                       if query['sample'][0].lstrip().upper().startswith(('SELECT', 'WITH', 'INSERT', 'UPDATE',
+                                                                          'DELETE'))]
+        if explainable:
+            choice = st.selectbox("Query", range(len(explainable)),
+                                  format_func=lambda i: explainable[i]['fingerprint'][:120])
+            if st.button("Explain Query Plan"):
+                sql, params = explainable[choice]['sample']
+                st.code(sql.strip(), language="sql")
+                st.dataframe(db.explain(sql, params), use_container_width=True, hide_index=True)
+        
+        st.subheader(f"Slow Queries (over {db.query_stats.slow_ms:g} ms)")
+        slow = list(db.query_stats.slow_queries)[::-1]
+        if slow:
+            st.dataframe(slow, use_container_width=True, hide_index=True)
+        else:
+            st.caption("None recorded.")
+        if st.button("Reset Statistics"):
+            db.query_stats.reset()
+            st.rerun()
 
 class SidebarNavigation:
     @staticmethod
@@ -419,7 +755,7 @@ class SidebarNavigation:
                 return
             
             # User info
-            user = st.session_state.user_data
+            user = db.get_user_by_id(st.session_state.user_id)
             st.markdown(f"**Welcome, {user['first_name']}!**")
             st.markdown(f"*{user['role'].title()}*")
             st.markdown("---")
@@ -433,6 +769,7 @@ class SidebarNavigation:
                     "Profile",
                     "Academics",
                     "Friends",
+                    "Messages",
                     "Groups",
                     "Confessions",
                     "Events & Clubs",
@@ -444,6 +781,7 @@ class SidebarNavigation:
                     "Dashboard",
                     "Profile",
                     "Networking",
+                    "Messages",
                     "Groups",
                     "Events",
                     "Contributions",
@@ -460,6 +798,7 @@ class SidebarNavigation:
                     "System Settings"
                 ]
             
+            from streamlit_option_menu import option_menu
             selected = option_menu(
                 menu_title="Navigation",
                 options=menu_options,
@@ -467,6 +806,7 @@ class SidebarNavigation:
                       'person' if 'Profile' in opt else
                       'people' if 'Friends' in opt or 'Networking' in opt else
                       'chat' if 'Confessions' in opt else
+                      'envelope' if 'Messages' in opt else
                       'calendar-event' if 'Events' in opt else
                       'gear' if 'Settings' in opt else
                       'graph-up' for opt in menu_options],
@@ -475,7 +815,11 @@ class SidebarNavigation:
                 orientation="vertical"
             )
             
-            st.session_state.current_page = selected
+            # Only follow the menu when its selection changes, so quick actions
+            # that set current_page directly aren't overridden on the next rerun
+            if selected != st.session_state.get('menu_selection'):
+                st.session_state.menu_selection = selected
+                st.session_state.current_page = selected
             
             st.markdown("---")
             
@@ -500,48 +844,74 @@ class SidebarNavigation:
             
             # Logout button
             if st.button("🚪 Logout", use_container_width=True):
-                st.session_state.authenticated = False
-                st.session_state.user_id = None
-                st.session_state.user_role = None
+                AuthSystem.logout()
                 st.session_state.current_page = "Login"
                 st.rerun()
 
+CONFESSION_PAGE_SIZE = 20
+
 class ConfessionsModule:
     @staticmethod
     def display():
         st.markdown('<h1 class="main-header">Confessions</h1>', unsafe_allow_html=True)
+        get_prescreener()
         
         tab1, tab2, tab3 = st.tabs(["View Confessions", "Post Confession", "My Posts"])
         
         with tab1:
             st.subheader("Latest Confessions")
             
-            # Sample confessions
-            confessions = [
-                {"id": 1, "content": "I love the new library system! So much easier to find books.", "likes": 24, "comments": 3, "time": "2h ago"},
-                {"id": 2, "content": "Anyone else struggling with the advanced algorithms course?", "likes": 15, "comments": 12, "time": "5h ago"},
-                {"id": 3, "content": "Shoutout to the cafeteria staff for the amazing food today!", "likes": 42, "comments": 5, "time": "1d ago"},
-                {"id": 4, "content": "Looking for study partners for the physics exam next week.", "likes": 8, "comments": 7, "time": "2d ago"}
-            ]
+            # Pages are appended as the user asks for more; only the next page is queried
+            if 'confession_feed' not in st.session_state:
+                st.session_state.confession_feed, st.session_state.confession_cursor = \
+                    db.get_confession_feed(limit=CONFESSION_PAGE_SIZE)
             
-            for conf in confessions:
+            confessions = st.session_state.confession_feed
+            if not confessions:
+                st.info("No confessions yet. Be the first to post one!")
+            likes = get_like_buffer()
+            liked = likes.liked_among(st.session_state.user_id, [conf['id'] for conf in confessions])
+            
+            for position, conf in enumerate(confessions):
                 with st.container():
                     st.markdown(f"""
                     <div class="card">
-                        <p>{conf['content']}</p>
-                        <small>Posted {conf['time']}</small>
+                        <p>{html.escape(conf['content'])}</p>
+                        <small>Posted {conf['created_at']}</small>
                         <br>
-                        <small>❤️ {conf['likes']} | 💬 {conf['comments']}</small>
+                        <small>❤️ {conf['likes']}</small>
                     </div>
                     """, unsafe_allow_html=True)
                     
                     col1, col2, col3 = st.columns([1, 1, 8])
                     with col1:
-                        if st.button(f"Like", key=f"like_{conf['id']}"):
-                            st.success("Liked!")
+                        # Likes are buffered and flushed in batches; update the
+                        # loaded copy so the count reflects the click immediately
+                        if conf['id'] in liked:
+                            if st.button("Unlike", key=f"like_{conf['id']}"):
+                                if likes.unlike(conf['id'], st.session_state.user_id):
+                                    confessions[position] = conf._replace(likes=conf['likes'] - 1)
+                                st.rerun()
+                        elif st.button("Like", key=f"like_{conf['id']}"):
+                            if likes.like(conf['id'], st.session_state.user_id):
+                                confessions[position] = conf._replace(likes=conf['likes'] + 1)
+                            st.rerun()
                     with col2:
                         if st.button(f"Comment", key=f"comment_{conf['id']}"):
                             st.info("Comment feature")
+                    with col3:
+                        if st.button("Report", key=f"report_{conf['id']}"):
+                            if db.report_post(conf['id'], st.session_state.user_id):
+                                st.success("Thanks, a moderator will review this confession.")
+                            else:
+                                st.info("You've already reported this confession.")
+            
+            if st.session_state.confession_cursor is not None:
+                if st.button("Load more", use_container_width=True):
+                    posts, st.session_state.confession_cursor = db.get_confession_feed(
+                        limit=CONFESSION_PAGE_SIZE, cursor=st.session_state.confession_cursor)
+                    st.session_state.confession_feed = confessions + posts
+                    st.rerun()
         
         with tab2:
             st.subheader("Post a Confession")
@@ -558,8 +928,11 @@ class ConfessionsModule:
             
             if st.button("Post Confession", use_container_width=True):
                 if confession_text.strip():
+                    db.create_post(st.session_state.user_id, confession_text.strip(),
+                                   post_type='confession', is_anonymous=is_anonymous)
+                    # Start the feed over so the new post shows at the top
+                    st.session_state.pop('confession_feed', None)
                     st.success("Confession posted successfully!")
-                    # Here you would save to database
                 else:
                     st.error("Please write something before posting.")
         
@@ -567,8 +940,229 @@ class ConfessionsModule:
             st.subheader("My Confessions")
             st.info("You have no confessions yet. They appear here only if you post non-anonymously.")
 
+class SearchModule:
+    @staticmethod
+    def display():
+        st.markdown('<h1 class="main-header">Find Friends</h1>', unsafe_allow_html=True)
+        
+        query = st.text_input("Search people, groups and posts",
+                              placeholder="Name, department, company, skill...")
+        if not query.strip():
+            SearchModule.people_you_may_know()
+            return
+        
+        # Prefix mode so partial words match while typing
+        results = db.search(query, limit=20, prefix=True, viewer_id=st.session_state.user_id)
+        tab1, tab2, tab3 = st.tabs([f"People ({len(results['users'])})",
+                                    f"Groups ({len(results['groups'])})",
+                                    f"Posts ({len(results['posts'])})"])
+        
+        with tab1:
+            for user in results['users']:
+                details = user['department'] if user['role'] == 'student' else \
+                    ' at '.join(filter(None, [user['position'], user['current_company']]))
+                st.markdown(f"""
+                <div class="card">
+                    <b>{html.escape(user['first_name'])} {html.escape(user['last_name'])}</b>
+                    — {user['role'].title()}<br>
+                    <small>{html.escape(details or '')} {user['batch_year'] or ''}</small>
+                </div>
+                """, unsafe_allow_html=True)
+                SearchModule.connect_button(user['id'], key=f"search_connect_{user['id']}")
+        
+        with tab2:
+            for group in results['groups']:
+                st.markdown(f"""
+                <div class="card">
+                    <b>{html.escape(group['name'])}</b> — {group['member_count']} members<br>
+                    <small>{html.escape(group['description'] or '')}</small>
+                </div>
+                """, unsafe_allow_html=True)
+        
+        with tab3:
+            for post in results['posts']:
+                author = 'Anonymous' if post['user_id'] is None else \
+                    f"{post['first_name']} {post['last_name']}"
+                st.markdown(f"""
+                <div class="card">
+                    <p>{html.escape(post['content'])}</p>
+                    <small>{html.escape(author)} · {post['created_at']}</small>
+                </div>
+                """, unsafe_allow_html=True)
+
+    @staticmethod
+    def people_you_may_know():
+        st.markdown('<h3 class="sub-header">People You May Know</h3>', unsafe_allow_html=True)
+        suggestions = get_suggestion_engine().suggest(st.session_state.user_id, k=10)
+        if not suggestions:
+            st.info("Connect with a few classmates to get suggestions.")
+            return
+        for suggestion in suggestions:
+            user = db.get_user_by_id(suggestion['user_id'])
+            if user is None:
+                continue
+            reasons = []
+            if suggestion['mutual_connections']:
+                reasons.append(f"{suggestion['mutual_connections']} mutual connections")
+            if suggestion['shared_groups']:
+                reasons.append(f"{suggestion['shared_groups']} shared groups")
+            cols = st.columns([4, 1])
+            with cols[0]:
+                st.write(f"**{user['first_name']} {user['last_name']}** - "
+                         f"{user['department'] or user['current_company'] or user['role'].title()}")
+                if reasons:
+                    st.caption(', '.join(reasons))
+            with cols[1]:
+                SearchModule.connect_button(user['id'], key=f"suggest_connect_{user['id']}")
+    
+    @staticmethod
+    def connect_button(user_id, key):
+        if user_id == st.session_state.user_id:
+            return
+        if st.button("Connect", key=key):
+            status = db.send_connection_request(st.session_state.user_id, user_id)
+            if status == 'accepted':
+                st.success("You are now connected!")
+            elif status == 'pending':
+                st.success("Connection request sent")
+            else:
+                st.error("Unable to connect with this user")
+
+class GroupsModule:
+    @staticmethod
+    def display():
+        st.markdown('<h1 class="main-header">Groups</h1>', unsafe_allow_html=True)
+        
+        tab1, tab2 = st.tabs(["My Groups", "Create Group"])
+        
+        with tab1:
+            groups = db.get_user_groups(st.session_state.user_id)
+            if not groups:
+                st.info("You haven't joined any groups yet.")
+            for group in groups:
+                cols = st.columns([4, 1])
+                with cols[0]:
+                    st.markdown(f"**{group['name']}** · {group['member_count']} members · {group['role'].title()}")
+                    if group['description']:
+                        st.caption(group['description'])
+                with cols[1]:
+                    if st.button("Leave", key=f"leave_{group['id']}"):
+                        db.leave_group(group['id'], st.session_state.user_id)
+                        load_user_counters.clear()
+                        st.rerun()
+        
+        with tab2:
+            with st.form("create_group_form"):
+                name = st.text_input("Group Name")
+                description = st.text_area("Description")
+                col1, col2 = st.columns(2)
+                with col1:
+                    category = st.selectbox("Category", ["Academic", "Club", "Sports", "Cultural", "Alumni", "Other"])
+                with col2:
+                    privacy = st.selectbox("Privacy", ["Public", "Private"])
+                if st.form_submit_button("Create Group", use_container_width=True):
+                    if name.strip():
+                        db.create_group(name.strip(), st.session_state.user_id, description.strip() or None,
+                                        category, privacy.lower())
+                        load_user_counters.clear()
+                        st.success(f"Group '{name.strip()}' created!")
+                    else:
+                        st.error("Please give the group a name.")
+
+class MessagesModule:
+    @staticmethod
+    def display():
+        st.markdown('<h1 class="main-header">Messages</h1>', unsafe_allow_html=True)
+        user_id = st.session_state.user_id
+        conversations = db.get_conversations(user_id)
+        by_id = {conversation['conversation_id']: conversation for conversation in conversations}
+        
+        inbox_col, thread_col = st.columns([1, 2])
+        
+        # The thread is drawn first so that reading it is reflected in the inbox
+        with thread_col:
+            conversation = by_id.get(st.session_state.get('open_conversation'))
+            if conversation is None:
+                st.info("Pick a conversation, or message one of your connections.")
+            else:
+                MessagesModule.thread(conversation)
+        
+        with inbox_col:
+            contacts = {contact['id']: f"{contact['first_name']} {contact['last_name']}"
+                        for contact in db.get_connections(user_id)}
+            if contacts:
+                other_id = st.selectbox("New message to", list(contacts), format_func=contacts.get)
+                if st.button("Open Conversation", use_container_width=True):
+                    conversation_id = db.get_or_create_conversation(user_id, other_id)
+                    if conversation_id is None:
+                        st.error("You can't message this user.")
+                    else:
+                        st.session_state.open_conversation = conversation_id
+                        st.rerun()
+            
+            st.markdown("---")
+            if not conversations:
+                st.caption("No conversations yet.")
+            for conversation in conversations:
+                name = f"{conversation['first_name'] or 'Deleted'} {conversation['last_name'] or 'user'}"
+                unread = conversation['unread_count']
+                if st.button(f"{name} ({unread} new)" if unread else name, use_container_width=True,
+                             key=f"conversation_{conversation['conversation_id']}"):
+                    st.session_state.open_conversation = conversation['conversation_id']
+                    st.rerun()
+                if conversation['last_body']:
+                    st.caption(conversation['last_body'][:60])
+    
+    @staticmethod
+    def thread(conversation):
+        user_id = st.session_state.user_id
+        conversation_id = conversation['conversation_id']
+        
+        # The open thread lives in session state; each rerun only asks for
+        # messages after the newest one already held
+        thread = st.session_state.get('message_thread')
+        if thread is None or thread['conversation_id'] != conversation_id:
+            thread = {'conversation_id': conversation_id,
+                      'messages': db.get_message_history(conversation_id, limit=50)}
+        elif conversation['last_message_id'] > (thread['messages'][-1]['id'] if thread['messages'] else 0):
+            thread['messages'] += db.get_messages(conversation_id, after_id=thread['messages'][-1]['id']
+                                                  if thread['messages'] else 0)
+            thread['messages'] = thread['messages'][-200:]
+        st.session_state.message_thread = thread
+        
+        if conversation['unread_count'] and thread['messages']:
+            conversation['unread_count'] = db.mark_conversation_read(conversation_id, user_id,
+                                                                     thread['messages'][-1]['id'])
+            load_user_counters.clear()
+        
+        name = f"{conversation['first_name'] or 'Deleted'} {conversation['last_name'] or 'user'}"
+        st.subheader(name)
+        if not thread['messages']:
+            st.caption("No messages yet. Say hello!")
+        for message in thread['messages']:
+            sender = "You" if message['sender_id'] == user_id else html.escape(name)
+            st.markdown(f"""
+            <div class="card">
+                <b>{sender}</b> <small>{message['created_at']}</small><br>
+                {html.escape(message['body'])}
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with st.form("send_message_form", clear_on_submit=True):
+            body = st.text_area("Message", height=80)
+            if st.form_submit_button("Send", use_container_width=True) and body.strip():
+                message = get_message_writer().send(conversation_id, user_id, body.strip())
+                if message is None:
+                    st.error("Message could not be sent.")
+                else:
+                    st.rerun()
+        if st.button("Check for New Messages"):
+            st.rerun()
+
 # Main app logic
 def main():
+    set_page(st.session_state.current_page)
+    AuthSystem.restore_session()
     if not st.session_state.authenticated:
         if st.session_state.current_page == "Sign Up":
             AuthSystem.signup()
@@ -576,6 +1170,8 @@ def main():
             AuthSystem.login()
     else:
         SidebarNavigation.render()
+        # Periodic maintenance runs in the background of the app process
+        get_scheduler()
         
         # Route to appropriate dashboard
         if st.session_state.current_page == "Dashboard":
@@ -586,9 +1182,22 @@ def main():
             elif st.session_state.user_role == "admin":
                 AdminDashboard.display()
         
+        elif st.session_state.current_page == "Confession Moderation":
+            st.markdown('<h1 class="main-header">Confession Moderation</h1>', unsafe_allow_html=True)
+            AdminDashboard.moderation_queue()
+        
         elif "Confessions" in st.session_state.current_page:
             ConfessionsModule.display()
         
+        elif st.session_state.current_page in ("Find Friends", "Friends", "Networking"):
+            SearchModule.display()
+        
+        elif st.session_state.current_page in ("Groups", "Create Group"):
+            GroupsModule.display()
+        
+        elif st.session_state.current_page == "Messages":
+            MessagesModule.display()
+        
         # Add other module displays here...
         else:
             st.markdown(f'<h1 class="main-header">{st.session_state.current_page}</h1>', unsafe_allow_html=True)
@@ -0,0 +1,234 @@
+"""Storage backends behind ``Database.pool``.
+
+``Database`` talks to a pool through four calls: ``read()`` and ``write()``
+context managers yielding a connection with sqlite3-style ``execute`` and
+``executemany``, ``in_transaction()`` and ``close()``. A plain file name
+gets the sqlite3 ``ConnectionPool``; a URL such as
+``sqlite:///mes_connect.db`` or ``postgresql+psycopg://...`` gets a
+SQLAlchemy Core engine with a QueuePool instead.
+
+The schema and queries are written in SQLite's dialect (FTS5, triggers,
+``INSERT OR IGNORE``), so server databases additionally need ported
+migrations; the pool, transaction and parameter handling here already
+work for them.
+"""
+import functools
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from connection_pool import ConnectionPool
+
+
+def create_pool(db_name, max_readers=8, busy_timeout_ms=5000, stats=None, **options):
+    """Return the pool for ``db_name``: a file path or ``:memory:``, or a SQLAlchemy URL."""
+    if '://' not in db_name:
+        factory = stats.connection if stats is not None else sqlite3.Connection
+        return ConnectionPool(db_name, max_readers=max_readers, busy_timeout_ms=busy_timeout_ms, factory=factory)
+    options.setdefault('pool_size', max_readers)
+    return SQLAlchemyPool(db_name, busy_timeout_ms=busy_timeout_ms, stats=stats, **options)
+
+
+# String literals are matched first so placeholders inside them are left alone
+_PLACEHOLDERS = re.compile(r"'(?:[^']|'')*'|%|\?|(?<!:):([A-Za-z_]\w*)")
+
+
+@functools.lru_cache(maxsize=1024)
+def translate(sql, paramstyle):
+    """Rewrite qmark/named SQL for drivers using the ``format`` or ``pyformat`` paramstyle."""
+    if paramstyle in ('qmark', 'named'):
+        return sql
+
+    def replace(match):
+        token = match.group(0)
+        if token.startswith("'"):
+            return token.replace('%', '%%')
+        if token == '%':
+            return '%%'
+        if token == '?':
+            return '%s'
+        return f'%({match.group(1)})s'
+    return _PLACEHOLDERS.sub(replace, sql)
+
+
+class Cursor:
+    """sqlite3-style view of a SQLAlchemy result."""
+
+    def __init__(self, result):
+        self._result = result
+        self.rowcount = result.rowcount
+        self.description = [(key, None, None, None, None, None, None) for key in result.keys()] \
+            if result.returns_rows else None
+
+    @property
+    def lastrowid(self):
+        return self._result.lastrowid
+
+    # Statements without rows (DDL, most PRAGMAs) fetch nothing, as in sqlite3
+    def fetchone(self):
+        return self._result.fetchone() if self._result.returns_rows else None
+
+    def fetchmany(self, size=1):
+        return self._result.fetchmany(size) if self._result.returns_rows else []
+
+    def fetchall(self):
+        return self._result.fetchall() if self._result.returns_rows else []
+
+    def __iter__(self):
+        return iter(self._result if self._result.returns_rows else ())
+
+
+class Connection:
+    """sqlite3-style ``execute``/``executemany`` over a SQLAlchemy connection.
+
+    SQL goes to the driver as written (after paramstyle translation), so the
+    driver's statement cache prepares each distinct statement once per
+    connection. Driver errors are re-raised unwrapped, so callers keep
+    catching e.g. ``sqlite3.IntegrityError``.
+    """
+
+    def __init__(self, connection, paramstyle):
+        self.connection = connection
+        self.paramstyle = paramstyle
+
+    # exec_driver_sql takes one set of parameters as a tuple or dict, and many
+    # as a list of those
+    def execute(self, sql, params=()):
+        return self._run(sql, params if isinstance(params, dict) else tuple(params))
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = [params if isinstance(params, dict) else tuple(params) for params in seq_of_params]
+        if not seq_of_params:
+            return None
+        return self._run(sql, seq_of_params)
+
+    def _run(self, sql, params):
+        from sqlalchemy.exc import DBAPIError
+        try:
+            return Cursor(self.connection.exec_driver_sql(translate(sql, self.paramstyle), params))
+        except DBAPIError as exc:
+            raise exc.orig from None
+
+
+class SQLAlchemyPool:
+    """Connection pool on a SQLAlchemy engine with the ``ConnectionPool`` interface.
+
+    Connections come from a QueuePool of ``pool_size`` plus ``max_overflow``.
+    Writes run in one transaction per outermost ``write()``; nested calls on
+    the same thread join it. On SQLite, writes are also serialized in-process
+    and start with ``BEGIN IMMEDIATE``, as in ``ConnectionPool``; in-memory
+    SQLite uses a single shared connection, so reads go through the writer.
+    """
+
+    def __init__(self, url, pool_size=8, max_overflow=4, pool_timeout=30, busy_timeout_ms=5000, stats=None,
+                 **engine_options):
+        from sqlalchemy import create_engine, event
+        from sqlalchemy.engine import make_url
+        from sqlalchemy.pool import QueuePool, StaticPool
+
+        url = make_url(url)
+        self.db_name = url.render_as_string(hide_password=True)
+        self.sqlite = url.get_backend_name() == 'sqlite'
+        memory = self.sqlite and url.database in (None, '', ':memory:')
+        if self.sqlite:
+            # The sqlite3 statement cache keeps up to 256 prepared statements per connection
+            engine_options.setdefault('connect_args', {}).update(
+                check_same_thread=False, timeout=busy_timeout_ms / 1000, cached_statements=256)
+            if stats is not None:
+                engine_options['connect_args']['factory'] = stats.connection
+        if memory:
+            engine_options.update(poolclass=StaticPool)
+        else:
+            engine_options.update(poolclass=QueuePool, pool_size=pool_size, max_overflow=max_overflow,
+                                  pool_timeout=pool_timeout, pool_pre_ping=not self.sqlite)
+        self.engine = create_engine(url, **engine_options)
+        self.paramstyle = self.engine.dialect.paramstyle
+        self.max_readers = 0 if memory else pool_size + max_overflow
+
+        self._write_lock = threading.RLock() if self.sqlite else None
+        self._local = threading.local()
+        if self.sqlite:
+            event.listen(self.engine, 'connect', self._on_sqlite_connect)
+            event.listen(self.engine, 'begin', self._on_sqlite_begin)
+        elif stats is not None:
+            event.listen(self.engine, 'before_cursor_execute', self._before_execute)
+            event.listen(self.engine, 'after_cursor_execute', functools.partial(self._after_execute, stats))
+
+    def _on_sqlite_connect(self, dbapi_connection, _):
+        # Let SQLAlchemy, not pysqlite, decide when transactions begin
+        dbapi_connection.isolation_level = None
+        # As in ConnectionPool: only takes effect on a new, empty file
+        dbapi_connection.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        dbapi_connection.execute('PRAGMA journal_mode=WAL')
+        dbapi_connection.execute('PRAGMA synchronous=NORMAL')
+
+    def _on_sqlite_begin(self, connection):
+        # Reads stay in autocommit, as on ConnectionPool's readers
+        if connection.info.get('writer'):
+            connection.connection.dbapi_connection.execute('BEGIN IMMEDIATE')
+
+    @staticmethod
+    def _before_execute(connection, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @staticmethod
+    def _after_execute(stats, connection, cursor, statement, parameters, context, executemany):
+        stats.record(statement, () if executemany else parameters,
+                     time.perf_counter() - context._query_started, cursor.rowcount)
+
+    def _in_write(self):
+        return getattr(self._local, 'writer', None) is not None
+
+    def in_transaction(self):
+        """True while the calling thread is inside ``write()``."""
+        return self._in_write()
+
+    @contextmanager
+    def write(self):
+        """Yield a connection inside a transaction, committed when the outermost block exits."""
+        if self._in_write():
+            yield self._local.writer
+            return
+        lock = self._write_lock or _NO_LOCK
+        with lock, self.engine.connect() as connection:
+            connection.info['writer'] = True
+            try:
+                with connection.begin():
+                    self._local.writer = Connection(connection, self.paramstyle)
+                    yield self._local.writer
+            finally:
+                self._local.writer = None
+                connection.info['writer'] = False
+
+    @contextmanager
+    def read(self):
+        """Yield a connection for reads; inside ``write()`` it is the writer's."""
+        if self._in_write():
+            yield self._local.writer
+            return
+        if not self.max_readers:
+            with self.write() as connection:
+                yield connection
+            return
+        # Returning the connection to the pool ends any implicit read transaction
+        with self.engine.connect() as connection:
+            yield Connection(connection, self.paramstyle)
+
+    def status(self):
+        return self.engine.pool.status()
+
+    def close(self):
+        self.engine.dispose()
+
+
+class _NoLock:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_LOCK = _NoLock()
@@ -0,0 +1,71 @@
+"""Admin analytics timings on a large synthetic user base.
+
+    python -m benchmarks.analytics --users 500000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from analytics import Analytics
+from database import Database
+
+DEPARTMENTS = ['CSE', 'ECE', 'EEE', 'MECH', 'CIVIL']
+
+
+def seed(db, users, posts, rng):
+    start = datetime(2019, 1, 1)
+    span = (datetime(2026, 1, 1) - start).total_seconds()
+
+    def timestamp():
+        return (start + timedelta(seconds=rng.random() * span)).strftime('%Y-%m-%d %H:%M:%S')
+
+    with db.pool.write() as conn:
+        conn.executemany(
+            'INSERT INTO users (email, password, role, first_name, last_name, department, batch_year, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [(f'user{i}@mes.edu', 'x', rng.choices(['student', 'alumni', 'admin'], [70, 29, 1])[0], 'F', 'L',
+              rng.choice(DEPARTMENTS), rng.randint(2000, 2027), timestamp()) for i in range(users)])
+        conn.executemany('INSERT INTO posts (user_id, content, type, created_at) VALUES (?, ?, ?, ?)',
+                         [(rng.randint(1, users), 'post', rng.choice(['confession', 'normal']), timestamp())
+                          for _ in range(posts)])
+    db.rebuild_counters()
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    fn()
+    print(f'{label:<32} {(time.perf_counter() - start) * 1000:>8.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=500000)
+    parser.add_argument('--posts', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'))
+        seed(db, args.users, args.posts, random.Random(3))
+        analytics = Analytics(db)
+
+        def all_charts(start=None, end=None):
+            analytics.monthly_activity(start, end)
+            analytics.role_distribution(start, end)
+            analytics.department_distribution(start, end)
+            analytics.batch_distribution(start, end)
+
+        timed('load activity frame', analytics.activity_frame)
+        timed('all charts (cold aggregates)', all_charts)
+        timed('all charts (cached)', all_charts)
+        timed('all charts, new date range', lambda: all_charts('2022-01-01', '2023-12-31'))
+
+        db.create_post(1, 'fresh activity')
+        timed('all charts after a new post', all_charts)
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Compare storage backends on the load-test scenarios.
+
+    python -m benchmarks.backends --users 5000 --duration 5 --threads 8
+    python -m benchmarks.backends --backend postgresql+psycopg://bench@localhost/campus
+
+Runs the ``benchmarks.run`` scenarios (bcrypt logins excluded) against the
+same generated campus through the sqlite3 ``ConnectionPool``, the
+SQLAlchemy QueuePool on the same file, and SQLAlchemy on in-memory SQLite,
+the in-process stand-in for a server database. ``--backend`` adds further
+URLs; their database must already hold the schema.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+from benchmarks.datagen import generate
+from benchmarks.run import SCENARIOS, Campus, run_scenario
+from database import Database
+from password_hasher import PasswordHasher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--pool-size', type=int, default=8, help='QueuePool size for SQLAlchemy backends')
+    parser.add_argument('--max-overflow', type=int, default=4)
+    parser.add_argument('--scenarios', nargs='+', choices=[name for name in SCENARIOS if name != 'login'],
+                        default=['feed', 'search', 'register', 'dashboard'])
+    parser.add_argument('--backend', nargs='*', default=[], help='extra SQLAlchemy URLs to include')
+    args = parser.parse_args()
+    log = lambda line: print(line, file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed = os.path.join(tmp, 'seed.db')
+        db = Database(seed, hasher=PasswordHasher(workers=0))
+        generate(db, args.users, rounds=4, log=log)
+        db.close()
+
+        options = {'pool_size': args.pool_size, 'max_overflow': args.max_overflow}
+        backends = [('sqlite3 pool', os.path.join(tmp, 'pool.db'), None),
+                    ('sqlalchemy file', 'sqlite:///' + os.path.join(tmp, 'engine.db'), options),
+                    ('sqlalchemy memory', 'sqlite://', {})]
+        backends += [(url.split('://')[0], url, options) for url in args.backend]
+
+        results = {}
+        for label, url, backend_options in backends:
+            if url.startswith(tmp):
+                shutil.copy(seed, url)
+            elif url.startswith('sqlite:///' + tmp):
+                shutil.copy(seed, url[len('sqlite:///'):])
+            db = Database(url, max_readers=args.threads, query_cache_size=0, instrument=False,
+                          hasher=PasswordHasher(workers=0), backend_options=backend_options)
+            if url == 'sqlite://':
+                log(f'generating {args.users} users in memory ...')
+                generate(db, args.users, rounds=4, log=lambda line: None)
+            campus = Campus(db)
+            for name in args.scenarios:
+                log(f'{label}: {name} ...')
+                results[label, name] = run_scenario(db, campus, SCENARIOS[name], args.threads, args.duration)
+            db.close()
+
+    print(f"{'backend':<18}  {'scenario':<10}  {'ops/s':>8}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  errors")
+    for (label, name), result in results.items():
+        if not result.get('ops'):
+            print(f'{label:<18}  {name:<10}  {"-":>8}  {"-":>8}  {"-":>8}  {"-":>8}  {result["errors"]}')
+            continue
+        print(f"{label:<18}  {name:<10}  {result['throughput_per_s']:>8.0f}  {result['p50_ms']:>8.2f}  "
+              f"{result['p95_ms']:>8.2f}  {result['p99_ms']:>8.2f}  {result['errors']}")
+
+
+if __name__ == '__main__':
+    main()
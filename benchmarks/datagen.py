@@ -0,0 +1,227 @@
+"""Fill a database with a synthetic, realistically skewed campus.
+
+    python -m benchmarks.datagen --scale 100k --db bench.db
+
+Activity follows Zipf-like distributions: a few users hold most of the
+connections and write most of the posts, a few groups hold most of the
+members, and sign-ups grow over time. Every user's email is
+``user<id>@mes.edu`` and their password is ``password``.
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from database import Database
+from password_hasher import PasswordHasher
+
+SCALES = {'10k': 10000, '100k': 100000, '1m': 1000000}
+PASSWORD = 'password'
+
+FIRST = ['Aarav', 'Priya', 'Rahul', 'Ananya', 'Vikram', 'Sneha', 'Arjun', 'Meera', 'Karan', 'Divya',
+         'Rohan', 'Isha', 'Aditya', 'Kavya', 'Nikhil', 'Pooja', 'Siddharth', 'Neha', 'Varun', 'Riya']
+LAST = ['Sharma', 'Verma', 'Iyer', 'Nair', 'Reddy', 'Gupta', 'Menon', 'Rao', 'Patel', 'Das',
+        'Pillai', 'Kumar', 'Singh', 'Joshi', 'Kulkarni', 'Bose', 'Chopra', 'Mehta', 'Shetty', 'Naidu']
+DEPARTMENTS = ['CSE', 'ECE', 'EEE', 'MECH', 'CIVIL']
+DEPARTMENT_WEIGHTS = [0.4, 0.25, 0.15, 0.12, 0.08]
+COMPANIES = ['Google', 'Microsoft', 'Amazon', 'Infosys', 'TCS', 'Wipro', 'Meta', 'Accenture', 'Zoho', 'Flipkart']
+POSITIONS = ['Software Engineer', 'Data Scientist', 'Product Manager', 'Consultant', 'Research Engineer']
+SKILLS = ['python', 'java', 'robotics', 'machine learning', 'design', 'finance', 'embedded', 'cloud',
+          'web development', 'public speaking', 'photography', 'music']
+GROUP_CATEGORIES = ['Academic', 'Club', 'Sports', 'Cultural', 'Alumni', 'Other']
+WORDS = ['exam', 'hostel', 'canteen', 'placement', 'fest', 'library', 'project', 'lab', 'crush',
+         'professor', 'assignment', 'hackathon', 'internship', 'cricket', 'coffee', 'deadline']
+
+# Per-user volumes
+PROFILE_SHARE = 0.6
+CONNECTIONS_PER_USER = 8
+MEMBERSHIPS_PER_USER = 3
+POSTS_PER_USER = 2
+USERS_PER_GROUP = 50
+USERS_PER_EVENT = 100
+
+SPAN_DAYS = 3 * 365
+CHUNK = 50000
+
+
+def zipf_weights(n, exponent, rng):
+    """Zipf probabilities over ``n`` items, shuffled so rank isn't tied to id."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def timestamps(rng, count, end):
+    # Square root of a uniform draw: activity grows towards the present
+    ages = (1 - np.sqrt(rng.random(count))) * SPAN_DAYS * 86400
+    return [(end - timedelta(seconds=int(age))).strftime('%Y-%m-%d %H:%M:%S') for age in ages]
+
+
+def insert(conn, sql, rows):
+    for start in range(0, len(rows), CHUNK):
+        conn.executemany(sql, rows[start:start + CHUNK])
+
+
+def unique_pairs(a, b):
+    """Drop self-pairs and duplicates, treating (a, b) and (b, a) as the same pair."""
+    keep = a != b
+    low, high = np.minimum(a[keep], b[keep]), np.maximum(a[keep], b[keep])
+    pairs = np.unique(np.stack([low, high], axis=1), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def generate(db, users, seed=42, rounds=None, log=print):
+    rng = np.random.default_rng(seed)
+    now = datetime.now().replace(microsecond=0)
+    password = PasswordHasher(workers=0, rounds=rounds).hash(PASSWORD)
+    activity = zipf_weights(users, 0.8, rng)
+    ids = np.arange(1, users + 1)
+
+    def step(name, fn):
+        started = time.perf_counter()
+        count = fn()
+        log(f'{name:<14} {count:>10,} rows  {time.perf_counter() - started:>7.1f} s')
+
+    def fill_users():
+        roles = rng.choice(['student', 'alumni', 'admin'], users, p=[0.75, 0.2497, 0.0003])
+        departments = rng.choice(DEPARTMENTS, users, p=DEPARTMENT_WEIGHTS)
+        created = sorted(timestamps(rng, users, now))
+        first, last = rng.choice(FIRST, users), rng.choice(LAST, users)
+        companies, positions = rng.choice(COMPANIES, users), rng.choice(POSITIONS, users)
+        batches = rng.integers(2000, 2028, users)
+        verified = rng.random(users) < 0.9
+        rows = [(f'user{i + 1}@mes.edu', password, str(roles[i]), str(first[i]), str(last[i]),
+                 f'REG{i + 1:07d}' if roles[i] == 'student' else None, int(batches[i]), str(departments[i]),
+                 str(companies[i]) if roles[i] == 'alumni' else None,
+                 str(positions[i]) if roles[i] == 'alumni' else None, int(verified[i]), created[i])
+                for i in range(users)]
+        with db.pool.write() as conn:
+            insert(conn, '''INSERT INTO users (email, password, role, first_name, last_name, registration_number,
+                         batch_year, department, current_company, position, is_verified, created_at)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', rows)
+        return len(rows)
+
+    def fill_profiles():
+        owners = ids[rng.random(users) < PROFILE_SHARE]
+        rows = [(int(user_id), f'Interested in {SKILLS[rng.integers(len(SKILLS))]}',
+                 ', '.join(rng.choice(SKILLS, 3, replace=False)), ', '.join(rng.choice(WORDS, 2, replace=False)))
+                for user_id in owners]
+        with db.pool.write() as conn:
+            insert(conn, 'INSERT INTO profiles (user_id, bio, skills, interests) VALUES (?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def fill_connections():
+        draws = users * CONNECTIONS_PER_USER // 2
+        low, high = unique_pairs(rng.choice(ids, draws, p=activity), rng.choice(ids, draws, p=activity))
+        status = rng.choice(['accepted', 'pending', 'blocked'], len(low), p=[0.88, 0.11, 0.01])
+        requested = timestamps(rng, len(low), now)
+        # Requests go either way round
+        flip = rng.random(len(low)) < 0.5
+        rows = [(int(high[i] if flip[i] else low[i]), int(low[i] if flip[i] else high[i]), str(status[i]),
+                 requested[i], requested[i] if status[i] == 'accepted' else None)
+                for i in range(len(low))]
+        with db.pool.write() as conn:
+            insert(conn, '''INSERT INTO connections (user_id, connection_id, status, requested_at, accepted_at)
+                         VALUES (?, ?, ?, ?, ?)''', rows)
+        return len(rows)
+
+    groups = max(1, users // USERS_PER_GROUP)
+
+    def fill_groups():
+        creators = rng.choice(ids, groups, p=activity)
+        privacy = rng.choice(['public', 'private'], groups, p=[0.8, 0.2])
+        categories = rng.choice(GROUP_CATEGORIES, groups)
+        created = timestamps(rng, groups, now)
+        rows = [(f'{SKILLS[i % len(SKILLS)].title()} {categories[i]} {i + 1}',
+                 f'A group for {SKILLS[i % len(SKILLS)]} enthusiasts', str(categories[i]), str(privacy[i]),
+                 int(creators[i]), created[i]) for i in range(groups)]
+        with db.pool.write() as conn:
+            insert(conn, '''INSERT INTO groups (name, description, category, privacy, created_by, created_at)
+                         VALUES (?, ?, ?, ?, ?, ?)''', rows)
+        return len(rows)
+
+    def fill_members():
+        popularity = zipf_weights(groups, 1.0, rng)
+        draws = users * MEMBERSHIPS_PER_USER
+        pairs = np.stack([rng.choice(np.arange(1, groups + 1), draws, p=popularity),
+                          rng.choice(ids, draws, p=activity)], axis=1)
+        with db.pool.read() as conn:
+            creators = np.array(conn.execute('SELECT id, created_by FROM groups ORDER BY id').fetchall())
+        pairs = np.unique(np.concatenate([creators, pairs]), axis=0)
+        is_creator = set(map(tuple, creators.tolist()))
+        rows = [(int(group_id), int(user_id), 'admin' if (group_id, user_id) in is_creator else 'member')
+                for group_id, user_id in pairs.tolist()]
+        with db.pool.write() as conn:
+            insert(conn, 'INSERT INTO group_members (group_id, user_id, role) VALUES (?, ?, ?)', rows)
+        return len(rows)
+
+    def fill_posts():
+        count = users * POSTS_PER_USER
+        authors = rng.choice(ids, count, p=activity)
+        types = rng.choice(['confession', 'normal', 'announcement'], count, p=[0.4, 0.5, 0.1])
+        anonymous = (types == 'confession') & (rng.random(count) < 0.7)
+        in_group = rng.random(count) < 0.2
+        group_ids = rng.integers(1, groups + 1, count)
+        created = sorted(timestamps(rng, count, now))
+        words = rng.choice(WORDS, (count, 4))
+        rows = [(int(authors[i]), ' '.join(words[i]).capitalize() + '.', str(types[i]), int(anonymous[i]),
+                 int(group_ids[i]) if in_group[i] else None, created[i]) for i in range(count)]
+        with db.pool.write() as conn:
+            insert(conn, '''INSERT INTO posts (user_id, content, type, is_anonymous, group_id, created_at)
+                         VALUES (?, ?, ?, ?, ?, ?)''', rows)
+        return len(rows)
+
+    def fill_events():
+        count = max(1, users // USERS_PER_EVENT)
+        organizers = rng.choice(ids, count, p=activity)
+        types = rng.choice(['campus', 'club', 'alumni', 'charity'], count, p=[0.4, 0.35, 0.15, 0.1])
+        # A third of events are still ahead
+        offsets = rng.uniform(-2 * 365, 365, count)
+        capacity = rng.choice([20, 50, 100, 200, 500], count)
+        approved = rng.random(count) < 0.8
+        rows = []
+        for i in range(count):
+            start = now + timedelta(days=float(offsets[i]))
+            rows.append((f'{types[i].title()} event {i + 1}', f'Join us for {WORDS[i % len(WORDS)]}', str(types[i]),
+                         int(organizers[i]), start.strftime('%Y-%m-%d %H:%M:%S'),
+                         (start + timedelta(hours=3)).strftime('%Y-%m-%d %H:%M:%S'), 'Main Auditorium',
+                         int(capacity[i]), int(approved[i])))
+        with db.pool.write() as conn:
+            insert(conn, '''INSERT INTO events (title, description, event_type, organizer_id, start_time, end_time,
+                         location, max_participants, is_approved) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''', rows)
+        return len(rows)
+
+    def fill_timelines():
+        with db.pool.write() as conn:
+            return db.backfill_timeline(conn)
+
+    for name, fn in [('users', fill_users), ('profiles', fill_profiles), ('connections', fill_connections),
+                     ('groups', fill_groups), ('group_members', fill_members), ('posts', fill_posts),
+                     ('events', fill_events), ('timeline', fill_timelines)]:
+        step(name, fn)
+    # Rows went in behind the Database's back: drop anything cached from before
+    db.query_cache.clear()
+    with db.pool.write() as conn:
+        conn.execute('ANALYZE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), default='10k')
+    parser.add_argument('--users', type=int, help='exact user count, overriding --scale')
+    parser.add_argument('--db', default='bench.db')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--rounds', type=int, help='bcrypt rounds for the shared password hash')
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        parser.error(f'{args.db} already exists')
+    db = Database(args.db, hasher=PasswordHasher(workers=0))
+    generate(db, args.users or SCALES[args.scale], args.seed, args.rounds)
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
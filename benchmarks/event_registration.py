@@ -0,0 +1,64 @@
+"""Concurrent registrations against a capacity-limited event.
+
+    python -m benchmarks.event_registration --attempts 5000 --seats 200 --threads 32
+
+Every attempt is a distinct user, and a share of them retry. The run fails
+loudly if the event is oversold or the waitlist doesn't account for
+everyone else.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from database import Database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--attempts', type=int, default=5000)
+    parser.add_argument('--seats', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--retry-rate', type=float, default=0.1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'), max_readers=args.threads)
+        event_id = db.create_event('Career Fair', organizer_id=1, start_time='2030-03-25 09:00:00',
+                                   max_participants=args.seats, is_approved=True)
+        rng = random.Random(5)
+        users = list(range(1, args.attempts + 1))
+        users += rng.sample(users, int(args.attempts * args.retry_rate))
+        rng.shuffle(users)
+
+        def attempt(user_id):
+            start = time.perf_counter()
+            status = db.register_for_event(event_id, user_id)
+            return status, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            results = list(pool.map(attempt, users))
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency * 1000 for _, latency in results)
+        with db.pool.read() as conn:
+            seated = conn.execute('SELECT current_participants FROM events WHERE id = ?', (event_id,)).fetchone()[0]
+            counts = dict(conn.execute('SELECT status, COUNT(*) FROM event_registrations GROUP BY status'))
+        db.close()
+
+        print(f'{len(users)} requests ({args.attempts} users) from {args.threads} threads for {args.seats} seats')
+        print(f'throughput: {len(users) / elapsed:.0f} registrations/s')
+        print(f'latency: p50 {statistics.median(latencies):.2f} ms, '
+              f'p99 {latencies[int(len(latencies) * 0.99)]:.2f} ms')
+        print(f"seated: {seated}, registered: {counts.get('registered', 0)}, "
+              f"waitlisted: {counts.get('waitlisted', 0)}")
+        assert seated == counts.get('registered', 0) == min(args.seats, args.attempts), 'event oversold'
+        assert counts.get('waitlisted', 0) == max(0, args.attempts - args.seats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Peak memory and throughput of streaming exports.
+
+    python -m benchmarks.exports --posts 1000000
+
+Seeds ``--posts`` posts, then exports them in every format and reports the
+peak Python heap during the export (plus Arrow's own peak for Parquet).
+For comparison it also reports the peak for loading the same rows into a
+pandas DataFrame, on a tenth of the table unless ``--full-frame`` is given.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from database import Database
+from exports import EXPORTS, FORMATS, export
+
+
+def seed_posts(db, count, batch=50000):
+    rng = random.Random(7)
+    words = ['exam', 'hostel', 'canteen', 'placement', 'fest', 'library', 'project', 'lab', 'deadline']
+    with db.pool.write() as conn:
+        conn.execute("INSERT INTO users (email, password, role, first_name, last_name) "
+                     "VALUES ('bench@mes.edu', 'x', 'student', 'Bench', 'User')")
+    for start in range(0, count, batch):
+        rows = [(1, ' '.join(rng.choices(words, k=rng.randint(5, 40))), rng.choice(['normal', 'confession']),
+                 rng.random() < 0.3, rng.randint(0, 50)) for _ in range(min(batch, count - start))]
+        with db.pool.write() as conn:
+            conn.executemany('INSERT INTO posts (user_id, content, type, is_anonymous, likes) VALUES (?, ?, ?, ?, ?)',
+                             rows)
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = fn()
+        return result, time.perf_counter() - started, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--full-frame', action='store_true', help='load the whole table into the DataFrame')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'), query_cache_size=0, instrument=False)
+        started = time.perf_counter()
+        seed_posts(db, args.posts)
+        print(f'seeded {args.posts:,} posts in {time.perf_counter() - started:.1f} s\n')
+
+        print(f"{'export':<22}  {'rows/s':>9}  {'peak heap':>10}  {'file':>9}")
+        for fmt in FORMATS:
+            path = os.path.join(tmp, f'posts.{fmt}')
+            # Warm up on the (empty) events export so one-time imports aren't counted
+            with open(os.devnull, 'wb') as f:
+                export(db, 'events', fmt, f)
+            arrow_peak = None
+            if fmt == 'parquet':
+                import pyarrow as pa
+                pool = pa.default_memory_pool()
+                baseline = pool.max_memory()
+            with open(path, 'wb') as f:
+                rows, elapsed, peak = measure(lambda: export(db, 'posts', fmt, f, args.chunk_size))
+            if fmt == 'parquet':
+                arrow_peak = pool.max_memory() - baseline
+            extra = f'   (+{arrow_peak / 2 ** 20:.1f} MiB in Arrow)' if arrow_peak is not None else ''
+            print(f'{fmt + " streaming":<22}  {rows / elapsed:>9,.0f}  {peak / 2 ** 20:>6.1f} MiB  '
+                  f'{os.path.getsize(path) / 2 ** 20:>5.0f} MiB{extra}')
+
+        import pandas as pd
+        limit = args.posts if args.full_frame else args.posts // 10
+
+        def load_frame():
+            with db.pool.read() as conn:
+                return len(pd.read_sql_query(EXPORTS['posts'] + ' LIMIT ?', conn, params=(limit,)))
+        rows, elapsed, peak = measure(load_frame)
+        print(f'{"DataFrame, " + format(rows, ",") + " rows":<22}  {rows / elapsed:>9,.0f}  {peak / 2 ** 20:>6.1f} MiB')
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
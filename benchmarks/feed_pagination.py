@@ -0,0 +1,84 @@
+"""Keyset vs OFFSET pagination on the confession feed.
+
+    python -m benchmarks.feed_pagination --posts 1000000
+
+Fetches a page at increasing depths; keyset latency should stay flat while
+OFFSET grows with the number of skipped rows.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from database import Database
+
+PAGE = 20
+
+
+def seed_posts(db, count, batch=50000):
+    rng = random.Random(42)
+    start = datetime(2023, 1, 1)
+    types = ['confession'] * 6 + ['normal'] * 3 + ['announcement']
+    with db.pool.write() as conn:
+        for offset in range(0, count, batch):
+            conn.executemany(
+                'INSERT INTO posts (user_id, content, type, is_anonymous, created_at) VALUES (?, ?, ?, ?, ?)',
+                [(rng.randint(1, 10000), f'post {i}', rng.choice(types), 1,
+                  (start + timedelta(seconds=i * 30)).strftime('%Y-%m-%d %H:%M:%S'))
+                 for i in range(offset, min(offset + batch, count))])
+
+
+def offset_page(db, offset):
+    with db.pool.read() as conn:
+        return conn.execute(
+            "SELECT id, user_id, content, is_anonymous, likes, created_at FROM posts "
+            "WHERE type = 'confession' ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            (PAGE, offset)).fetchall()
+
+
+def keyset_cursor_at(db, depth):
+    # Cursor of the last row before `depth`, as a reader paging down would hold
+    if depth == 0:
+        return None
+    with db.pool.read() as conn:
+        row = conn.execute(
+            "SELECT created_at, id FROM posts WHERE type = 'confession' "
+            "ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?", (depth - 1,)).fetchone()
+    return tuple(row)
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'), query_cache_size=0)
+        seed_posts(db, args.posts)
+        confessions = db.get_global_counters()['posts'] * 6 // 10
+
+        print(f"{'depth':>9}  {'keyset ms':>9}  {'offset ms':>9}")
+        depth = 0
+        while depth < confessions:
+            cursor = keyset_cursor_at(db, depth)
+            keyset = timed(lambda: db.get_confession_feed(limit=PAGE, cursor=cursor), args.repeat)
+            offset = timed(lambda: offset_page(db, depth), args.repeat)
+            print(f'{depth:>9}  {keyset:>9.3f}  {offset:>9.3f}')
+            depth = depth * 10 if depth else 10
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Overhead of query instrumentation on a realistic read mix.
+
+    python -m benchmarks.instrumentation --scale 10k --rounds 100
+
+Runs the same seeded sequence of feed, search and dashboard reads against
+two Database instances on one generated file, one with instrumentation and
+one without. Rounds are short and paired, alternating which side goes
+first, and the overhead is the median of the per-round CPU time ratios,
+which is far steadier than comparing totals on a shared machine.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.datagen import SCALES, generate
+from benchmarks.run import SCENARIOS, Campus
+from database import Database
+from password_hasher import PasswordHasher
+
+# Reads only, so both sides of a pair do exactly the same work
+WORKLOAD = ['feed', 'search', 'dashboard']
+
+
+def run_round(db, campus, ops, seed):
+    rng = random.Random(seed)
+    started = time.process_time()
+    for _ in range(ops):
+        SCENARIOS[rng.choice(WORKLOAD)](db, campus, rng)
+    return time.process_time() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), default='10k')
+    parser.add_argument('--ops', type=int, default=300, help='operations per round')
+    parser.add_argument('--rounds', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        db = Database(path, hasher=PasswordHasher(workers=0))
+        generate(db, SCALES[args.scale], rounds=4, log=lambda line: print(line, file=sys.stderr))
+        db.close()
+
+        # Query cache off in both, so every operation reaches SQLite
+        plain = Database(path, query_cache_size=0, instrument=False, hasher=PasswordHasher(workers=0))
+        instrumented = Database(path, query_cache_size=0, instrument=True, hasher=PasswordHasher(workers=0))
+        campus = Campus(plain)
+        run_round(plain, campus, args.ops, 0)
+        run_round(instrumented, campus, args.ops, 0)
+
+        times = {plain: [], instrumented: []}
+        for seed in range(1, args.rounds + 1):
+            for db in ((plain, instrumented) if seed % 2 else (instrumented, plain)):
+                times[db].append(run_round(db, campus, args.ops, seed))
+        calls = sum(query['calls'] for query in instrumented.query_stats.top(limit=None))
+        plain.close()
+        instrumented.close()
+
+    ratios = [measured / base for base, measured in zip(times[plain], times[instrumented])]
+    print(f'{args.rounds} paired rounds of {args.ops} operations, {calls:,} statements recorded')
+    print(f'  plain         {statistics.median(times[plain]) * 1000:9.1f} ms per round (median)')
+    print(f'  instrumented  {statistics.median(times[instrumented]) * 1000:9.1f} ms per round (median)')
+    print(f'  overhead      {statistics.median(ratios) - 1:+9.2%} (median of paired ratios)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Login throughput benchmark for the bcrypt worker pool.
+
+Reports logins per second for each worker count:
+
+    python -m benchmarks.login_throughput --workers 1 2 4 --logins 200 --rounds 10
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from database import Database
+from password_hasher import PasswordHasher
+
+PASSWORD = 'correct horse battery staple'
+
+
+def run(workers, logins, rounds, path):
+    hasher = PasswordHasher(workers=workers, rounds=rounds, max_pending=logins)
+    db = Database(path, hasher=hasher)
+    if db.get_user_by_id(1) is None:
+        db.create_user('bench@mes.edu', PASSWORD, 'student', 'Bench', 'User')
+    # Warm the worker processes so spawn cost isn't measured
+    hasher.verify(PASSWORD, hasher.hash(PASSWORD))
+
+    start = time.perf_counter()
+    # One thread per simulated Streamlit session
+    with ThreadPoolExecutor(max_workers=min(logins, 64)) as sessions:
+        results = list(sessions.map(lambda _: db.authenticate_user('bench@mes.edu', PASSWORD),
+                                    range(logins)))
+    elapsed = time.perf_counter() - start
+    assert all(results)
+    db.close()
+    hasher.shutdown()
+    return logins / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        print(f"{'workers':>7}  {'logins/s':>9}")
+        for workers in sorted(set(args.workers)):
+            print(f'{workers:>7}  {run(workers, args.logins, args.rounds, path):>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Message send throughput: one commit per message vs. the group-commit writer.
+
+    python -m benchmarks.messaging --threads 16 --messages 500
+
+Each thread plays a user sending short messages into their own
+conversations, as fast as it can. Reports messages per second and send
+latency for ``Database.send_message`` (a transaction per message) and for
+``MessageWriter`` (sends queued and committed together).
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from database import Database
+from messaging import MessageWriter
+from password_hasher import PasswordHasher
+
+
+def setup(db, threads):
+    users = [db.create_user(f'user{i}@mes.edu', 'password', 'student', 'User', str(i)) for i in range(threads + 1)]
+    # Everyone talks to the last user, so one inbox sees all the traffic
+    return users[-1], [(users[i], db.get_or_create_conversation(users[i], users[-1])) for i in range(threads)]
+
+
+def run(send, senders, messages):
+    latencies = [[] for _ in senders]
+
+    def sender(slot):
+        user_id, conversation_id = senders[slot]
+        for i in range(messages):
+            started = time.perf_counter()
+            send(conversation_id, user_id, f'message {i} from {user_id}')
+            latencies[slot].append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=sender, args=(slot,)) for slot in range(len(senders))]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for slot in latencies for latency in slot)
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    return len(latencies) / elapsed, quantiles[49], quantiles[98]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--messages', type=int, default=500, help='messages per thread')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'), hasher=PasswordHasher(workers=0, rounds=4))
+        receiver, senders = setup(db, args.threads)
+        writer = MessageWriter(db)
+
+        print(f'{args.threads} threads x {args.messages} messages')
+        print(f"{'':<22} {'msgs/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for name, send in [('commit per message', db.send_message), ('group commit', writer.send)]:
+            rate, p50, p99 = run(send, senders, args.messages)
+            print(f'{name:<22} {rate:>9,.0f} {p50:>8.2f} {p99:>8.2f}')
+        print(f'group commit: {writer.written / max(writer.batches, 1):.1f} messages per transaction')
+
+        unread = db.get_user_counters(receiver)['unread_messages']
+        writer.close()
+        db.close()
+    print(f'receiver unread count: {unread:,}')
+
+
+if __name__ == '__main__':
+    main()
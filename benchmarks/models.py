@@ -0,0 +1,103 @@
+"""Row records against per-row dicts: build time, memory and pandas hand-off.
+
+    python -m benchmarks.models --users 20000
+
+Fetches the same user rows three ways: ``dict(zip(columns, row))`` as the
+queries used to, ``models`` records, and ``fetch_columns`` column arrays.
+Reports the build time per row (the fetch itself is timed separately and
+subtracted), the memory each user row holds while cached, and the time to
+turn a page of users into a DataFrame.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.pool_load import seed_users
+from database import Database
+from models import User, fetch_all, fetch_columns, fetch_one
+
+SELECT_ALL = 'SELECT * FROM users ORDER BY id LIMIT ?'
+SELECT_ONE = 'SELECT * FROM users WHERE id = ?'
+
+
+def as_dicts(conn, sql, params):
+    cursor = conn.execute(sql, params)
+    columns = [desc[0] for desc in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def as_tuples(conn, sql, params):
+    return conn.execute(sql, params).fetchall()
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def retained_bytes(build):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        rows = build()
+        return (tracemalloc.get_traced_memory()[0] - before) / len(rows)
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--lookups', type=int, default=20000, help='single-row fetches to time')
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--page-size', type=int, default=200, help='rows per DataFrame page')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'), query_cache_size=0, instrument=False)
+        seed_users(db, args.users)
+        with db.pool.read() as conn:
+            params = (args.users,)
+            fetch = best_of(lambda: as_tuples(conn, SELECT_ALL, params), args.repeat)
+            dicts = best_of(lambda: as_dicts(conn, SELECT_ALL, params), args.repeat)
+            records = best_of(lambda: fetch_all(conn, User, SELECT_ALL, params), args.repeat)
+            print(f'{args.users:,} rows, build time per row (fetch of {fetch / args.users * 1e6:.2f} us excluded)')
+            print(f'  dict(zip(columns, row))  {(dicts - fetch) / args.users * 1e6:8.3f} us')
+            print(f'  User records             {(records - fetch) / args.users * 1e6:8.3f} us')
+
+            ids = [(i % args.users + 1,) for i in range(args.lookups)]
+
+            def lookups(fetch_row):
+                return lambda: [fetch_row(user_id) for user_id in ids]
+            one_tuple = best_of(lookups(lambda p: conn.execute(SELECT_ONE, p).fetchone()), args.repeat)
+            one_dict = best_of(lookups(lambda p: as_dicts(conn, SELECT_ONE, p)[0]), args.repeat)
+            one_record = best_of(lookups(lambda p: fetch_one(conn, User, SELECT_ONE, p)), args.repeat)
+            print(f'\nget_user_by_id-style lookups, per call (query of {one_tuple / args.lookups * 1e6:.2f} us excluded)')
+            print(f'  dict                     {(one_dict - one_tuple) / args.lookups * 1e6:8.3f} us')
+            print(f'  User record              {(one_record - one_tuple) / args.lookups * 1e6:8.3f} us')
+
+            dict_bytes = retained_bytes(lambda: as_dicts(conn, SELECT_ALL, params))
+            record_bytes = retained_bytes(lambda: fetch_all(conn, User, SELECT_ALL, params))
+            print('\nmemory per cached user row, values included')
+            print(f'  dict                     {dict_bytes:8.0f} B')
+            print(f'  User record              {record_bytes:8.0f} B   ({1 - record_bytes / dict_bytes:.0%} less)')
+
+            page = (args.page_size,)
+            frame_dicts = best_of(lambda: pd.DataFrame(as_dicts(conn, SELECT_ALL, page)), args.repeat)
+            frame_columns = best_of(lambda: pd.DataFrame(fetch_columns(conn, SELECT_ALL, page)), args.repeat)
+            print(f'\nDataFrame of {args.page_size} users, fetch included')
+            print(f'  from dicts               {frame_dicts * 1000:8.3f} ms')
+            print(f'  from column arrays       {frame_columns * 1000:8.3f} ms')
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
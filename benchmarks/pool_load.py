@@ -0,0 +1,68 @@
+"""Read-throughput load test for the Database connection pool.
+
+Run from the repository root:
+
+    python -m benchmarks.pool_load --users 20000 --seconds 3
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from database import Database
+
+
+def seed_users(db, count):
+    rows = [(f'user{i}@mes.edu', 'x', 'student', f'First{i}', f'Last{i}', 'CSE', 2020 + i % 5)
+            for i in range(count)]
+    with db.pool.write() as conn:
+        conn.executemany('INSERT INTO users (email, password, role, first_name, last_name, '
+                         'department, batch_year) VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+
+
+def run_readers(db, threads, seconds, user_count):
+    counts = [0] * threads
+    stop = threading.Event()
+
+    def worker(slot):
+        rng = random.Random(slot)
+        n = 0
+        while not stop.is_set():
+            db.get_user_by_id(rng.randint(1, user_count))
+            n += 1
+        counts[slot] = n
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    time.sleep(seconds)
+    stop.set()
+    for w in workers:
+        w.join()
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'), max_readers=max(args.threads), query_cache_size=0)
+        seed_users(db, args.users)
+
+        print(f"{'sessions':>8}  {'reads/s':>10}  {'scaling':>7}")
+        baseline = None
+        for threads in args.threads:
+            rate = run_readers(db, threads, args.seconds, args.users)
+            baseline = baseline or rate
+            print(f'{threads:>8}  {rate:>10.0f}  {rate / baseline:>6.2f}x')
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
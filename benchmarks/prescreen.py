@@ -0,0 +1,61 @@
+"""Throughput of the moderation pre-screen.
+
+    python -m benchmarks.prescreen --posts 200000
+
+Seeds ``--posts`` confessions, a few percent of which break a rule, then
+times ``PreScreener.screen()`` over all of them, reads and holds included.
+For comparison it also times matching alone, with the rules combined and
+one at a time.
+"""
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+
+from database import Database
+from prescreen import DEFAULT_RULES, PreScreener, compile_rules
+
+from benchmarks.exports import seed_posts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=200000)
+    parser.add_argument('--batch', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'), query_cache_size=0, instrument=False)
+        seed_posts(db, args.posts)
+        rng = random.Random(11)
+        bad = ['call me on 9876543210', 'mail me at someone@mes.edu', 'I want to die', 'he lives in room 214']
+        with db.pool.write() as conn:
+            conn.executemany("UPDATE posts SET content = content || ' ' || ? WHERE id = ?",
+                             [(rng.choice(bad), rng.randint(1, args.posts)) for _ in range(args.posts // 50)])
+
+        screener = PreScreener(db, interval_s=3600, batch=args.batch)
+        started = time.perf_counter()
+        held = screener.screen()
+        elapsed = time.perf_counter() - started
+        print(f'pre-screen, one automaton   {screener.screened / elapsed:>9,.0f} posts/s   {held:,} held')
+
+        with db.pool.read() as conn:
+            contents = [content.lower() for content, in conn.execute('SELECT content FROM posts')]
+        patterns = [re.compile(rf'\b{pattern}') for pattern in DEFAULT_RULES.values()]
+        started = time.perf_counter()
+        matched = sum(1 for content in contents if any(pattern.search(content) for pattern in patterns))
+        elapsed = time.perf_counter() - started
+        print(f'match only, rule by rule    {len(contents) / elapsed:>9,.0f} posts/s   {matched:,} matched')
+        started = time.perf_counter()
+        search = compile_rules(DEFAULT_RULES)[0].search
+        matched = sum(1 for content in contents if search(content))
+        elapsed = time.perf_counter() - started
+        print(f'match only, one automaton   {len(contents) / elapsed:>9,.0f} posts/s   {matched:,} matched')
+        screener.close()
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
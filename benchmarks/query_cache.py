@@ -0,0 +1,71 @@
+"""Dashboard rerun cost with and without the Database query cache.
+
+    python -m benchmarks.query_cache --users 20000 --posts 200000 --reruns 5000
+
+Each simulated rerun issues the reads a student dashboard makes. Every
+``--write-every`` reruns one session posts a confession, which invalidates
+the feed and counters, so the hit rate reflects realistic churn.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.feed_pagination import seed_posts
+from benchmarks.pool_load import seed_users
+from database import Database
+from password_hasher import PasswordHasher
+
+
+def rerun(db, user_id):
+    db.get_user_by_id(user_id)
+    db.get_user_counters(user_id)
+    db.get_global_counters()
+    db.get_settings()
+    db.get_confession_feed(limit=20)
+    db.get_upcoming_events(limit=3, after='2024-01-01 00:00:00')
+    db.suggest_groups(user_id, limit=4)
+
+
+def run(db, reruns, sessions, write_every):
+    rng = random.Random(7)
+    users = [rng.randint(1, sessions * 10) for _ in range(sessions)]
+    start = time.perf_counter()
+    for i in range(reruns):
+        user_id = users[i % sessions]
+        rerun(db, user_id)
+        if write_every and i % write_every == write_every - 1:
+            db.create_post(user_id, f'rerun {i}', 'confession', True)
+    return (time.perf_counter() - start) / reruns * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--posts', type=int, default=200000)
+    parser.add_argument('--reruns', type=int, default=5000)
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--write-every', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        db = Database(path, hasher=PasswordHasher(workers=0))
+        seed_users(db, args.users)
+        seed_posts(db, args.posts)
+        db.rebuild_counters()
+        db.close()
+
+        print(f"{'cache':>8}  {'ms/rerun':>9}  {'hit rate':>8}")
+        for size in (0, 2048):
+            db = Database(path, hasher=PasswordHasher(workers=0), query_cache_size=size)
+            elapsed = run(db, args.reruns, args.sessions, args.write_every)
+            stats = db.query_cache.stats()
+            print(f"{size or 'off':>8}  {elapsed:>9.3f}  {stats['hit_rate']:>8.1%}")
+            db.close()
+        print(stats)
+
+
+if __name__ == '__main__':
+    main()
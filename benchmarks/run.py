@@ -0,0 +1,216 @@
+"""Timed load-test scenarios against a synthetic campus, reported as JSON.
+
+    python -m benchmarks.run --scale 10k --duration 10 --threads 8 --output results.json
+    python -m benchmarks.run --db bench.db --baseline results.json
+
+Each scenario runs for ``--duration`` seconds from ``--threads`` threads
+(one per simulated Streamlit session) and reports throughput and
+p50/p95/p99 latency. Without ``--db`` a fresh database is generated with
+``benchmarks.datagen``. ``--baseline`` prints the change against an earlier
+results file. The query cache is off unless ``--query-cache`` is given, so
+the numbers reflect the database.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.datagen import PASSWORD, SCALES, generate
+from database import Database
+from password_hasher import PasswordHasher
+
+SEARCH_QUERIES = [('priya', False), ('sharma', False), ('google', False), ('machine learning', False),
+                  ('hackathon', False), ('pri', True), ('kul', True), ('rob', True), ('placement exam', False)]
+
+
+class Campus:
+    """Id ranges of the populated database, for picking random targets."""
+
+    def __init__(self, db):
+        with db.pool.read() as conn:
+            self.users = conn.execute('SELECT MAX(id) FROM users').fetchone()[0]
+            self.upcoming = [row[0] for row in conn.execute(
+                "SELECT id FROM events WHERE is_approved = 1 AND start_time >= datetime('now')")]
+        if not self.users or not self.upcoming:
+            raise SystemExit('database has no users or upcoming events; generate it with benchmarks.datagen')
+
+
+def login(db, campus, rng):
+    user_id = rng.randint(1, campus.users)
+    assert db.authenticate_user(f'user{user_id}@mes.edu', PASSWORD)
+
+
+def feed(db, campus, rng):
+    posts, cursor = db.get_confession_feed(limit=20)
+    # Some readers scroll a few pages down
+    for _ in range(rng.choice([0, 0, 0, 1, 2, 5])):
+        if cursor is None:
+            break
+        posts, cursor = db.get_confession_feed(limit=20, cursor=cursor)
+
+
+def search(db, campus, rng):
+    text, prefix = rng.choice(SEARCH_QUERIES)
+    db.search(text, limit=10, prefix=prefix)
+
+
+def register(db, campus, rng):
+    event_id, user_id = rng.choice(campus.upcoming), rng.randint(1, campus.users)
+    if rng.random() < 0.1:
+        db.cancel_event_registration(event_id, user_id)
+    else:
+        db.register_for_event(event_id, user_id)
+
+
+def dashboard(db, campus, rng):
+    user_id = rng.randint(1, campus.users)
+    db.get_global_counters()
+    db.get_user_counters(user_id)
+    db.get_upcoming_events(limit=3)
+    db.suggest_groups(user_id, limit=4)
+    db.get_home_feed(user_id, limit=5)
+
+
+SCENARIOS = {'login': login, 'feed': feed, 'search': search, 'register': register, 'dashboard': dashboard}
+
+
+def percentile(latencies, q):
+    if len(latencies) == 1:
+        return latencies[0]
+    return statistics.quantiles(latencies, n=100, method='inclusive')[q - 1]
+
+
+def run_scenario(db, campus, fn, threads, duration, warmup=2):
+    results = [[] for _ in range(threads)]
+    errors = [0] * threads
+    window = {}
+
+    def start_clock():
+        window['started'] = time.perf_counter()
+        window['deadline'] = window['started'] + duration
+
+    # The clock starts once every session has warmed up, so slow scenarios
+    # like bcrypt logins still get the full duration
+    ready = threading.Barrier(threads, action=start_clock)
+
+    def session(slot):
+        rng = random.Random(slot)
+        for _ in range(warmup):
+            fn(db, campus, rng)
+        ready.wait()
+        latencies, deadline = results[slot], window['deadline']
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                fn(db, campus, rng)
+            except Exception:
+                errors[slot] += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    workers = [threading.Thread(target=session, args=(slot,)) for slot in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - window['started']
+
+    latencies = sorted(latency for slot in results for latency in slot)
+    if not latencies:
+        return {'ops': 0, 'errors': sum(errors)}
+    return {
+        'ops': len(latencies),
+        'errors': sum(errors),
+        'throughput_per_s': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'max_ms': round(latencies[-1], 3),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline):
+    print(f"\n{'scenario':<10}  {'throughput':>10}  {'p50':>8}  {'p95':>8}  {'p99':>8}   vs baseline")
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous or not current.get('ops') or not previous.get('ops'):
+            continue
+        changes = [(current[key] - previous[key]) / previous[key] * 100 if previous[key] else 0.0
+                   for key in ('throughput_per_s', 'p50_ms', 'p95_ms', 'p99_ms')]
+        print(f'{name:<10}  ' + '  '.join(f'{change:>+9.1f}%' if i == 0 else f'{change:>+7.1f}%'
+                                          for i, change in enumerate(changes)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help='existing database from benchmarks.datagen (default: generate one)')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='10k')
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--rounds', type=int, help='bcrypt rounds when generating (default: BCRYPT_ROUNDS)')
+    parser.add_argument('--query-cache', action='store_true', help='leave the Database query cache on')
+    parser.add_argument('--output', help='write the JSON results here instead of stdout')
+    parser.add_argument('--baseline', help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, 'bench.db')
+        if not os.path.exists(path):
+            db = Database(path, hasher=PasswordHasher(workers=0))
+            generate(db, SCALES[args.scale], rounds=args.rounds, log=lambda line: print(line, file=sys.stderr))
+            db.close()
+
+        db = Database(path, max_readers=args.threads, query_cache_size=2048 if args.query_cache else 0,
+                      hasher=PasswordHasher(max_pending=args.threads * 4))
+        campus = Campus(db)
+        results = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'revision': git_revision(),
+                'users': campus.users,
+                'threads': args.threads,
+                'duration_s': args.duration,
+                'query_cache': args.query_cache,
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'cpus': os.cpu_count(),
+            },
+            'scenarios': {},
+        }
+        for name in args.scenarios:
+            print(f'running {name} ...', file=sys.stderr)
+            results['scenarios'][name] = run_scenario(db, campus, SCENARIOS[name], args.threads, args.duration)
+        db.close()
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+    else:
+        print(report)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""User-facing write latency while maintenance jobs run.
+
+    python -m benchmarks.scheduler --posts 200000
+
+Seeds ``--posts`` posts whose like counters have all drifted, then times
+``create_post`` calls from another thread while nothing runs, while the
+counters are reconciled in batches, and while they are reconciled in one
+transaction. Finally it times every scheduler job on the seeded database.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from database import Database
+from scheduler import JobScheduler
+
+from benchmarks.exports import seed_posts
+
+
+def write_latencies(db, stop, pause_s=0.005):
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        db.create_post(1, 'benchmark post', post_type='normal')
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(pause_s)
+    return latencies
+
+
+def measure(db, job, idle_s=1.0):
+    stop = threading.Event()
+    result = []
+    writer = threading.Thread(target=lambda: result.extend(write_latencies(db, stop)))
+    writer.start()
+    started = time.perf_counter()
+    if job is None:
+        time.sleep(idle_s)
+    else:
+        job()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    writer.join()
+    result.sort()
+    return elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'), query_cache_size=0, instrument=False)
+        seed_posts(db, args.posts)
+
+        def drift():
+            with db.pool.write() as conn:
+                conn.execute('UPDATE posts SET likes = likes + 1')
+
+        print(f"{'while':<34} {'job (s)':>8} {'writes':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for label, job in [('idle', None),
+                           ('reconcile, 1,000 rows per txn', lambda: db.reconcile_counters(batch=1000)),
+                           ('reconcile, one transaction', lambda: db.reconcile_counters(batch=10 ** 9))]:
+            drift()
+            elapsed, latencies = measure(db, job)
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f'{label:<34} {elapsed:>8.2f} {len(latencies):>7} {statistics.median(latencies):>8.2f} '
+                  f'{p99:>8.2f} {latencies[-1]:>8.2f}')
+
+        with db.pool.write() as conn:
+            conn.execute('DELETE FROM posts WHERE id % 2 = 0')
+        drift()
+        scheduler = JobScheduler(db, background=False)
+        print()
+        for name in scheduler.jobs:
+            scheduler.run(name)
+            stats = scheduler.metrics[name]
+            print(f"{name:<26} {stats['last_ms']:>9.1f} ms  {stats['last_error'] or stats['last_result']}")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
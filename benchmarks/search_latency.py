@@ -0,0 +1,63 @@
+"""Full-text search latency on a synthetic campus.
+
+    python -m benchmarks.search_latency --users 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from database import Database
+
+FIRST = ['Aarav', 'Priya', 'Rahul', 'Ananya', 'Vikram', 'Sneha', 'Arjun', 'Meera', 'Karan', 'Divya']
+LAST = ['Sharma', 'Verma', 'Iyer', 'Nair', 'Reddy', 'Gupta', 'Menon', 'Rao', 'Patel', 'Das']
+DEPARTMENTS = ['CSE', 'ECE', 'EEE', 'MECH', 'CIVIL']
+COMPANIES = ['Google', 'Microsoft', 'Amazon', 'Infosys', 'TCS', 'Wipro', 'Meta', None]
+SKILLS = ['python', 'java', 'robotics', 'machine learning', 'design', 'finance', 'embedded', 'cloud']
+QUERIES = ['priya', 'sharma cse', 'google', 'robotics', 'machine learning', 'pri', 'goo', 'emb']
+
+
+def seed(db, users, rng):
+    with db.pool.write() as conn:
+        conn.executemany(
+            'INSERT INTO users (email, password, role, first_name, last_name, department, '
+            'current_company, batch_year) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [(f'user{i}@mes.edu', 'x', rng.choice(['student', 'alumni']), rng.choice(FIRST),
+              rng.choice(LAST), rng.choice(DEPARTMENTS), rng.choice(COMPANIES),
+              rng.randint(2000, 2027)) for i in range(users)])
+        conn.executemany(
+            'INSERT INTO profiles (user_id, bio, skills) VALUES (?, ?, ?)',
+            [(i, f'Student interested in {rng.choice(SKILLS)}', ', '.join(rng.sample(SKILLS, 3)))
+             for i in range(1, users + 1, 2)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'), query_cache_size=0)
+        seed(db, args.users, rng)
+
+        print(f"{'query':<18} {'mode':<7} {'p50 ms':>7} {'p99 ms':>7}")
+        for text in QUERIES:
+            for prefix in (False, True):
+                samples = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    db.search_users(text, limit=20, prefix=prefix)
+                    samples.append((time.perf_counter() - start) * 1000)
+                samples.sort()
+                p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+                print(f"{text:<18} {'prefix' if prefix else 'exact':<7} "
+                      f"{statistics.median(samples):>7.2f} {p99:>7.2f}")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
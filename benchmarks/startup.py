@@ -0,0 +1,121 @@
+"""Cold-start cost of app.py: module import and first render of each page.
+
+    python -m benchmarks.startup --runs 5
+
+Every run of every page happens in a fresh interpreter, as a new Streamlit
+worker would. The page is rendered with streamlit's AppTest against a
+seeded database in a temporary directory. Times are medians in ms; the
+last column lists which heavy modules the page ended up loading.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from database import Database
+from password_hasher import PasswordHasher
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['pandas', 'numpy', 'plotly.express', 'streamlit_option_menu', 'jose']
+
+# page name -> (role of the logged-in user or None, current_page)
+PAGES = {
+    'login': (None, 'Dashboard'),
+    'student dashboard': ('student', 'Dashboard'),
+    'alumni dashboard': ('alumni', 'Dashboard'),
+    'admin dashboard': ('admin', 'Dashboard'),
+    'confessions': ('student', 'Confessions'),
+    'find friends': ('student', 'Find Friends'),
+    'groups': ('student', 'Groups'),
+}
+
+# Runs in the child: times `import app` separately from main(), which is what
+# Streamlit executes on every rerun
+PAGE_SCRIPT = '''
+import sys, time
+import streamlit as st
+started = time.perf_counter()
+import app
+st.session_state['_import_ms'] = (time.perf_counter() - started) * 1000
+started = time.perf_counter()
+app.main()
+st.session_state['_render_ms'] = (time.perf_counter() - started) * 1000
+'''
+
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_ms = (time.perf_counter() - started) * 1000
+role, page, user_id, heavy = json.loads(sys.argv[1])
+at = AppTest.from_string({script!r}, default_timeout=60)
+if role:
+    at.session_state.authenticated = True
+    at.session_state.user_id = user_id
+    at.session_state.user_role = role
+    at.session_state.current_page = page
+    # Keep the sidebar menu from switching back to its default entry
+    at.session_state.menu_selection = 'Dashboard'
+try:
+    at.run()
+except AssertionError:
+    # Older AppTest releases can't parse tabs into an element tree; the
+    # script itself has run by then
+    pass
+else:
+    if at.exception:
+        raise SystemExit(at.exception[0].value)
+print(json.dumps({{
+    'streamlit_ms': streamlit_ms,
+    'import_ms': at.session_state['_import_ms'],
+    'render_ms': at.session_state['_render_ms'],
+    'loaded': [name for name in heavy if name in sys.modules],
+}}))
+'''.format(script=PAGE_SCRIPT)
+
+
+def seed(directory):
+    db = Database(os.path.join(directory, 'mes_connect.db'), hasher=PasswordHasher(workers=0, rounds=4))
+    users = {role: db.create_user(f'{role}@mes.edu', 'password', role, role.title(), 'User')
+             for role in ('student', 'alumni', 'admin')}
+    group_id = db.create_group('Coding Club', users['student'])
+    db.join_group(group_id, users['alumni'])
+    db.create_post(users['student'], 'First confession', 'confession', True)
+    db.create_event('Orientation', users['admin'], '2099-01-01 10:00:00', is_approved=True)
+    db.close()
+    return users
+
+
+def measure(directory, role, page, user_id):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])),
+               BCRYPT_ROUNDS='4')
+    result = subprocess.run([sys.executable, '-c', CHILD, json.dumps([role, page, user_id, HEAVY_MODULES])],
+                            cwd=directory, env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--pages', nargs='+', choices=sorted(PAGES), default=list(PAGES))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        users = seed(tmp)
+        print(f"{'page':<18}  {'streamlit':>9}  {'import':>8}  {'render':>8}  {'total':>8}  loaded")
+        for name in args.pages:
+            role, page = PAGES[name]
+            runs = [measure(tmp, role, page, users.get(role)) for _ in range(args.runs)]
+            streamlit_ms, import_ms, render_ms = (
+                statistics.median(run[key] for run in runs) for key in ('streamlit_ms', 'import_ms', 'render_ms'))
+            print(f'{name:<18}  {streamlit_ms:>9.1f}  {import_ms:>8.1f}  {render_ms:>8.1f}  '
+                  f"{import_ms + render_ms:>8.1f}  {', '.join(runs[-1]['loaded']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
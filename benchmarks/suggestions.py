@@ -0,0 +1,81 @@
+"""Friend-of-friend suggestion benchmark on a synthetic connections graph.
+
+    python -m benchmarks.suggestions --nodes 50000 --degree 20
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from database import Database
+from suggestions import SuggestionEngine
+
+DEPARTMENTS = ['CSE', 'ECE', 'EEE', 'MECH', 'CIVIL']
+
+
+def seed_graph(db, nodes, degree, rng):
+    with db.pool.write() as conn:
+        conn.executemany(
+            'INSERT INTO users (email, password, role, first_name, last_name, department, batch_year) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(f'user{i}@mes.edu', 'x', 'student', 'F', 'L', rng.choice(DEPARTMENTS), rng.randint(2018, 2027))
+             for i in range(nodes)])
+        # Clustered graph: most friends come from a small neighbourhood (same cohort)
+        edges = set()
+        for user_id in range(1, nodes + 1):
+            for _ in range(degree // 2):
+                other = user_id + rng.randint(1, 200) if rng.random() < 0.8 else rng.randint(1, nodes)
+                if other <= nodes and other != user_id:
+                    edges.add((min(user_id, other), max(user_id, other)))
+        conn.executemany("INSERT INTO connections (user_id, connection_id, status) VALUES (?, ?, 'accepted')",
+                         edges)
+    return len(edges)
+
+
+def percentile(samples, pct):
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=50000)
+    parser.add_argument('--degree', type=int, default=20)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--updates', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'))
+        edges = seed_graph(db, args.nodes, args.degree, rng)
+        engine = SuggestionEngine(db)
+
+        start = time.perf_counter()
+        engine.rebuild()
+        print(f'graph: {args.nodes} users, {edges} connections')
+        print(f'full rebuild: {(time.perf_counter() - start) * 1000:.0f} ms')
+
+        start = time.perf_counter()
+        for _ in range(args.updates):
+            a, b = rng.randint(1, args.nodes), rng.randint(1, args.nodes)
+            if db.send_connection_request(a, b) == 'pending':
+                db.accept_connection(b, a)
+        elapsed = time.perf_counter() - start
+        print(f'incremental updates: {args.updates / elapsed:.0f} connections/s (including SQLite writes)')
+
+        samples = []
+        for _ in range(args.queries):
+            user_id = rng.randint(1, args.nodes)
+            start = time.perf_counter()
+            engine.suggest(user_id, k=10)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        print(f'suggest top-10: p50 {statistics.median(samples):.2f} ms, '
+              f'p95 {percentile(samples, 0.95):.2f} ms, p99 {percentile(samples, 0.99):.2f} ms')
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
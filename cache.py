@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+
+from models import Record
+
+
+class QueryCache:
+    """Thread-safe LRU cache of query results with a TTL and table tags.
+
+    Every entry records the tables its query read. ``invalidate(table)`` drops
+    those entries and bumps the table's version, so a load that raced with the
+    write is not stored. The TTL bounds staleness from writes made by other
+    processes, which never reach ``invalidate``.
+    """
+
+    def __init__(self, maxsize=2048, ttl=30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._by_table = {}
+        self._versions = {}
+        self._epoch = 0
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def get_or_load(self, key, tables, loader):
+        """Return the cached value for ``key``, calling ``loader()`` on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            versions = self._snapshot(tables)
+
+        value = loader()
+
+        with self._lock:
+            if self.maxsize and versions == self._snapshot(tables):
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = (now + self.ttl, tables, value)
+                for table in tables:
+                    self._by_table.setdefault(table, set()).add(key)
+                while len(self._entries) > self.maxsize:
+                    self._remove(next(iter(self._entries)))
+                    self.evictions += 1
+        return value
+
+    def _snapshot(self, tables):
+        return [self._epoch] + [self._versions.get(table, 0) for table in tables]
+
+    def _remove(self, key):
+        _, tables, _ = self._entries.pop(key)
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+
+    def invalidate(self, *tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+                for key in self._by_table.pop(table, ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._by_table.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def copy_result(value):
+    """Copy the dicts, lists and tuples of a query result so callers can't mutate the cached one."""
+    if isinstance(value, Record):
+        # Immutable rows of scalars can be shared
+        return value
+    if isinstance(value, dict):
+        return {key: copy_result(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_result(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(copy_result(item) for item in value)
+    return value
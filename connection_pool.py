@@ -0,0 +1,117 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """SQLite connection pool: one serialized writer plus checked-out readers.
+
+    SQLite only ever allows a single writer, so writes share one connection
+    behind a lock and run inside ``BEGIN IMMEDIATE``. Reads check out their own
+    connection so concurrent sessions never share a cursor, and in WAL mode
+    they don't block on the writer.
+    """
+
+    def __init__(self, db_name, max_readers=8, busy_timeout_ms=5000, factory=sqlite3.Connection):
+        self.db_name = db_name
+        self.busy_timeout_ms = busy_timeout_ms
+        self.factory = factory
+        # Every connection to ":memory:" is a separate database, so in-memory
+        # pools route reads through the writer instead.
+        self.max_readers = 0 if db_name == ':memory:' else max_readers
+
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._all = []
+        self._closed = False
+
+        self._writer = self._connect()
+        if self.db_name != ':memory:':
+            # Only takes effect on a new, empty file; lets maintenance return
+            # free pages in small steps instead of a full VACUUM
+            self._writer.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            self._writer.execute('PRAGMA journal_mode=WAL')
+            self._writer.execute('PRAGMA synchronous=NORMAL')
+
+    def _connect(self, readonly=False):
+        # isolation_level=None: transactions are managed explicitly in write()
+        conn = sqlite3.connect(self.db_name, timeout=self.busy_timeout_ms / 1000,
+                               check_same_thread=False, isolation_level=None, factory=self.factory)
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        if readonly:
+            conn.execute('PRAGMA query_only=1')
+        self._all.append(conn)
+        return conn
+
+    def _in_write(self):
+        return getattr(self._local, 'write_depth', 0) > 0
+
+    def in_transaction(self):
+        """True while the calling thread is inside ``write()``."""
+        return self._in_write()
+
+    @contextmanager
+    def write(self):
+        """Yield the writer connection inside a transaction.
+
+        Nested calls on the same thread join the outer transaction; the commit
+        happens when the outermost block exits.
+        """
+        with self._write_lock:
+            depth = getattr(self._local, 'write_depth', 0)
+            self._local.write_depth = depth + 1
+            try:
+                if depth:
+                    yield self._writer
+                    return
+                self._writer.execute('BEGIN IMMEDIATE')
+                try:
+                    yield self._writer
+                except BaseException:
+                    self._writer.execute('ROLLBACK')
+                    raise
+                self._writer.execute('COMMIT')
+            finally:
+                self._local.write_depth = depth
+
+    @contextmanager
+    def read(self):
+        """Yield a read-only connection checked out for the calling thread."""
+        if self._in_write() or not self.max_readers:
+            # Reads inside a write must see its uncommitted changes
+            with self._write_lock:
+                yield self._writer
+            return
+
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            if self._closed:
+                conn.close()
+            else:
+                self._readers.put(conn)
+
+    def _checkout(self):
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._reader_lock:
+            if self._reader_count < self.max_readers:
+                self._reader_count += 1
+                return self._connect(readonly=True)
+        return self._readers.get()
+
+    def close(self):
+        self._closed = True
+        for conn in self._all:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+        self._all.clear()
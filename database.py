@@ -1,142 +1,193 @@
+import functools
+import json
+import os
 import sqlite3
-import pandas as pd
-from datetime import datetime
-import bcrypt
+import threading
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from cache import QueryCache, copy_result
+from backends import create_pool
+from instrumentation import QueryStats
+from models import Event, Group, Post, Profile, User, fetch_all, fetch_columns, fetch_one
+from password_hasher import PasswordHasher
+import migrate
+import search
+
+USER_COLUMNS = ['email', 'password', 'role', 'first_name', 'last_name', 'registration_number',
+                'batch_year', 'department', 'current_company', 'position', 'profile_image',
+                'is_verified', 'is_active']
+# Schema defaults for columns a roster row may leave out
+USER_COLUMN_DEFAULTS = {'is_verified': 0, 'is_active': 1}
+REQUIRED_USER_FIELDS = ['email', 'password', 'role', 'first_name', 'last_name']
+USER_ROLES = ('student', 'alumni', 'admin')
+
+# Admin user grid: sortable columns and status filters
+USER_SORT_COLUMNS = {
+    'id': 'id',
+    'name': 'last_name {direction}, first_name',
+    'email': 'email',
+    'role': 'role',
+    'department': 'department',
+    'batch_year': 'batch_year',
+    'created_at': 'created_at',
+}
+USER_STATUS_FILTERS = {
+    'active': 'is_active = 1 AND is_verified = 1',
+    'pending': 'is_active = 1 AND is_verified = 0',
+    'blocked': 'is_active = 0',
+}
+USER_BULK_ACTIONS = ('approve', 'block', 'delete', 'make_admin')
+
+GROUP_ROLES = ('admin', 'moderator', 'member')
+
+# Home feed: posts in groups of up to TIMELINE_FANOUT_LIMIT members are copied
+# into members' timelines on write; bigger groups and campus announcements
+# are merged in on read. Timelines are trimmed to TIMELINE_LENGTH rows.
+TIMELINE_FANOUT_LIMIT = 500
+TIMELINE_BACKFILL = 50
+TIMELINE_LENGTH = 500
+
+# Review priority of a pre-screen hold; each report adds 1 (see
+# migrations/0012_moderation.sql)
+PRESCREEN_PRIORITY = 10
+REVIEW_DECISIONS = {'approve': 'approved', 'remove': 'removed'}
+
+# Counters kept on the row itself, with the query that recomputes each; see
+# Database.reconcile_counters
+DENORMALISED_COUNTERS = {
+    'groups': ('member_count', 'SELECT COUNT(*) FROM group_members WHERE group_id = groups.id'),
+    'events': ('current_participants', "SELECT COUNT(*) FROM event_registrations "
+                                       "WHERE event_id = events.id AND status = 'registered'"),
+    'posts': ('likes', 'SELECT COUNT(*) FROM post_likes WHERE post_id = posts.id'),
+}
+# Maintenance defaults: connection requests pending this long are withdrawn,
+# events this long past are archived, and ANALYZE samples this many rows per index
+PENDING_CONNECTION_DAYS = 90
+EVENT_ARCHIVE_DAYS = 30
+ANALYSIS_LIMIT = 1000
+
+GLOBAL_COUNTERS = ['users', 'pending_approvals', 'groups', 'posts', 'events', 'approved_events']
+USER_COUNTERS = ['connections', 'groups', 'posts', 'events', 'unread_messages']
+
+# Tables a write notification also covers: trigger-maintained tables, and
+# event registrations, which are reported as writes to events
+WRITE_SIDE_EFFECTS = {
+    'users': ('global_counters', 'user_counters'),
+    'posts': ('global_counters', 'user_counters', 'timeline'),
+    'groups': ('global_counters',),
+    'group_members': ('groups', 'user_counters', 'timeline'),
+    'events': ('global_counters', 'user_counters', 'event_registrations'),
+    'connections': ('user_counters',),
+    'messages': ('conversation_participants', 'user_counters'),
+    'conversation_participants': ('user_counters',),
+    'post_reports': ('posts',),
+}
+
+def cached(*tables):
+    """Memoize a read method in the query cache until a write touches one of ``tables``."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            # Reads inside a transaction may see uncommitted rows
+            if self.pool.in_transaction():
+                return method(self, *args, **kwargs)
+            key = (method.__name__, _freeze(args), _freeze(sorted(kwargs.items())))
+            result = self.query_cache.get_or_load(key, tables, lambda: method(self, *args, **kwargs))
+            return copy_result(result)
+        return wrapper
+    return decorator
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(item) for item in value)
+    return value
 
 class Database:
-    def __init__(self, db_name="mes_connect.db"):
-        self.conn = sqlite3.connect(db_name, check_same_thread=False)
-        self.cursor = self.conn.cursor()
+    def __init__(self, db_name="mes_connect.db", max_readers=8, busy_timeout_ms=5000, hasher=None,
+                 query_cache_size=2048, query_cache_ttl=30.0, instrument=True, slow_query_ms=100.0,
+                 slow_query_log=None, backend_options=None):
+        self.query_stats = None
+        if instrument:
+            self.query_stats = QueryStats(slow_query_ms, slow_query_log or os.environ.get('SLOW_QUERY_LOG'))
+        # A SQLAlchemy URL (e.g. sqlite:///mes_connect.db) selects the pooled engine backend
+        self.pool = create_pool(db_name, max_readers=max_readers, busy_timeout_ms=busy_timeout_ms,
+                                stats=self.query_stats, **(backend_options or {}))
+        self.hasher = hasher or PasswordHasher()
+        self._write_listeners = {}
+        self.query_cache = QueryCache(query_cache_size, query_cache_ttl)
         self.init_database()
     
     def init_database(self):
-        # Users table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            role TEXT NOT NULL CHECK(role IN ('student', 'alumni', 'admin')),
-            first_name TEXT NOT NULL,
-            last_name TEXT NOT NULL,
-            registration_number TEXT,
-            batch_year INTEGER,
-            department TEXT,
-            current_company TEXT,
-            position TEXT,
-            profile_image TEXT,
-            is_verified BOOLEAN DEFAULT 0,
-            is_active BOOLEAN DEFAULT 1,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # Profiles table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS profiles (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER UNIQUE,
-            bio TEXT,
-            skills TEXT,
-            interests TEXT,
-            linkedin_url TEXT,
-            github_url TEXT,
-            website TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-        ''')
-        
-        # Friends/Connections table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS connections (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            connection_id INTEGER,
-            status TEXT CHECK(status IN ('pending', 'accepted', 'blocked')) DEFAULT 'pending',
-            requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            accepted_at TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id),
-            FOREIGN KEY (connection_id) REFERENCES users (id),
-            UNIQUE(user_id, connection_id)
-        )
-        ''')
-        
-        # Groups table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS groups (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            description TEXT,
-            category TEXT,
-            privacy TEXT CHECK(privacy IN ('public', 'private')) DEFAULT 'public',
-            created_by INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            member_count INTEGER DEFAULT 0,
-            FOREIGN KEY (created_by) REFERENCES users (id)
-        )
-        ''')
-        
-        # Group members table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS group_members (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            group_id INTEGER,
-            user_id INTEGER,
-            role TEXT CHECK(role IN ('admin', 'moderator', 'member')) DEFAULT 'member',
-            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (group_id) REFERENCES groups (id),
-            FOREIGN KEY (user_id) REFERENCES users (id),
-            UNIQUE(group_id, user_id)
-        )
+        """Bring the schema up to date; a no-op read when it already is."""
+        migrate.migrate(self.pool)
+    
+    def on_write(self, table, callback):
+        """Register ``callback(table, **details)`` to run after each committed write to ``table``."""
+        self._write_listeners.setdefault(table, []).append(callback)
+    
+    def _notify_write(self, table, **details):
+        self.query_cache.invalidate(table, *WRITE_SIDE_EFFECTS.get(table, ()))
+        for callback in self._write_listeners.get(table, ()):
+            callback(table, **details)
+    
+    def rebuild_counters(self, conn=None):
+        """Recompute every aggregate counter from the base tables."""
+        if conn is None:
+            with self.pool.write() as conn:
+                return self.rebuild_counters(conn)
+        conn.execute('''
+        INSERT OR REPLACE INTO global_counters (name, value)
+        SELECT 'users', COUNT(*) FROM users
+        UNION ALL SELECT 'pending_approvals', COUNT(*) FROM users WHERE COALESCE(is_verified, 0) = 0
+        UNION ALL SELECT 'groups', COUNT(*) FROM groups
+        UNION ALL SELECT 'posts', COUNT(*) FROM posts
+        UNION ALL SELECT 'events', COUNT(*) FROM events
+        UNION ALL SELECT 'approved_events', COUNT(*) FROM events WHERE COALESCE(is_approved, 0) = 1
         ''')
-        
-        # Posts/Confessions table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS posts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            content TEXT NOT NULL,
-            type TEXT CHECK(type IN ('confession', 'announcement', 'normal')) DEFAULT 'normal',
-            is_anonymous BOOLEAN DEFAULT 0,
-            group_id INTEGER,
-            likes INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id),
-            FOREIGN KEY (group_id) REFERENCES groups (id)
-        )
+        conn.execute('''
+        UPDATE conversation_participants SET unread_count = (
+            SELECT COUNT(*) FROM messages m
+            WHERE m.conversation_id = conversation_participants.conversation_id
+            AND m.id > conversation_participants.last_read_id
+            AND m.sender_id IS NOT conversation_participants.user_id)
         ''')
-        
-        # Events table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            description TEXT,
-            event_type TEXT CHECK(event_type IN ('campus', 'club', 'alumni', 'charity')),
-            organizer_id INTEGER,
-            start_time TIMESTAMP,
-            end_time TIMESTAMP,
-            location TEXT,
-            max_participants INTEGER,
-            current_participants INTEGER DEFAULT 0,
-            is_approved BOOLEAN DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (organizer_id) REFERENCES users (id)
+        conn.execute('DELETE FROM user_counters')
+        conn.execute('''
+        WITH accepted AS (
+            SELECT user_id AS uid FROM connections WHERE status = 'accepted'
+            UNION ALL SELECT connection_id FROM connections WHERE status = 'accepted'
         )
+        INSERT INTO user_counters (user_id, connections, groups, posts, events, unread_messages)
+        SELECT u.id, COALESCE(c.n, 0), COALESCE(g.n, 0), COALESCE(p.n, 0), COALESCE(e.n, 0), COALESCE(m.n, 0)
+        FROM users u
+        LEFT JOIN (SELECT uid, COUNT(*) AS n FROM accepted GROUP BY uid) c ON c.uid = u.id
+        LEFT JOIN (SELECT user_id, COUNT(*) AS n FROM group_members GROUP BY user_id) g ON g.user_id = u.id
+        LEFT JOIN (SELECT user_id, COUNT(*) AS n FROM posts GROUP BY user_id) p ON p.user_id = u.id
+        LEFT JOIN (SELECT organizer_id, COUNT(*) AS n FROM events GROUP BY organizer_id) e ON e.organizer_id = u.id
+        LEFT JOIN (SELECT user_id, SUM(unread_count) AS n FROM conversation_participants GROUP BY user_id) m
+            ON m.user_id = u.id
         ''')
-        
-        # Create indexes for performance
-        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)')
-        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_role ON users(role)')
-        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_posts_type ON posts(type)')
-        
-        self.conn.commit()
+    
+    @cached('global_counters')
+    def get_global_counters(self):
+        with self.pool.read() as conn:
+            counters = dict(conn.execute('SELECT name, value FROM global_counters').fetchall())
+        return {name: counters.get(name, 0) for name in GLOBAL_COUNTERS}
+    
+    @cached('user_counters')
+    def get_user_counters(self, user_id):
+        with self.pool.read() as conn:
+            row = conn.execute(f"SELECT {', '.join(USER_COUNTERS)} FROM user_counters WHERE user_id = ?",
+                               (user_id,)).fetchone()
+        return dict(zip(USER_COUNTERS, row or [0] * len(USER_COUNTERS)))
     
     def hash_password(self, password):
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        return self.hasher.hash(password)
     
     def verify_password(self, password, hashed):
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        return self.hasher.verify(password, hashed)
     
     def create_user(self, email, password, role, first_name, last_name, **kwargs):
         hashed_password = self.hash_password(password)
@@ -147,30 +198,1020 @@ class Database:
         query = f"INSERT INTO users ({', '.join(columns)}) VALUES ({placeholders})"
         
         try:
-            self.cursor.execute(query, values)
-            self.conn.commit()
-            return self.cursor.lastrowid
+            with self.pool.write() as conn:
+                user_id = conn.execute(query, values).lastrowid
         except sqlite3.IntegrityError:
             return None
+        self._notify_write('users', action='insert', user_ids=[user_id])
+        return user_id
+    
+    def create_users_bulk(self, rows, chunk_size=500):
+        """Insert many users, returning one result dict per input row.
+
+        Each result has ``row``, ``email``, ``status`` ('created', 'duplicate'
+        or 'invalid'), ``id`` and ``error``.
+        """
+        return list(self.iter_create_users_bulk(rows, chunk_size))
+    
+    def iter_create_users_bulk(self, rows, chunk_size=500):
+        # Results are yielded per committed chunk so callers can stream large rosters
+        seen = set()
+        rows = enumerate(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield from self._create_users_chunk(chunk, seen)
+    
+    def _create_users_chunk(self, chunk, seen):
+        results = []
+        pending = []
+        for index, row in chunk:
+            email = (row.get('email') or '').strip()
+            result = {'row': index, 'email': email, 'status': None, 'id': None, 'error': None}
+            results.append(result)
+            missing = [field for field in REQUIRED_USER_FIELDS if not row.get(field)]
+            if missing:
+                result.update(status='invalid', error=f"missing {', '.join(missing)}")
+            elif row['role'] not in USER_ROLES:
+                result.update(status='invalid', error=f"unknown role {row['role']!r}")
+            elif row.get('batch_year') is not None and not isinstance(row['batch_year'], int):
+                result.update(status='invalid', error=f"batch_year {row['batch_year']!r} is not a year")
+            elif email in seen:
+                result['status'] = 'duplicate'
+            else:
+                seen.add(email)
+                pending.append((result, row))
+        
+        pending = self._drop_existing(pending)
+        
+        # Hash the whole chunk in parallel before taking the write lock
+        futures = [self.hasher.submit_hash(row['password']) for _, row in pending]
+        pending = [(result, dict(row, email=result['email'], password=future.result()))
+                   for (result, row), future in zip(pending, futures)]
+        
+        if pending:
+            placeholders = ', '.join(f'COALESCE(?, {USER_COLUMN_DEFAULTS[column]})' if column in USER_COLUMN_DEFAULTS
+                                     else '?' for column in USER_COLUMNS)
+            query = f"INSERT INTO users ({', '.join(USER_COLUMNS)}) VALUES ({placeholders})"
+            with self.pool.write() as conn:
+                # Re-check inside the transaction in case of concurrent signups
+                pending = self._drop_existing(pending, conn)
+                conn.executemany(query, [[row.get(column) for column in USER_COLUMNS]
+                                         for _, row in pending])
+                ids = self._ids_for_emails([result['email'] for result, _ in pending], conn)
+            for result, _ in pending:
+                result.update(status='created', id=ids.get(result['email']))
+            self._notify_write('users', action='insert', user_ids=list(ids.values()))
+        return results
+    
+    def _drop_existing(self, pending, conn=None):
+        existing = self._ids_for_emails([result['email'] for result, _ in pending], conn)
+        kept = []
+        for result, row in pending:
+            if result['email'] in existing:
+                result['status'] = 'duplicate'
+            else:
+                kept.append((result, row))
+        return kept
+    
+    def _ids_for_emails(self, emails, conn=None):
+        if not emails:
+            return {}
+        if conn is None:
+            with self.pool.read() as conn:
+                return self._ids_for_emails(emails, conn)
+        placeholders = ', '.join(['?'] * len(emails))
+        rows = conn.execute(f'SELECT email, id FROM users WHERE email IN ({placeholders})', emails)
+        return dict(rows.fetchall())
     
     def authenticate_user(self, email, password):
-        self.cursor.execute('SELECT * FROM users WHERE email = ? AND is_active = 1', (email,))
-        user = self.cursor.fetchone()
-        if user and self.verify_password(password, user[2]):
-            columns = [desc[0] for desc in self.cursor.description]
-            return dict(zip(columns, user))
+        with self.pool.read() as conn:
+            user = fetch_one(conn, User, 'SELECT * FROM users WHERE email = ? AND is_active = 1', (email,))
+        if user and self.verify_password(password, user['password']):
+            return user
         return None
     
+    @cached('users')
     def get_user_by_id(self, user_id):
-        self.cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-        user = self.cursor.fetchone()
-        if user:
-            columns = [desc[0] for desc in self.cursor.description]
-            return dict(zip(columns, user))
-        return None
+        with self.pool.read() as conn:
+            return fetch_one(conn, User, 'SELECT * FROM users WHERE id = ?', (user_id,))
+    
+    @cached('profiles', 'users')
+    def get_profile(self, user_id):
+        with self.pool.read() as conn:
+            return fetch_one(conn, Profile, 'SELECT * FROM profiles WHERE user_id = ?', (user_id,))
+    
+    @cached('users', 'global_counters')
+    def list_users(self, role=None, status=None, department=None, batch_year=None,
+                   sort='created_at', descending=True, page=1, page_size=50, columnar=False):
+        """Return ``(rows, total)`` for one page of the admin user grid.
+        
+        With ``columnar`` the rows come back as ``{column: values}`` for pandas.
+        """
+        where, params = [], []
+        for column, value in (('role', role), ('department', department), ('batch_year', batch_year)):
+            if value is not None:
+                where.append(f'{column} = ?')
+                params.append(value)
+        if status is not None:
+            where.append(USER_STATUS_FILTERS[status])
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+        
+        direction = 'DESC' if descending else 'ASC'
+        order = USER_SORT_COLUMNS[sort].format(direction=direction)
+        query = f'''
+        SELECT id, first_name, last_name, email, role, department, batch_year, current_company,
+               is_verified, is_active, created_at
+        FROM users {where_sql}
+        ORDER BY {order} {direction}, id {direction}
+        LIMIT ? OFFSET ?
+        '''
+        with self.pool.read() as conn:
+            page_params = params + [page_size, (page - 1) * page_size]
+            rows = fetch_columns(conn, query, page_params) if columnar else fetch_all(conn, User, query, page_params)
+            if where:
+                total = conn.execute(f'SELECT COUNT(*) FROM users {where_sql}', params).fetchone()[0]
+            else:
+                total = conn.execute("SELECT value FROM global_counters WHERE name = 'users'").fetchone()[0]
+        return rows, total
+    
+    @cached('users')
+    def get_user_departments(self):
+        with self.pool.read() as conn:
+            return [row[0] for row in conn.execute(
+                'SELECT DISTINCT department FROM users WHERE department IS NOT NULL ORDER BY department')]
+    
+    def bulk_user_action(self, action, user_ids):
+        """Apply an admin action to many users in one transaction; returns the rows affected."""
+        if action not in USER_BULK_ACTIONS:
+            raise ValueError(f'unknown user action {action!r}')
+        user_ids = sorted({int(user_id) for user_id in user_ids})
+        if not user_ids:
+            return 0
+        # One JSON array parameter instead of one placeholder per id
+        ids = json.dumps(user_ids)
+        selected = 'SELECT value FROM json_each(?)'
+        with self.pool.write() as conn:
+            if action == 'approve':
+                changed = conn.execute(f'UPDATE users SET is_verified = 1, is_active = 1 WHERE id IN ({selected})',
+                                       (ids,)).rowcount
+            elif action == 'block':
+                changed = conn.execute(f'UPDATE users SET is_active = 0 WHERE id IN ({selected})', (ids,)).rowcount
+            elif action == 'make_admin':
+                changed = conn.execute(f"UPDATE users SET role = 'admin' WHERE id IN ({selected})", (ids,)).rowcount
+            else:
+                changed = self._delete_users(conn, ids, selected)
+        self._notify_write('users', action=action, user_ids=user_ids)
+        if action == 'delete':
+            self._notify_write('connections', action='purged', user_ids=user_ids)
+            self._notify_write('group_members', action='purged', user_ids=user_ids)
+            self._notify_write('posts', action='update', user_ids=user_ids)
+            self._notify_write('events', action='registration', user_ids=user_ids)
+        return changed
+    
+    def _delete_users(self, conn, ids, selected):
+        # Their posts stay up without an author; likes they gave are taken back
+        conn.execute(f'''
+        UPDATE posts SET likes = likes - (
+            SELECT COUNT(*) FROM post_likes pl WHERE pl.post_id = posts.id AND pl.user_id IN ({selected}))
+        WHERE id IN (SELECT post_id FROM post_likes WHERE user_id IN ({selected}))
+        ''', (ids, ids))
+        conn.execute(f'DELETE FROM post_likes WHERE user_id IN ({selected})', (ids,))
+        conn.execute(f'UPDATE posts SET user_id = NULL WHERE user_id IN ({selected})', (ids,))
+        conn.execute(f'UPDATE events SET organizer_id = NULL WHERE organizer_id IN ({selected})', (ids,))
+        # Seats they held go to the waitlist in order, as on a cancellation
+        freed = conn.execute(f'''SELECT event_id, COUNT(*) FROM event_registrations
+                             WHERE user_id IN ({selected}) AND status = 'registered'
+                             GROUP BY event_id''', (ids,)).fetchall()
+        conn.execute(f'DELETE FROM event_registrations WHERE user_id IN ({selected})', (ids,))
+        for event_id, seats in freed:
+            promoted = conn.execute(
+                '''UPDATE event_registrations SET status = 'registered', updated_at = CURRENT_TIMESTAMP
+                WHERE id IN (SELECT id FROM event_registrations
+                             WHERE event_id = ? AND status = 'waitlisted' ORDER BY id LIMIT ?)''',
+                (event_id, seats)).rowcount
+            if promoted < seats:
+                conn.execute('UPDATE events SET current_participants = current_participants - ? WHERE id = ?',
+                             (seats - promoted, event_id))
+        conn.execute(f'UPDATE groups SET created_by = NULL WHERE created_by IN ({selected})', (ids,))
+        conn.execute(f'DELETE FROM group_members WHERE user_id IN ({selected})', (ids,))
+        conn.execute(f'DELETE FROM timeline WHERE user_id IN ({selected})', (ids,))
+        conn.execute(f'''DELETE FROM connections
+                     WHERE user_id IN ({selected}) OR connection_id IN ({selected})''', (ids, ids))
+        conn.execute(f'DELETE FROM profiles WHERE user_id IN ({selected})', (ids,))
+        conn.execute(f'''DELETE FROM session_resume
+                     WHERE session_id IN (SELECT id FROM sessions WHERE user_id IN ({selected}))''', (ids,))
+        conn.execute(f'DELETE FROM sessions WHERE user_id IN ({selected})', (ids,))
+        # Conversations stay for the other participant, with the messages unattributed
+        conn.execute(f'DELETE FROM conversation_participants WHERE user_id IN ({selected})', (ids,))
+        conn.execute(f'UPDATE messages SET sender_id = NULL WHERE sender_id IN ({selected})', (ids,))
+        conn.execute(f'UPDATE post_reports SET reporter_id = NULL WHERE reporter_id IN ({selected})', (ids,))
+        return conn.execute(f'DELETE FROM users WHERE id IN ({selected})', (ids,)).rowcount
+    
+    @cached('app_settings')
+    def get_setting(self, name, default=None):
+        with self.pool.read() as conn:
+            row = conn.execute('SELECT value FROM app_settings WHERE name = ?', (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+    
+    @cached('app_settings')
+    def get_settings(self, defaults=None):
+        """Return every stored setting, on top of ``defaults``."""
+        with self.pool.read() as conn:
+            rows = conn.execute('SELECT name, value FROM app_settings').fetchall()
+        settings = dict(defaults or {})
+        settings.update((name, json.loads(value)) for name, value in rows)
+        return settings
+    
+    def set_settings(self, **values):
+        with self.pool.write() as conn:
+            conn.executemany('INSERT OR REPLACE INTO app_settings (name, value) VALUES (?, ?)',
+                             [(name, json.dumps(value)) for name, value in values.items()])
+        self._notify_write('app_settings', action='update', names=list(values))
+    
+    def create_event(self, title, organizer_id, start_time, end_time=None, description=None,
+                     event_type='campus', location=None, max_participants=None, is_approved=False):
+        with self.pool.write() as conn:
+            event_id = conn.execute(
+                '''INSERT INTO events (title, description, event_type, organizer_id, start_time, end_time,
+                                     location, max_participants, is_approved)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                (title, description, event_type, organizer_id, start_time, end_time, location,
+                 max_participants, int(bool(is_approved)))).lastrowid
+        self._notify_write('events', action='insert', event_id=event_id)
+        return event_id
+    
+    @cached('events')
+    def get_upcoming_events(self, limit=10, event_type=None, after=None):
+        query = '''
+        SELECT id, title, description, event_type, start_time, end_time, location,
+               max_participants, current_participants
+        FROM events
+        WHERE is_approved = 1 AND start_time >= ? {}
+        ORDER BY start_time LIMIT ?
+        '''
+        params = [after or datetime.now().strftime('%Y-%m-%d %H:%M:%S')]
+        if event_type is not None:
+            query = query.format('AND event_type = ?')
+            params.append(event_type)
+        else:
+            query = query.format('')
+        with self.pool.read() as conn:
+            return fetch_all(conn, Event, query, params + [limit])
+    
+    def register_for_event(self, event_id, user_id):
+        """Register a user, or waitlist them once the event is full.
+        
+        Returns 'registered', 'waitlisted' or None if the event doesn't exist.
+        Retrying is safe: an existing registration is returned unchanged.
+        """
+        with self.pool.write() as conn:
+            row = conn.execute('SELECT status FROM event_registrations WHERE event_id = ? AND user_id = ?',
+                               (event_id, user_id)).fetchone()
+            if row and row[0] != 'cancelled':
+                return row[0]
+            # Conditional increment: only succeeds while a seat is free, so the
+            # event can never be oversold
+            seated = conn.execute(
+                '''UPDATE events SET current_participants = current_participants + 1
+                WHERE id = ? AND (max_participants IS NULL OR current_participants < max_participants)''',
+                (event_id,)).rowcount
+            if not seated and conn.execute('SELECT 1 FROM events WHERE id = ?', (event_id,)).fetchone() is None:
+                return None
+            status = 'registered' if seated else 'waitlisted'
+            if row:
+                # A fresh row, so a returning user queues behind everyone already waiting
+                conn.execute('DELETE FROM event_registrations WHERE event_id = ? AND user_id = ?',
+                             (event_id, user_id))
+            conn.execute('INSERT INTO event_registrations (event_id, user_id, status) VALUES (?, ?, ?)',
+                         (event_id, user_id, status))
+        self._notify_write('events', action='registration', event_id=event_id)
+        return status
+    
+    def cancel_event_registration(self, event_id, user_id):
+        """Cancel a registration, promoting the longest-waiting user into a freed seat."""
+        with self.pool.write() as conn:
+            row = conn.execute('SELECT status FROM event_registrations WHERE event_id = ? AND user_id = ?',
+                               (event_id, user_id)).fetchone()
+            if not row or row[0] == 'cancelled':
+                return False
+            conn.execute(
+                '''UPDATE event_registrations SET status = 'cancelled', updated_at = CURRENT_TIMESTAMP
+                WHERE event_id = ? AND user_id = ?''', (event_id, user_id))
+            if row[0] == 'registered':
+                promoted = conn.execute(
+                    '''UPDATE event_registrations SET status = 'registered', updated_at = CURRENT_TIMESTAMP
+                    WHERE id = (SELECT id FROM event_registrations
+                                WHERE event_id = ? AND status = 'waitlisted' ORDER BY id LIMIT 1)''',
+                    (event_id,)).rowcount
+                if not promoted:
+                    conn.execute('''UPDATE events SET current_participants = current_participants - 1
+                                 WHERE id = ?''', (event_id,))
+        self._notify_write('events', action='registration', event_id=event_id)
+        return True
+    
+    def create_group(self, name, created_by, description=None, category=None, privacy='public'):
+        """Create a group with its creator as the first admin."""
+        with self.pool.write() as conn:
+            group_id = conn.execute(
+                'INSERT INTO groups (name, description, category, privacy, created_by) VALUES (?, ?, ?, ?, ?)',
+                (name, description, category, privacy, created_by)).lastrowid
+            conn.execute("INSERT INTO group_members (group_id, user_id, role) VALUES (?, ?, 'admin')",
+                         (group_id, created_by))
+        self._notify_write('groups', action='insert', group_id=group_id)
+        self._notify_write('group_members', action='join', group_id=group_id, user_id=created_by)
+        return group_id
+    
+    def join_group(self, group_id, user_id, role='member'):
+        if role not in GROUP_ROLES:
+            raise ValueError(f'unknown group role {role!r}')
+        try:
+            with self.pool.write() as conn:
+                joined = conn.execute('INSERT OR IGNORE INTO group_members (group_id, user_id, role) VALUES (?, ?, ?)',
+                                      (group_id, user_id, role)).rowcount
+                if joined:
+                    self.backfill_timeline(conn, user_id=user_id, group_id=group_id)
+        except sqlite3.IntegrityError:
+            return False
+        if joined:
+            self._notify_write('group_members', action='join', group_id=group_id, user_id=user_id)
+        return bool(joined)
+    
+    def leave_group(self, group_id, user_id):
+        with self.pool.write() as conn:
+            left = conn.execute('DELETE FROM group_members WHERE group_id = ? AND user_id = ?',
+                                (group_id, user_id)).rowcount
+            conn.execute('DELETE FROM timeline WHERE user_id = ? AND group_id = ?', (user_id, group_id))
+        if left:
+            self._notify_write('group_members', action='leave', group_id=group_id, user_id=user_id)
+        return bool(left)
+    
+    def set_group_member_role(self, group_id, user_id, role):
+        if role not in GROUP_ROLES:
+            raise ValueError(f'unknown group role {role!r}')
+        with self.pool.write() as conn:
+            changed = conn.execute('UPDATE group_members SET role = ? WHERE group_id = ? AND user_id = ?',
+                                   (role, group_id, user_id)).rowcount
+        if changed:
+            self._notify_write('group_members', action='role', group_id=group_id, user_id=user_id)
+        return bool(changed)
+    
+    @cached('groups', 'group_members')
+    def get_user_groups(self, user_id):
+        with self.pool.read() as conn:
+            return fetch_all(conn, Group,
+                '''SELECT g.id, g.name, g.description, g.category, g.privacy, g.member_count,
+                       gm.role, gm.joined_at
+                FROM group_members gm JOIN groups g ON g.id = gm.group_id
+                WHERE gm.user_id = ?
+                ORDER BY g.name''', (user_id,))
+    
+    @cached('users', 'group_members')
+    def get_group_members(self, group_id, limit=50, offset=0):
+        with self.pool.read() as conn:
+            return fetch_all(conn, User,
+                '''SELECT u.id, u.first_name, u.last_name, u.role AS user_role, gm.role, gm.joined_at
+                FROM group_members gm JOIN users u ON u.id = gm.user_id
+                WHERE gm.group_id = ?
+                ORDER BY gm.user_id LIMIT ? OFFSET ?''', (group_id, limit, offset))
+    
+    @cached('groups', 'group_members', 'connections')
+    def suggest_groups(self, user_id, limit=5):
+        """Public groups the user isn't in, ranked by how many of their connections belong."""
+        with self.pool.read() as conn:
+            groups = fetch_all(conn, Group,
+                '''WITH friends AS (
+                    SELECT connection_id AS id FROM connections WHERE user_id = ? AND status = 'accepted'
+                    UNION SELECT user_id FROM connections WHERE connection_id = ? AND status = 'accepted'
+                ), mine AS (
+                    SELECT group_id FROM group_members WHERE user_id = ?
+                )
+                SELECT g.id, g.name, g.description, g.category, g.member_count, COUNT(*) AS connections_in_group
+                FROM friends f
+                JOIN group_members gm ON gm.user_id = f.id
+                JOIN groups g ON g.id = gm.group_id
+                WHERE g.privacy = 'public' AND g.id NOT IN (SELECT group_id FROM mine)
+                GROUP BY g.id
+                ORDER BY connections_in_group DESC, g.member_count DESC
+                LIMIT ?''', (user_id, user_id, user_id, limit))
+            if len(groups) < limit:
+                # Top up with the most popular public groups
+                popular = fetch_all(conn, Group,
+                    '''SELECT id, name, description, category, member_count, 0 AS connections_in_group
+                    FROM groups WHERE privacy = 'public'
+                    AND id NOT IN (SELECT group_id FROM group_members WHERE user_id = ?)
+                    ORDER BY member_count DESC LIMIT ?''', (user_id, limit * 2))
+                seen = {group['id'] for group in groups}
+                groups += [group for group in popular if group['id'] not in seen]
+        return groups[:limit]
+    
+    @cached('event_registrations')
+    def get_event_registrations(self, user_id, event_ids):
+        """Map each of ``event_ids`` the user is registered or waitlisted for to its status."""
+        event_ids = list(event_ids)
+        if not event_ids:
+            return {}
+        placeholders = ', '.join(['?'] * len(event_ids))
+        with self.pool.read() as conn:
+            return dict(conn.execute(
+                f'''SELECT event_id, status FROM event_registrations
+                WHERE user_id = ? AND status != 'cancelled' AND event_id IN ({placeholders})''',
+                [user_id] + event_ids).fetchall())
+    
+    def create_post(self, user_id, content, post_type='normal', is_anonymous=False, group_id=None):
+        with self.pool.write() as conn:
+            post_id = conn.execute(
+                'INSERT INTO posts (user_id, content, type, is_anonymous, group_id) VALUES (?, ?, ?, ?, ?)',
+                (user_id, content, post_type, int(bool(is_anonymous)), group_id)).lastrowid
+            if group_id is not None and post_type != 'confession':
+                # Fan out on write; a no-op for groups over the limit
+                conn.execute(
+                    '''INSERT OR IGNORE INTO timeline (user_id, post_id, group_id)
+                    SELECT gm.user_id, ?, gm.group_id FROM group_members gm JOIN groups g ON g.id = gm.group_id
+                    WHERE gm.group_id = ? AND g.member_count <= ?''', (post_id, group_id, TIMELINE_FANOUT_LIMIT))
+        self._notify_write('posts', action='insert', post_id=post_id, post_type=post_type, group_id=group_id)
+        return post_id
+    
+    @cached('timeline', 'posts', 'groups', 'users')
+    def get_home_feed(self, user_id, limit=20, before_id=None):
+        """Return ``(posts, next_cursor)`` for the user's home feed, newest first.
+        
+        Reads the user's timeline and the newest announcements, plus the newest
+        posts of any large groups they belong to, in one query of index range
+        scans. Pass the cursor back for the next page; it is None at the end.
+        """
+        before_id = before_id if before_id is not None else 2 ** 63 - 1
+        with self.pool.read() as conn:
+            large_groups = [row[0] for row in conn.execute(
+                '''SELECT gm.group_id FROM group_members gm JOIN groups g ON g.id = gm.group_id
+                WHERE gm.user_id = ? AND g.member_count > ?''', (user_id, TIMELINE_FANOUT_LIMIT)).fetchall()]
+            # Held and removed posts are skipped in every branch, so pages stay full
+            sources = [
+                '''SELECT t.post_id FROM timeline t JOIN posts p ON p.id = t.post_id
+                WHERE t.user_id = ? AND t.post_id < ? AND p.status NOT IN ('held', 'removed')
+                ORDER BY t.post_id DESC LIMIT ?''',
+                '''SELECT id FROM posts WHERE type = 'announcement' AND group_id IS NULL AND id < ?
+                AND status NOT IN ('held', 'removed') ORDER BY id DESC LIMIT ?''',
+            ]
+            params = [user_id, before_id, limit, before_id, limit]
+            for group_id in large_groups:
+                sources.append('''SELECT id FROM posts WHERE group_id = ? AND id < ? AND type != 'confession'
+                               AND status NOT IN ('held', 'removed') ORDER BY id DESC LIMIT ?''')
+                params += [group_id, before_id, limit]
+            union = '\nUNION '.join(f'SELECT * FROM ({source})' for source in sources)
+            # Authors of anonymous posts are withheld in SQL, so rows need no fixing up
+            posts = fetch_all(conn, Post,
+                f'''SELECT p.id, CASE WHEN p.is_anonymous THEN NULL ELSE p.user_id END AS user_id, p.content,
+                       p.type, p.is_anonymous, p.likes, p.created_at, p.group_id, g.name AS group_name,
+                       u.first_name, u.last_name
+                FROM ({union}) feed
+                JOIN posts p ON p.id = feed.post_id
+                LEFT JOIN groups g ON g.id = p.group_id
+                LEFT JOIN users u ON u.id = p.user_id AND NOT p.is_anonymous
+                ORDER BY p.id DESC LIMIT ?''', params + [limit])
+        next_cursor = posts[-1]['id'] if len(posts) == limit else None
+        return posts, next_cursor
+    
+    def backfill_timeline(self, conn=None, user_id=None, group_id=None, per_group=TIMELINE_BACKFILL):
+        """Copy the newest ``per_group`` posts of small groups into members' timelines.
+        
+        Limited to one user and/or group when given; returns the rows added.
+        """
+        if conn is None:
+            with self.pool.write() as conn:
+                added = self.backfill_timeline(conn, user_id, group_id, per_group)
+            if added:
+                self._notify_write('timeline', action='backfill', user_id=user_id, group_id=group_id)
+            return added
+        filters, filter_params = [], []
+        if user_id is not None:
+            filters.append('gm.user_id = ?')
+            filter_params.append(user_id)
+        group_filter = ''
+        if group_id is not None:
+            filters.append('gm.group_id = ?')
+            filter_params.append(group_id)
+            group_filter = 'AND group_id = ?'
+        params = [TIMELINE_FANOUT_LIMIT] + ([group_id] if group_id is not None else []) + [per_group] + filter_params
+        return conn.execute(f'''
+        INSERT OR IGNORE INTO timeline (user_id, post_id, group_id)
+        SELECT gm.user_id, p.id, p.group_id
+        FROM group_members gm
+        JOIN groups g ON g.id = gm.group_id AND g.member_count <= ?
+        JOIN (
+            SELECT id, group_id, ROW_NUMBER() OVER (PARTITION BY group_id ORDER BY id DESC) AS recency
+            FROM posts WHERE group_id IS NOT NULL AND type != 'confession' {group_filter}
+        ) p ON p.group_id = gm.group_id AND p.recency <= ?
+        {'WHERE ' + ' AND '.join(filters) if filters else ''}
+        ''', params).rowcount
+    
+    def trim_timelines(self, keep=TIMELINE_LENGTH, batch=200):
+        """Drop all but the newest ``keep`` rows of every timeline; returns the rows removed.
+        
+        Over-long timelines are found with a read, then trimmed ``batch`` users
+        per transaction so the write lock is only held briefly.
+        """
+        with self.pool.read() as conn:
+            user_ids = [row[0] for row in conn.execute(
+                'SELECT user_id FROM timeline GROUP BY user_id HAVING COUNT(*) > ?', (keep,)).fetchall()]
+        removed = 0
+        for start in range(0, len(user_ids), batch):
+            with self.pool.write() as conn:
+                for user_id in user_ids[start:start + batch]:
+                    removed += conn.execute(
+                        '''DELETE FROM timeline WHERE user_id = ? AND post_id < (
+                            SELECT post_id FROM timeline WHERE user_id = ?
+                            ORDER BY post_id DESC LIMIT 1 OFFSET ?)''', (user_id, user_id, keep - 1)).rowcount
+        if removed:
+            self._notify_write('timeline', action='trim')
+        return removed
+    
+    @cached('posts')
+    def get_confession_feed(self, limit=20, cursor=None):
+        """Return ``(posts, next_cursor)`` for the newest confessions.
+        
+        Pass the returned cursor back to fetch the next page; it is None once
+        the feed is exhausted. Author ids are withheld for anonymous posts.
+        """
+        query = '''
+        SELECT id, CASE WHEN is_anonymous THEN NULL ELSE user_id END AS user_id, content, is_anonymous, likes,
+               created_at
+        FROM posts
+        WHERE type = 'confession' AND status NOT IN ('held', 'removed') {}
+        ORDER BY created_at DESC, id DESC LIMIT ?
+        '''
+        if cursor is None:
+            query, params = query.format(''), (limit,)
+        else:
+            query, params = query.format('AND (created_at, id) < (?, ?)'), (cursor[0], cursor[1], limit)
+        
+        with self.pool.read() as conn:
+            posts = fetch_all(conn, Post, query, params)
+        next_cursor = (posts[-1]['created_at'], posts[-1]['id']) if len(posts) == limit else None
+        return posts, next_cursor
+    
+    # Moderation: reports are aggregated onto the post by trigger. Posts awaiting
+    # review are 'flagged' (reported, still shown) or 'held' (hidden), and feeds
+    # and search skip held and removed posts.
+    def report_post(self, post_id, reporter_id, reason=None):
+        """Report a post; returns False if the user already reported it or it doesn't exist."""
+        with self.pool.write() as conn:
+            reported = conn.execute(
+                '''INSERT OR IGNORE INTO post_reports (post_id, reporter_id, reason)
+                SELECT id, ?, ? FROM posts WHERE id = ?''', (reporter_id, reason, post_id)).rowcount
+        if reported:
+            self._notify_write('post_reports', action='insert', post_id=post_id)
+        return bool(reported)
+    
+    @cached('posts')
+    def get_review_queue(self, limit=50):
+        """Posts awaiting review, highest priority first; one scan of the review-queue index."""
+        with self.pool.read() as conn:
+            return fetch_all(conn, Post,
+                '''SELECT id, content, type, is_anonymous, status, report_count, review_priority, hold_reason,
+                       created_at
+                FROM posts WHERE status IN ('flagged', 'held')
+                ORDER BY review_priority DESC, id LIMIT ?''', (limit,))
+    
+    @cached('posts')
+    def get_review_queue_size(self):
+        with self.pool.read() as conn:
+            return conn.execute("SELECT COUNT(*) FROM posts WHERE status IN ('flagged', 'held')").fetchone()[0]
+    
+    def review_post(self, post_id, decision):
+        """Apply a moderator's 'approve' or 'remove'; returns False if the post wasn't awaiting review."""
+        status = REVIEW_DECISIONS[decision]
+        with self.pool.write() as conn:
+            changed = conn.execute(
+                '''UPDATE posts SET status = ?, review_priority = 0
+                WHERE id = ? AND status IN ('flagged', 'held')''', (status, post_id)).rowcount
+        if changed:
+            self._notify_write('posts', action='moderation', post_id=post_id, status=status)
+        return bool(changed)
+    
+    def get_posts_to_prescreen(self, after_id, limit=1000):
+        """``[(id, content)]`` of the next ``limit`` posts after ``after_id``, announcements excepted."""
+        with self.pool.read() as conn:
+            return conn.execute(
+                '''SELECT id, content FROM posts WHERE id > ? AND type != 'announcement'
+                ORDER BY id LIMIT ?''', (after_id, limit)).fetchall()
+    
+    def hold_posts(self, holds, high_water):
+        """Hold ``[(post_id, reason)]`` for review and store the pre-screen's high-water mark.
+        
+        Both happen in one transaction, so a batch is never screened twice or
+        skipped. Returns the number of posts held.
+        """
+        with self.pool.write() as conn:
+            held = 0
+            if holds:
+                held = conn.executemany(
+                    '''UPDATE posts SET status = 'held', hold_reason = ?, review_priority = review_priority + ?
+                    WHERE id = ? AND status IN ('visible', 'flagged')''',
+                    [(reason, PRESCREEN_PRIORITY, post_id) for post_id, reason in holds]).rowcount
+            conn.execute("INSERT OR REPLACE INTO app_settings (name, value) VALUES ('prescreen_high_water', ?)",
+                         (json.dumps(high_water),))
+        if held:
+            self._notify_write('posts', action='moderation', post_ids=[post_id for post_id, _ in holds])
+        self._notify_write('app_settings', action='update', names=['prescreen_high_water'])
+        return held
+    
+    # Connections are directed rows: a pending row points from requester to
+    # recipient, an accepted row links both users and a blocked row points from
+    # the blocker to the blocked user.
+    def send_connection_request(self, user_id, target_id):
+        """Request a connection; returns the resulting status or None if not allowed."""
+        if user_id == target_id:
+            return None
+        with self.pool.write() as conn:
+            rows = dict(conn.execute(
+                '''SELECT user_id, status FROM connections
+                WHERE (user_id = ? AND connection_id = ?) OR (user_id = ? AND connection_id = ?)''',
+                (user_id, target_id, target_id, user_id)).fetchall())
+            if 'blocked' in rows.values():
+                return None
+            if 'accepted' in rows.values():
+                return 'accepted'
+            if rows.get(target_id) == 'pending':
+                # They already asked us: treat the request as an accept
+                status = 'accepted'
+                conn.execute('''UPDATE connections SET status = 'accepted', accepted_at = CURRENT_TIMESTAMP
+                             WHERE user_id = ? AND connection_id = ?''', (target_id, user_id))
+            else:
+                status = 'pending'
+                conn.execute('INSERT OR IGNORE INTO connections (user_id, connection_id) VALUES (?, ?)',
+                             (user_id, target_id))
+        self._notify_write('connections', action=status, user_id=user_id, other_id=target_id)
+        return status
+    
+    def accept_connection(self, user_id, requester_id):
+        with self.pool.write() as conn:
+            changed = conn.execute(
+                '''UPDATE connections SET status = 'accepted', accepted_at = CURRENT_TIMESTAMP
+                WHERE status = 'pending' AND user_id = ? AND connection_id = ?''',
+                (requester_id, user_id)).rowcount
+        if changed:
+            self._notify_write('connections', action='accepted', user_id=user_id, other_id=requester_id)
+        return bool(changed)
+    
+    def remove_connection(self, user_id, other_id):
+        """Withdraw, decline or remove a connection between two users (blocks are kept)."""
+        with self.pool.write() as conn:
+            changed = conn.execute(
+                '''DELETE FROM connections WHERE status != 'blocked'
+                AND ((user_id = ? AND connection_id = ?) OR (user_id = ? AND connection_id = ?))''',
+                (user_id, other_id, other_id, user_id)).rowcount
+        if changed:
+            self._notify_write('connections', action='removed', user_id=user_id, other_id=other_id)
+        return bool(changed)
+    
+    def block_user(self, user_id, target_id):
+        with self.pool.write() as conn:
+            conn.execute(
+                '''DELETE FROM connections WHERE status != 'blocked'
+                AND ((user_id = ? AND connection_id = ?) OR (user_id = ? AND connection_id = ?))''',
+                (user_id, target_id, target_id, user_id))
+            conn.execute('''INSERT INTO connections (user_id, connection_id, status) VALUES (?, ?, 'blocked')
+                         ON CONFLICT (user_id, connection_id) DO UPDATE SET status = excluded.status''',
+                         (user_id, target_id))
+        self._notify_write('connections', action='blocked', user_id=user_id, other_id=target_id)
+    
+    @cached('users', 'connections')
+    def get_pending_requests(self, user_id):
+        with self.pool.read() as conn:
+            return fetch_all(conn, User,
+                '''SELECT u.id, u.first_name, u.last_name, u.role, u.position, u.current_company, c.requested_at
+                FROM connections c JOIN users u ON u.id = c.user_id
+                WHERE c.connection_id = ? AND c.status = 'pending'
+                ORDER BY c.requested_at DESC''', (user_id,))
+    
+    @cached('users', 'connections')
+    def get_connections(self, user_id):
+        """Accepted connections of the user, by name."""
+        with self.pool.read() as conn:
+            return fetch_all(conn, User,
+                '''SELECT u.id, u.first_name, u.last_name, u.role FROM connections c
+                JOIN users u ON u.id = CASE WHEN c.user_id = ? THEN c.connection_id ELSE c.user_id END
+                WHERE (c.user_id = ? OR c.connection_id = ?) AND c.status = 'accepted'
+                ORDER BY u.first_name, u.last_name''', (user_id, user_id, user_id))
+    
+    # Messages are append-only and ids only grow, so clients keep the last id
+    # they have seen and poll with get_messages(after_id=...) instead of
+    # reloading the thread.
+    def get_or_create_conversation(self, user_id, other_id):
+        """Return the id of the two users' conversation, or None if either has blocked the other."""
+        if user_id == other_id:
+            return None
+        pair_key = f'{min(user_id, other_id)}:{max(user_id, other_id)}'
+        # A block also closes any conversation the two already have
+        with self.pool.read() as conn:
+            if self._is_blocked(conn, user_id, other_id):
+                return None
+            row = conn.execute('SELECT id FROM conversations WHERE pair_key = ?', (pair_key,)).fetchone()
+        if row:
+            return row[0]
+        with self.pool.write() as conn:
+            if self._is_blocked(conn, user_id, other_id):
+                return None
+            conn.execute('INSERT OR IGNORE INTO conversations (pair_key) VALUES (?)', (pair_key,))
+            conversation_id = conn.execute('SELECT id FROM conversations WHERE pair_key = ?',
+                                           (pair_key,)).fetchone()[0]
+            conn.executemany(
+                'INSERT OR IGNORE INTO conversation_participants (conversation_id, user_id) VALUES (?, ?)',
+                [(conversation_id, user_id), (conversation_id, other_id)])
+        return conversation_id
+    
+    def _is_blocked(self, conn, user_id, other_id):
+        return conn.execute(
+            '''SELECT 1 FROM connections WHERE status = 'blocked'
+            AND ((user_id = ? AND connection_id = ?) OR (user_id = ? AND connection_id = ?))''',
+            (user_id, other_id, other_id, user_id)).fetchone() is not None
+    
+    def send_message(self, conversation_id, sender_id, body):
+        """Append a message; returns it as a dict, or None if the sender isn't a
+        participant or either user has blocked the other."""
+        return self.send_messages([(conversation_id, sender_id, body)])[0]
+    
+    def send_messages(self, messages):
+        """Append ``(conversation_id, sender_id, body)`` messages in one transaction.
+        
+        Returns one message dict per input, or None where the sender isn't in
+        the conversation or a block stands between the sender and another
+        participant.
+        """
+        created_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        sent = []
+        with self.pool.write() as conn:
+            for conversation_id, sender_id, body in messages:
+                # Blocks are checked in the sending transaction, so one made
+                # after the conversation was opened still applies
+                cursor = conn.execute(
+                    '''INSERT INTO messages (conversation_id, sender_id, body, created_at)
+                    SELECT :conversation, :sender, :body, :created_at WHERE EXISTS (
+                        SELECT 1 FROM conversation_participants
+                        WHERE conversation_id = :conversation AND user_id = :sender)
+                    AND NOT EXISTS (
+                        SELECT 1 FROM conversation_participants op JOIN connections c ON c.status = 'blocked'
+                            AND ((c.user_id = :sender AND c.connection_id = op.user_id)
+                                 OR (c.user_id = op.user_id AND c.connection_id = :sender))
+                        WHERE op.conversation_id = :conversation AND op.user_id != :sender)''',
+                    {'conversation': conversation_id, 'sender': sender_id, 'body': body, 'created_at': created_at})
+                sent.append({'id': cursor.lastrowid, 'conversation_id': conversation_id, 'sender_id': sender_id,
+                             'body': body, 'created_at': created_at} if cursor.rowcount else None)
+        conversation_ids = sorted({message['conversation_id'] for message in sent if message})
+        if conversation_ids:
+            self._notify_write('messages', action='insert', conversation_ids=conversation_ids)
+        return sent
+    
+    def get_messages(self, conversation_id, after_id=0, limit=200):
+        """Messages newer than ``after_id``, oldest first."""
+        with self.pool.read() as conn:
+            cursor = conn.execute(
+                '''SELECT id, conversation_id, sender_id, body, created_at FROM messages
+                WHERE conversation_id = ? AND id > ? ORDER BY id LIMIT ?''', (conversation_id, after_id, limit))
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def get_message_history(self, conversation_id, before_id=None, limit=50):
+        """The ``limit`` messages before ``before_id`` (default: the newest), oldest first."""
+        with self.pool.read() as conn:
+            cursor = conn.execute(
+                '''SELECT id, conversation_id, sender_id, body, created_at FROM messages
+                WHERE conversation_id = ? AND id < ? ORDER BY id DESC LIMIT ?''',
+                (conversation_id, before_id if before_id is not None else 2 ** 63 - 1, limit))
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, row)) for row in reversed(cursor.fetchall())]
+    
+    def get_conversations(self, user_id, limit=50):
+        """The user's inbox, most recently active first, with the other participant and last message."""
+        with self.pool.read() as conn:
+            cursor = conn.execute(
+                '''SELECT cp.conversation_id, cp.unread_count, cp.last_message_id,
+                       u.id AS other_id, u.first_name, u.last_name,
+                       m.sender_id AS last_sender_id, m.body AS last_body, m.created_at AS last_message_at
+                FROM conversation_participants cp
+                LEFT JOIN conversation_participants op
+                    ON op.conversation_id = cp.conversation_id AND op.user_id != cp.user_id
+                LEFT JOIN users u ON u.id = op.user_id
+                LEFT JOIN messages m ON m.id = cp.last_message_id
+                WHERE cp.user_id = ?
+                ORDER BY cp.last_message_id DESC LIMIT ?''', (user_id, limit))
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def poll_inbox(self, user_id, after_id=0):
+        """Cheap "anything new?" check: ``{conversation_id: (last_message_id, unread_count)}``
+        for the user's conversations with messages after ``after_id``.
+        """
+        with self.pool.read() as conn:
+            return {row[0]: (row[1], row[2]) for row in conn.execute(
+                '''SELECT conversation_id, last_message_id, unread_count FROM conversation_participants
+                WHERE user_id = ? AND last_message_id > ?''', (user_id, after_id)).fetchall()}
+    
+    def mark_conversation_read(self, conversation_id, user_id, up_to_id):
+        """Move the user's read position forward to ``up_to_id``; returns the unread count left."""
+        with self.pool.write() as conn:
+            changed = conn.execute(
+                '''UPDATE conversation_participants SET
+                    last_read_id = MAX(last_read_id, :up_to),
+                    unread_count = (SELECT COUNT(*) FROM messages
+                                    WHERE conversation_id = :conversation AND id > MAX(last_read_id, :up_to)
+                                    AND sender_id IS NOT :user)
+                WHERE conversation_id = :conversation AND user_id = :user AND last_read_id < :up_to''',
+                {'conversation': conversation_id, 'user': user_id, 'up_to': up_to_id}).rowcount
+            row = conn.execute(
+                'SELECT unread_count FROM conversation_participants WHERE conversation_id = ? AND user_id = ?',
+                (conversation_id, user_id)).fetchone()
+        if changed:
+            self._notify_write('conversation_participants', action='read', conversation_id=conversation_id,
+                               user_id=user_id)
+        return row[0] if row else 0
+    
+    def search(self, text, limit=10, prefix=False, viewer_id=None):
+        """Search people, groups and posts; returns a dict of ranked result lists.
+        
+        Posts in private groups are only returned when ``viewer_id`` is a member.
+        """
+        return {
+            'users': self.search_users(text, limit, prefix),
+            'groups': self.search_groups(text, limit, prefix),
+            'posts': self.search_posts(text, limit, prefix, viewer_id),
+        }
+    
+    @cached('users')
+    def search_users(self, text, limit=10, prefix=False):
+        return self._search(User, search.USER_SEARCH_SQL, text, limit, prefix)
+    
+    @cached('groups')
+    def search_groups(self, text, limit=10, prefix=False):
+        return self._search(Group, search.GROUP_SEARCH_SQL, text, limit, prefix)
+    
+    @cached('posts', 'users', 'groups', 'group_members')
+    def search_posts(self, text, limit=10, prefix=False, viewer_id=None):
+        return self._search(Post, search.POST_SEARCH_SQL, text, limit, prefix, (viewer_id,))
+    
+    def _search(self, model, query, text, limit, prefix, params=()):
+        expression = search.match_expression(text, prefix)
+        if expression is None:
+            return []
+        with self.pool.read() as conn:
+            return fetch_all(conn, model, query, (expression, *params, limit))
+    
+    # Maintenance, run periodically by scheduler.JobScheduler. Every job works
+    # in short write transactions, so user-facing writes only wait briefly.
+    def reconcile_counters(self, batch=1000):
+        """Repair drifted denormalised counters, ``batch`` rows per transaction.
+        
+        Returns the number of rows fixed per table.
+        """
+        fixed = {}
+        for table, (column, expression) in DENORMALISED_COUNTERS.items():
+            with self.pool.read() as conn:
+                last_id = conn.execute(f'SELECT MAX(id) FROM {table}').fetchone()[0] or 0
+            fixed[table] = 0
+            for start in range(1, last_id + 1, batch):
+                with self.pool.write() as conn:
+                    fixed[table] += conn.execute(
+                        f'''UPDATE {table} SET {column} = ({expression})
+                        WHERE id BETWEEN ? AND ? AND {column} IS NOT ({expression})''',
+                        (start, start + batch - 1)).rowcount
+            if fixed[table]:
+                self._notify_write(table, action='counters')
+        return fixed
+    
+    def optimize(self):
+        """Refresh the query planner's statistics; returns the statement run.
+        
+        The first run is a sampled ANALYZE of every table; after that
+        ``PRAGMA optimize`` re-analyzes only tables that have changed enough.
+        """
+        with self.pool.write() as conn:
+            analyzed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+            statement = 'PRAGMA optimize' if analyzed else 'ANALYZE'
+            conn.execute(f'PRAGMA analysis_limit={ANALYSIS_LIMIT}').fetchall()
+            conn.execute(statement).fetchall()
+        return statement
+    
+    def reclaim_free_pages(self, max_pages=10000, batch=256):
+        """Return up to ``max_pages`` free pages to the filesystem; returns the pages freed.
+        
+        Needs auto_vacuum=INCREMENTAL, which new databases get. Older files
+        return 0 until converted once, offline, with
+        ``PRAGMA auto_vacuum=INCREMENTAL; VACUUM``.
+        """
+        with self.pool.read() as conn:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                return 0
+            pages = min(conn.execute('PRAGMA freelist_count').fetchone()[0], max_pages)
+        for start in range(0, pages, batch):
+            with self.pool.write() as conn:
+                # sqlite3 steps a statement without result columns only once,
+                # and each step frees one page
+                for _ in range(min(batch, pages - start)):
+                    conn.execute('PRAGMA incremental_vacuum(1)').fetchall()
+        return pages
+    
+    def purge_pending_connections(self, older_than_days=PENDING_CONNECTION_DAYS, batch=1000):
+        """Withdraw connection requests pending for ``older_than_days``; returns how many."""
+        purged = 0
+        while True:
+            with self.pool.write() as conn:
+                removed = conn.execute(
+                    '''DELETE FROM connections WHERE id IN (
+                        SELECT id FROM connections
+                        WHERE status = 'pending' AND requested_at < datetime('now', ?) LIMIT ?)''',
+                    (f'-{int(older_than_days)} days', batch)).rowcount
+            purged += removed
+            if removed < batch:
+                break
+        if purged:
+            self._notify_write('connections', action='purged')
+        return purged
+    
+    def archive_events(self, older_than_days=EVENT_ARCHIVE_DAYS, batch=500):
+        """Archive events that ended ``older_than_days`` ago, cancelling their waitlists.
+        
+        Returns the number of events archived.
+        """
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).strftime('%Y-%m-%d %H:%M:%S')
+        selected = 'SELECT value FROM json_each(?)'
+        archived = 0
+        while True:
+            with self.pool.write() as conn:
+                event_ids = [row[0] for row in conn.execute(
+                    '''SELECT id FROM events WHERE archived_at IS NULL AND start_time < ?
+                    AND COALESCE(end_time, start_time) < ? LIMIT ?''', (cutoff, cutoff, batch)).fetchall()]
+                if event_ids:
+                    ids = json.dumps(event_ids)
+                    conn.execute(f'UPDATE events SET archived_at = CURRENT_TIMESTAMP WHERE id IN ({selected})',
+                                 (ids,))
+                    conn.execute(
+                        f'''UPDATE event_registrations SET status = 'cancelled', updated_at = CURRENT_TIMESTAMP
+                        WHERE status = 'waitlisted' AND event_id IN ({selected})''', (ids,))
+            archived += len(event_ids)
+            if len(event_ids) < batch:
+                break
+        if archived:
+            self._notify_write('events', action='archive')
+        return archived
+    
+    def explain(self, sql, params=()):
+        """Return SQLite's plan for ``sql`` as rows of ``id``, ``parent`` and ``detail``."""
+        with self.pool.read() as conn:
+            return [{'id': row[0], 'parent': row[1], 'detail': row[3]}
+                    for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()]
+    
+    def iter_chunks(self, sql, params=(), chunk_size=5000):
+        """Yield ``(columns, rows)`` for ``sql``, ``chunk_size`` rows at a time.
+        
+        Only one chunk is held in memory, so whole tables can be streamed.
+        The first chunk is yielded even when empty, so the columns are always
+        known. A reader connection stays checked out until the generator
+        finishes or is closed, and sees one consistent snapshot throughout.
+        """
+        with self.pool.read() as conn:
+            cursor = conn.execute(sql, params)
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchmany(chunk_size)
+            while True:
+                yield columns, rows
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
     
     def close(self):
-        self.conn.close()
+        self.hasher.shutdown(wait=False)
+        self.pool.close()
+
+class LazyDatabase:
+    """Stand-in for the shared Database that builds it on first use.
+    
+    Importing this module then does no I/O: the connection pool and schema
+    check run when a request first touches ``db``, and pages that never do
+    (the login form) never pay for them.
+    """
+    def __init__(self, *args, **kwargs):
+        self._args = args
+        self._kwargs = kwargs
+        self._instance = None
+        self._lock = threading.Lock()
+    
+    def _get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = Database(*self._args, **self._kwargs)
+        return self._instance
+    
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+    
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            super().__setattr__(name, value)
+        else:
+            setattr(self._get(), name, value)
 
-# Singleton instance
-db = Database()
+# Singleton instance; DATABASE_URL may name a file or a SQLAlchemy URL
+db = LazyDatabase(os.environ.get('DATABASE_URL', 'mes_connect.db'))
@@ -0,0 +1,140 @@
+"""Stream users, posts and events to CSV, JSONL or Parquet for reporting.
+
+    python exports.py posts --format parquet --output posts.parquet
+    python exports.py users --format csv > users.csv
+
+Rows are read with ``Database.iter_chunks`` and written one chunk at a
+time, so memory stays flat however large the table. Password hashes are
+never exported, anonymous posts are exported without their author, and
+posts held or removed by moderation are left out.
+Parquet output needs ``pyarrow``.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+
+EXPORTS = {
+    'users': '''
+        SELECT id, email, role, first_name, last_name, registration_number, batch_year, department,
+               current_company, position, is_verified, is_active, created_at
+        FROM users ORDER BY id''',
+    'posts': '''
+        SELECT id, CASE WHEN is_anonymous THEN NULL ELSE user_id END AS user_id, type, is_anonymous, group_id,
+               likes, status, report_count, created_at, content
+        FROM posts WHERE status NOT IN ('held', 'removed') ORDER BY id''',
+    'events': '''
+        SELECT id, title, event_type, organizer_id, start_time, end_time, location, max_participants,
+               current_participants, is_approved, created_at, archived_at
+        FROM events ORDER BY id''',
+    'event_attendance': '''
+        SELECT r.event_id, e.title AS event_title, e.start_time, r.user_id, u.email, u.first_name, u.last_name,
+               r.status, r.created_at AS registered_at
+        FROM event_registrations r
+        JOIN events e ON e.id = r.event_id
+        LEFT JOIN users u ON u.id = r.user_id
+        ORDER BY r.event_id, r.id''',
+}
+
+FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson', 'parquet': 'application/vnd.apache.parquet'}
+CHUNK_SIZE = 5000
+
+
+def write_csv(chunks, f):
+    writer = csv.writer(f)
+    count = None
+    for columns, rows in chunks:
+        if count is None:
+            writer.writerow(columns)
+            count = 0
+        writer.writerows(rows)
+        count += len(rows)
+    return count or 0
+
+
+def write_jsonl(chunks, f):
+    encode = json.JSONEncoder(default=str).encode
+    count = 0
+    for columns, rows in chunks:
+        f.writelines(encode(dict(zip(columns, row))) + '\n' for row in rows)
+        count += len(rows)
+    return count
+
+
+def write_parquet(chunks, f):
+    """Write each chunk as a row group; column types come from the first chunk."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer, schema, count = None, None, 0
+    try:
+        for columns, rows in chunks:
+            values = list(zip(*rows)) or [()] * len(columns)
+            if writer is None:
+                # Columns that are all NULL in the first chunk are written as strings
+                types = [pa.array(column).type for column in values]
+                as_text = [pa.types.is_null(kind) for kind in types]
+                schema = pa.schema([(name, pa.string() if text else kind)
+                                    for name, kind, text in zip(columns, types, as_text)])
+                writer = pq.ParquetWriter(f, schema)
+            arrays = [pa.array([None if value is None else str(value) for value in column] if text else column,
+                               type=field.type)
+                      for column, field, text in zip(values, schema, as_text)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            count += len(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+WRITERS = {'csv': write_csv, 'jsonl': write_jsonl, 'parquet': write_parquet}
+
+
+def export(db, name, fmt, f, chunk_size=CHUNK_SIZE):
+    """Write the ``name`` export to the binary file ``f``; returns the rows written."""
+    chunks = db.iter_chunks(EXPORTS[name], chunk_size=chunk_size)
+    try:
+        if fmt == 'parquet':
+            return write_parquet(chunks, f)
+        text = io.TextIOWrapper(f, encoding='utf-8', newline='' if fmt == 'csv' else None)
+        try:
+            return WRITERS[fmt](chunks, text)
+        finally:
+            # Leave the caller's file open
+            text.flush()
+            text.detach()
+    finally:
+        chunks.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export a table for reporting.')
+    parser.add_argument('name', choices=list(EXPORTS))
+    parser.add_argument('--format', choices=list(FORMATS), default='csv')
+    parser.add_argument('--output', help='file to write (default: stdout, except for parquet)')
+    parser.add_argument('--db', default=os.environ.get('DATABASE_URL', 'mes_connect.db'))
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    if args.format == 'parquet' and not args.output:
+        parser.error('parquet needs --output')
+
+    from database import Database
+    db = Database(args.db, instrument=False)
+    try:
+        if args.output:
+            with open(args.output, 'wb') as f:
+                count = export(db, args.name, args.format, f, args.chunk_size)
+        else:
+            count = export(db, args.name, args.format, sys.stdout.buffer, args.chunk_size)
+            sys.stdout.flush()
+    finally:
+        db.close()
+    print(f'{count} rows exported', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
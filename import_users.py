@@ -0,0 +1,86 @@
+"""Bulk-import a CSV or JSONL roster of users.
+
+    python import_users.py roster.csv --default-role student --results results.jsonl
+
+Rows are streamed from the file, so rosters of any size can be imported
+without loading them into memory. Columns match the ``users`` table:
+email, password, role, first_name, last_name, registration_number,
+batch_year, department, current_company and position.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+from database import Database, USER_COLUMNS
+
+
+def read_roster(path, fmt=None):
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'jsonl':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def normalize(row, default_role=None, default_password=None):
+    row = {key.strip(): value.strip() if isinstance(value, str) else value
+           for key, value in row.items() if key and key.strip() in USER_COLUMNS}
+    row = {key: value for key, value in row.items() if value not in ('', None)}
+    if default_role:
+        row.setdefault('role', default_role)
+    if default_password:
+        row.setdefault('password', default_password)
+    if 'role' in row:
+        row['role'] = row['role'].lower()
+    if 'batch_year' in row:
+        try:
+            row['batch_year'] = int(row['batch_year'])
+        except ValueError:
+            # Left as given; create_users_bulk reports the row as invalid
+            pass
+    for flag in ('is_verified', 'is_active'):
+        if isinstance(row.get(flag), str):
+            row[flag] = int(row[flag].lower() in ('1', 'true', 'yes', 'y'))
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk-import a CSV or JSONL user roster.')
+    parser.add_argument('roster', help='path to a .csv or .jsonl roster')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='defaults to the file extension')
+    parser.add_argument('--db', default=os.environ.get('DATABASE_URL', 'mes_connect.db'),
+                        help='database file or SQLAlchemy URL')
+    parser.add_argument('--chunk-size', type=int, default=500, help='rows per transaction')
+    parser.add_argument('--default-role', choices=['student', 'alumni', 'admin'])
+    parser.add_argument('--default-password', help='password for rows without one')
+    parser.add_argument('--results', help='write per-row results to this JSONL file')
+    args = parser.parse_args(argv)
+
+    db = Database(args.db)
+    rows = (normalize(row, args.default_role, args.default_password)
+            for row in read_roster(args.roster, args.format))
+    counts = {'created': 0, 'duplicate': 0, 'invalid': 0}
+    out = open(args.results, 'w', encoding='utf-8') if args.results else None
+    try:
+        for result in db.iter_create_users_bulk(rows, chunk_size=args.chunk_size):
+            counts[result['status']] += 1
+            if out:
+                out.write(json.dumps(result) + '\n')
+            elif result['status'] == 'invalid':
+                print(f"row {result['row']}: {result['error']}", file=sys.stderr)
+    finally:
+        if out:
+            out.close()
+        db.close()
+
+    print(', '.join(f'{count} {status}' for status, count in counts.items()))
+    return 1 if counts['invalid'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
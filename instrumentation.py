@@ -0,0 +1,306 @@
+import bisect
+import contextvars
+import functools
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+
+# Upper bounds in ms of the latency histogram buckets; the last is open
+BUCKETS_MS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, float('inf')]
+_BUCKETS_S = [bound / 1000 for bound in BUCKETS_MS]
+
+_page = contextvars.ContextVar('page', default=None)
+
+# Bound once: these run on every statement
+perf_counter = time.perf_counter
+_execute, _executemany = sqlite3.Cursor.execute, sqlite3.Cursor.executemany
+_fetchone, _fetchmany, _fetchall = sqlite3.Cursor.fetchone, sqlite3.Cursor.fetchmany, sqlite3.Cursor.fetchall
+_cursor = sqlite3.Connection.cursor
+_sql_of = itemgetter(0)
+
+_COMMENTS = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_IN_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def set_page(page):
+    """Attribute the queries run by the calling thread to ``page`` from now on."""
+    _page.set(page)
+
+
+# Stats are kept per statement text and only grouped by fingerprint when read
+@functools.lru_cache(maxsize=4096)
+def fingerprint(sql):
+    """Normalise ``sql`` so that queries differing only in literals group together."""
+    sql = _COMMENTS.sub(' ', sql)
+    sql = _STRINGS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _IN_LISTS.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip().rstrip(';')
+
+
+class _Entry:
+    __slots__ = ('calls', 'total_ms', 'max_ms', 'rows', 'buckets', 'pages', 'sample')
+
+    def __init__(self, sample):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * len(BUCKETS_MS)
+        self.pages = {}
+        # (sql, parameter shape) for EXPLAIN QUERY PLAN
+        self.sample = sample
+
+    def add(self, seconds, rows, pages):
+        """Fold in a batch of executions, given as parallel sequences."""
+        seconds = sorted(seconds)
+        self.calls += len(seconds)
+        self.total_ms += sum(seconds) * 1000
+        self.max_ms = max(self.max_ms, seconds[-1] * 1000)
+        self.rows += sum(filter((0).__lt__, rows))
+        below = 0
+        for i, bound in enumerate(_BUCKETS_S):
+            upto = bisect.bisect_right(seconds, bound)
+            self.buckets[i] += upto - below
+            below = upto
+        for page, calls in Counter(pages).items():
+            self.pages[page] = self.pages.get(page, 0) + calls
+
+
+class QueryStats:
+    """Per-fingerprint query timings over a rolling window, plus a slow-query log.
+
+    A statement's time covers its execute and the first fetch on its cursor.
+    Stats live in two generations of ``window`` seconds each; when the
+    current one is full the older is dropped, so ``top()`` always covers
+    between one and two windows of traffic. Queries slower than ``slow_ms``
+    are kept in ``slow_queries`` and, if ``log_path`` is set, appended to it
+    as JSON lines.
+    """
+
+    def __init__(self, slow_ms=100.0, log_path=None, window=600.0, keep_slow=200, batch=4096):
+        self.slow_ms = slow_ms
+        self.slow_seconds = slow_ms / 1000
+        self.log_path = log_path
+        self.window = window
+        self.batch = batch
+        self.slow_queries = deque(maxlen=keep_slow)
+        # Recording only appends here (atomic, no lock); aggregation happens
+        # a batch at a time, or when stats are read
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._current = {}
+        self._previous = {}
+        self._rotated_at = time.perf_counter()
+        self._log_lock = threading.Lock()
+
+    def connection(self, *args, **kwargs):
+        """``sqlite3.connect`` factory returning a connection that reports here."""
+        return InstrumentedConnection(*args, stats=self, **kwargs)
+
+    def record(self, sql, params, elapsed, rows):
+        """Add one execution of ``sql`` that took ``elapsed`` seconds."""
+        pending = self._pending
+        if len(pending) >= self.batch:
+            self._aggregate()
+        page = _page.get()
+        pending.append((sql, params, elapsed, rows, page))
+        if elapsed >= self.slow_seconds:
+            self.log_slow(sql, elapsed, rows, page)
+
+    def log_slow(self, sql, elapsed, rows, page):
+        record = {'at': datetime.now().isoformat(timespec='milliseconds'), 'ms': round(elapsed * 1000, 3),
+                  'rows': rows, 'page': page, 'fingerprint': fingerprint(sql)}
+        self.slow_queries.append(record)
+        if self.log_path:
+            with self._log_lock, open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+
+    def _aggregate(self):
+        with self._lock:
+            now = time.perf_counter()
+            if now - self._rotated_at >= self.window:
+                self._previous, self._current = self._current, {}
+                self._rotated_at = now
+            current = self._current
+            # Only as many as are queued now; recording may append meanwhile
+            popleft = self._pending.popleft
+            items = [popleft() for _ in range(len(self._pending))]
+            # Grouped by statement text, so each statement is folded in with
+            # a few calls per batch rather than per execution
+            items.sort(key=_sql_of)
+            for sql, group in groupby(items, _sql_of):
+                _, params, seconds, rows, pages = zip(*group)
+                entry = current.get(sql)
+                if entry is None:
+                    entry = current[sql] = _Entry((sql, _shape(params[0])))
+                entry.add(seconds, rows, pages)
+
+    def top(self, limit=20, order_by='total_ms'):
+        """Return the busiest fingerprints as dicts, most expensive first."""
+        self._aggregate()
+        with self._lock:
+            merged = {}
+            for generation in (self._previous, self._current):
+                for sql, entry in generation.items():
+                    key = fingerprint(sql)
+                    into = merged.get(key)
+                    if into is None:
+                        into = merged[key] = _Entry(entry.sample)
+                    into.calls += entry.calls
+                    into.total_ms += entry.total_ms
+                    into.rows += entry.rows
+                    into.max_ms = max(into.max_ms, entry.max_ms)
+                    into.buckets = [a + b for a, b in zip(into.buckets, entry.buckets)]
+                    for page, calls in entry.pages.items():
+                        into.pages[page] = into.pages.get(page, 0) + calls
+                    into.sample = entry.sample
+
+        rows = []
+        for key, entry in merged.items():
+            calls = entry.calls or 1
+            rows.append({
+                'fingerprint': key,
+                'calls': entry.calls,
+                'total_ms': entry.total_ms,
+                'mean_ms': entry.total_ms / calls,
+                'p50_ms': _percentile(entry.buckets, 0.50, entry.max_ms),
+                'p95_ms': _percentile(entry.buckets, 0.95, entry.max_ms),
+                'max_ms': entry.max_ms,
+                'rows': entry.rows,
+                'pages': sorted(entry.pages, key=entry.pages.get, reverse=True),
+                'sample': entry.sample,
+            })
+        rows.sort(key=lambda row: row[order_by], reverse=True)
+        return rows[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+            self._current, self._previous = {}, {}
+            self._rotated_at = time.perf_counter()
+        self.slow_queries.clear()
+
+
+def _shape(params):
+    # Only the shape is kept, never the values: enough to bind NULLs for EXPLAIN
+    if isinstance(params, dict):
+        return {name: None for name in params}
+    return [None] * len(params) if params else []
+
+
+def _percentile(buckets, q, max_ms):
+    """Upper bound of the bucket holding the ``q`` quantile, capped at the maximum seen."""
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    seen = 0
+    for bound, count in zip(BUCKETS_MS, buckets):
+        seen += count
+        if seen >= q * total:
+            return min(bound, max_ms)
+    return max_ms
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement to the connection's ``QueryStats``.
+
+    A query is timed over its execute and the first fetch that follows, and
+    recorded then; later fetches on the cursor are not timed, and rows are
+    counted from that first fetch only. Statements without result rows are
+    recorded straight after execute. A query whose rows are never fetched
+    or iterated goes unrecorded.
+    """
+
+    # (sql, params, seconds) of an execute still waiting for its first fetch
+    _query = None
+
+    def execute(self, sql, params=()):
+        if self._query is not None:
+            self._flush(0)
+        started = perf_counter()
+        try:
+            _execute(self, sql, params)
+        except BaseException:
+            self.connection.record(sql, params, perf_counter() - started, 0)
+            raise
+        elapsed = perf_counter() - started
+        if self.description is None:
+            self.connection.record(sql, params, elapsed, self.rowcount)
+        else:
+            self._query = (sql, params, elapsed)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        if self._query is not None:
+            self._flush(0)
+        started = perf_counter()
+        try:
+            return _executemany(self, sql, seq_of_params)
+        finally:
+            self.connection.record(sql, (), perf_counter() - started, self.rowcount)
+
+    def _flush(self, rows, fetch_started=None):
+        sql, params, elapsed = self._query
+        self._query = None
+        if fetch_started is not None:
+            elapsed += perf_counter() - fetch_started
+        self.connection.record(sql, params, elapsed, rows)
+
+    def fetchone(self):
+        if self._query is None:
+            return _fetchone(self)
+        started = perf_counter()
+        row = _fetchone(self)
+        self._flush(row is not None, started)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        if self._query is None:
+            return _fetchmany(self, size)
+        started = perf_counter()
+        rows = _fetchmany(self, size)
+        self._flush(len(rows), started)
+        return rows
+
+    def fetchall(self):
+        if self._query is None:
+            return _fetchall(self)
+        started = perf_counter()
+        rows = _fetchall(self)
+        self._flush(len(rows), started)
+        return rows
+
+    def __iter__(self):
+        # Iteration itself stays in C; the first row was already paid for in execute
+        if self._query is not None:
+            self._flush(0)
+        return self
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors, including those behind ``execute``, are instrumented."""
+
+    def __init__(self, *args, stats=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = stats
+        self.record = stats.record
+
+    def cursor(self, factory=InstrumentedCursor):
+        return _cursor(self, factory)
+
+    def execute(self, sql, params=()):
+        return _cursor(self, InstrumentedCursor).execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return _cursor(self, InstrumentedCursor).executemany(sql, seq_of_params)
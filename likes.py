@@ -0,0 +1,129 @@
+import atexit
+import threading
+
+
+class LikeBuffer:
+    """Write-behind buffer for post likes.
+
+    Likes and unlikes are coalesced in memory per (post, user) and written in a
+    single transaction every ``flush_interval_ms`` or once ``max_pending``
+    changes are waiting. Each flush dedupes against ``post_likes`` and applies
+    one ``posts.likes`` UPDATE per post, so a hot post costs one row update per
+    flush rather than one commit per click. Pending changes are flushed at
+    interpreter exit.
+    """
+
+    def __init__(self, db, flush_interval_ms=250, max_pending=500):
+        self.db = db
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._flushing = {}
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='like-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def like(self, post_id, user_id):
+        """Queue a like; returns False if the user already likes the post."""
+        return self._set(post_id, user_id, True)
+
+    def unlike(self, post_id, user_id):
+        """Queue an unlike; returns False if the user doesn't like the post."""
+        return self._set(post_id, user_id, False)
+
+    def _set(self, post_id, user_id, liked):
+        if self.has_liked(post_id, user_id) == liked:
+            return False
+        with self._lock:
+            self._pending[(post_id, user_id)] = liked
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+        return True
+
+    def has_liked(self, post_id, user_id):
+        return post_id in self.liked_among(user_id, [post_id])
+
+    def liked_among(self, user_id, post_ids):
+        """Return the subset of ``post_ids`` the user likes, including unflushed changes."""
+        post_ids = list(post_ids)
+        if not post_ids:
+            return set()
+        placeholders = ', '.join(['?'] * len(post_ids))
+        with self.db.pool.read() as conn:
+            liked = {row[0] for row in conn.execute(
+                f'SELECT post_id FROM post_likes WHERE user_id = ? AND post_id IN ({placeholders})',
+                [user_id] + post_ids)}
+        with self._lock:
+            for changes in (self._flushing, self._pending):
+                for post_id in post_ids:
+                    state = changes.get((post_id, user_id))
+                    if state is True:
+                        liked.add(post_id)
+                    elif state is False:
+                        liked.discard(post_id)
+        return liked
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def flush(self):
+        """Write all pending changes in one transaction; returns the number applied."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._flushing, self._pending = self._pending, {}
+            try:
+                deltas = self._apply(self._flushing)
+            except BaseException:
+                # Put the batch back, keeping any newer change for the same key
+                with self._lock:
+                    self._pending = {**self._flushing, **self._pending}
+                    self._flushing = {}
+                raise
+            with self._lock:
+                applied, self._flushing = len(self._flushing), {}
+        if deltas:
+            self.db._notify_write('posts', action='likes', post_ids=list(deltas))
+        return applied
+
+    def _apply(self, changes):
+        deltas = {}
+        with self.db.pool.write() as conn:
+            for (post_id, user_id), liked in changes.items():
+                if liked:
+                    changed = conn.execute('INSERT OR IGNORE INTO post_likes (post_id, user_id) VALUES (?, ?)',
+                                           (post_id, user_id)).rowcount
+                else:
+                    changed = conn.execute('DELETE FROM post_likes WHERE post_id = ? AND user_id = ?',
+                                           (post_id, user_id)).rowcount
+                if changed:
+                    deltas[post_id] = deltas.get(post_id, 0) + (1 if liked else -1)
+            conn.executemany('UPDATE posts SET likes = likes + ? WHERE id = ?',
+                             [(delta, post_id) for post_id, delta in deltas.items() if delta])
+        return deltas
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Changes were re-queued; try again on the next tick
+                pass
+
+    def close(self):
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
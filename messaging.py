@@ -0,0 +1,84 @@
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class MessageWriter:
+    """Group-commit writer for chat messages.
+
+    Senders queue their message and wait for it to be committed. A single
+    writer thread takes everything queued at that moment (up to
+    ``max_batch``) and writes it in one transaction with
+    ``Database.send_messages``, so under load many sends share one commit,
+    while a lone send is written straight away. Messages still queued are
+    written at interpreter exit.
+    """
+
+    def __init__(self, db, max_batch=500):
+        self.db = db
+        self.max_batch = max_batch
+        self.batches = self.written = 0
+
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='message-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def send(self, conversation_id, sender_id, body, timeout=10):
+        """Queue a message and wait for its commit; returns it as a dict, or None if not allowed."""
+        return self.send_async(conversation_id, sender_id, body).result(timeout)
+
+    def send_async(self, conversation_id, sender_id, body):
+        """Queue a message; returns a Future for the committed message."""
+        if self._stopped.is_set():
+            raise RuntimeError('message writer is closed')
+        future = Future()
+        self._queue.put(((conversation_id, sender_id, body), future))
+        return future
+
+    @property
+    def pending_count(self):
+        return self._queue.qsize()
+
+    def _take_batch(self, block):
+        try:
+            batch = [self._queue.get(block=block, timeout=0.5 if block else None)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            sent = self.db.send_messages([message for message, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        self.batches += 1
+        self.written += len(batch)
+        for message, (_, future) in zip(sent, batch):
+            future.set_result(message)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._take_batch(block=True)
+            if batch:
+                self._write(batch)
+
+    def close(self):
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._thread.join(timeout=5)
+        while True:
+            batch = self._take_batch(block=False)
+            if not batch:
+                break
+            self._write(batch)
@@ -0,0 +1,125 @@
+"""Versioned schema migrations.
+
+    python migrate.py --db mes_connect.db [--status]
+
+Migrations are the ``NNNN_name.sql`` files in ``migrations/``, applied in
+version order, each in its own write transaction together with its row in
+``schema_version``. When the database is already current, ``migrate`` costs
+one read and takes no write lock, so starting another process does no DDL.
+"""
+import argparse
+import os
+import re
+import sqlite3
+
+from backends import create_pool
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+_FILENAME = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """Return ``[(version, name, path)]`` sorted by version."""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = _FILENAME.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f'duplicate migration versions in {directory}')
+    return migrations
+
+
+def statements(script):
+    """Split a SQL script into complete statements, keeping trigger bodies whole."""
+    buffer = ''
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statement = buffer.strip()
+            buffer = ''
+            if statement.rstrip(';').strip():
+                yield statement
+    remainder = '\n'.join(line for line in buffer.splitlines() if not line.strip().startswith('--'))
+    if remainder.strip():
+        raise ValueError(f'incomplete SQL statement: {remainder.strip()[:60]!r}')
+
+
+def current_version(conn):
+    try:
+        return conn.execute('SELECT MAX(version) FROM schema_version').fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        # No schema_version table yet
+        return 0
+
+
+def migrate(pool, directory=MIGRATIONS_DIR):
+    """Apply every pending migration; returns the ``(version, name)`` pairs applied."""
+    migrations = discover(directory)
+    if not migrations:
+        return []
+    with pool.read() as conn:
+        if current_version(conn) >= migrations[-1][0]:
+            return []
+
+    applied = []
+    for version, name, path in migrations:
+        with open(path, encoding='utf-8') as f:
+            script = f.read()
+        with pool.write() as conn:
+            # Checked again under the write lock: another process may have
+            # applied it since
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+            if current_version(conn) >= version:
+                continue
+            for statement in statements(script):
+                conn.execute(statement)
+            conn.execute('INSERT INTO schema_version (version, name) VALUES (?, ?)', (version, name))
+        applied.append((version, name))
+    return applied
+
+
+def status(pool, directory=MIGRATIONS_DIR):
+    """Return ``[(version, name, applied_at or None)]`` for every migration file."""
+    with pool.read() as conn:
+        try:
+            applied = {version: applied_at for version, applied_at in
+                       conn.execute('SELECT version, applied_at FROM schema_version')}
+        except sqlite3.OperationalError:
+            applied = {}
+    return [(version, name, applied.get(version)) for version, name, _ in discover(directory)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply pending schema migrations.')
+    parser.add_argument('--db', default=os.environ.get('DATABASE_URL', 'mes_connect.db'),
+                        help='database file or SQLAlchemy URL')
+    parser.add_argument('--status', action='store_true', help='list migrations without applying them')
+    args = parser.parse_args(argv)
+
+    pool = create_pool(args.db)
+    try:
+        if args.status:
+            for version, name, applied_at in status(pool):
+                print(f'{version:04d}  {name:<32} {applied_at or "pending"}')
+        else:
+            applied = migrate(pool)
+            for version, name in applied:
+                print(f'applied {version:04d}_{name}')
+            if not applied:
+                print('schema is up to date')
+    finally:
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+-- Base tables as originally shipped
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email TEXT UNIQUE NOT NULL,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL CHECK(role IN ('student', 'alumni', 'admin')),
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    registration_number TEXT,
+    batch_year INTEGER,
+    department TEXT,
+    current_company TEXT,
+    position TEXT,
+    profile_image TEXT,
+    is_verified BOOLEAN DEFAULT 0,
+    is_active BOOLEAN DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER UNIQUE,
+    bio TEXT,
+    skills TEXT,
+    interests TEXT,
+    linkedin_url TEXT,
+    github_url TEXT,
+    website TEXT,
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+CREATE TABLE IF NOT EXISTS connections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    connection_id INTEGER,
+    status TEXT CHECK(status IN ('pending', 'accepted', 'blocked')) DEFAULT 'pending',
+    requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    accepted_at TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id),
+    FOREIGN KEY (connection_id) REFERENCES users (id),
+    UNIQUE(user_id, connection_id)
+);
+
+CREATE TABLE IF NOT EXISTS groups (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT,
+    category TEXT,
+    privacy TEXT CHECK(privacy IN ('public', 'private')) DEFAULT 'public',
+    created_by INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    member_count INTEGER DEFAULT 0,
+    FOREIGN KEY (created_by) REFERENCES users (id)
+);
+
+CREATE TABLE IF NOT EXISTS group_members (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    group_id INTEGER,
+    user_id INTEGER,
+    role TEXT CHECK(role IN ('admin', 'moderator', 'member')) DEFAULT 'member',
+    joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (group_id) REFERENCES groups (id),
+    FOREIGN KEY (user_id) REFERENCES users (id),
+    UNIQUE(group_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    content TEXT NOT NULL,
+    type TEXT CHECK(type IN ('confession', 'announcement', 'normal')) DEFAULT 'normal',
+    is_anonymous BOOLEAN DEFAULT 0,
+    group_id INTEGER,
+    likes INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id),
+    FOREIGN KEY (group_id) REFERENCES groups (id)
+);
+
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT,
+    event_type TEXT CHECK(event_type IN ('campus', 'club', 'alumni', 'charity')),
+    organizer_id INTEGER,
+    start_time TIMESTAMP,
+    end_time TIMESTAMP,
+    location TEXT,
+    max_participants INTEGER,
+    current_participants INTEGER DEFAULT 0,
+    is_approved BOOLEAN DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (organizer_id) REFERENCES users (id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
+CREATE INDEX IF NOT EXISTS idx_posts_type ON posts(type);
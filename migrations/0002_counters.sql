@@ -0,0 +1,137 @@
+-- Aggregate counters maintained by triggers, so dashboards never need
+-- COUNT(*) over the base tables
+
+CREATE TABLE IF NOT EXISTS global_counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS user_counters (
+    user_id INTEGER PRIMARY KEY,
+    connections INTEGER NOT NULL DEFAULT 0,
+    groups INTEGER NOT NULL DEFAULT 0,
+    posts INTEGER NOT NULL DEFAULT 0,
+    events INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_users_counters_insert
+AFTER INSERT ON users BEGIN
+    INSERT OR IGNORE INTO user_counters (user_id) VALUES (NEW.id);
+    UPDATE global_counters SET value = value + 1 WHERE name = 'users';
+    UPDATE global_counters SET value = value + 1
+        WHERE name = 'pending_approvals' AND COALESCE(NEW.is_verified, 0) = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_counters_delete
+AFTER DELETE ON users BEGIN
+    DELETE FROM user_counters WHERE user_id = OLD.id;
+    UPDATE global_counters SET value = value - 1 WHERE name = 'users';
+    UPDATE global_counters SET value = value - 1
+        WHERE name = 'pending_approvals' AND COALESCE(OLD.is_verified, 0) = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_counters_verify
+AFTER UPDATE OF is_verified ON users BEGIN
+    UPDATE global_counters
+        SET value = value + (COALESCE(NEW.is_verified, 0) = 0) - (COALESCE(OLD.is_verified, 0) = 0)
+        WHERE name = 'pending_approvals';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_connections_counters_insert
+AFTER INSERT ON connections WHEN NEW.status = 'accepted' BEGIN
+    UPDATE user_counters SET connections = connections + 1
+        WHERE user_id IN (NEW.user_id, NEW.connection_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_connections_counters_delete
+AFTER DELETE ON connections WHEN OLD.status = 'accepted' BEGIN
+    UPDATE user_counters SET connections = connections - 1
+        WHERE user_id IN (OLD.user_id, OLD.connection_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_connections_counters_status
+AFTER UPDATE OF status ON connections
+WHEN (NEW.status = 'accepted') != (OLD.status = 'accepted') BEGIN
+    UPDATE user_counters
+        SET connections = connections + (CASE WHEN NEW.status = 'accepted' THEN 1 ELSE -1 END)
+        WHERE user_id IN (NEW.user_id, NEW.connection_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_group_members_counters_insert
+AFTER INSERT ON group_members BEGIN
+    UPDATE user_counters SET groups = groups + 1 WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_group_members_counters_delete
+AFTER DELETE ON group_members BEGIN
+    UPDATE user_counters SET groups = groups - 1 WHERE user_id = OLD.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_groups_counters_insert
+AFTER INSERT ON groups BEGIN
+    UPDATE global_counters SET value = value + 1 WHERE name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_groups_counters_delete
+AFTER DELETE ON groups BEGIN
+    UPDATE global_counters SET value = value - 1 WHERE name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_posts_counters_insert
+AFTER INSERT ON posts BEGIN
+    UPDATE global_counters SET value = value + 1 WHERE name = 'posts';
+    UPDATE user_counters SET posts = posts + 1 WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_posts_counters_delete
+AFTER DELETE ON posts BEGIN
+    UPDATE global_counters SET value = value - 1 WHERE name = 'posts';
+    UPDATE user_counters SET posts = posts - 1 WHERE user_id = OLD.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_counters_insert
+AFTER INSERT ON events BEGIN
+    UPDATE global_counters SET value = value + 1 WHERE name = 'events';
+    UPDATE global_counters SET value = value + 1
+        WHERE name = 'approved_events' AND COALESCE(NEW.is_approved, 0) = 1;
+    UPDATE user_counters SET events = events + 1 WHERE user_id = NEW.organizer_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_counters_delete
+AFTER DELETE ON events BEGIN
+    UPDATE global_counters SET value = value - 1 WHERE name = 'events';
+    UPDATE global_counters SET value = value - 1
+        WHERE name = 'approved_events' AND COALESCE(OLD.is_approved, 0) = 1;
+    UPDATE user_counters SET events = events - 1 WHERE user_id = OLD.organizer_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_counters_approve
+AFTER UPDATE OF is_approved ON events BEGIN
+    UPDATE global_counters
+        SET value = value + (COALESCE(NEW.is_approved, 0) = 1) - (COALESCE(OLD.is_approved, 0) = 1)
+        WHERE name = 'approved_events';
+END;
+
+-- Backfill from the base tables
+INSERT OR REPLACE INTO global_counters (name, value)
+SELECT 'users', COUNT(*) FROM users
+UNION ALL SELECT 'pending_approvals', COUNT(*) FROM users WHERE COALESCE(is_verified, 0) = 0
+UNION ALL SELECT 'groups', COUNT(*) FROM groups
+UNION ALL SELECT 'posts', COUNT(*) FROM posts
+UNION ALL SELECT 'events', COUNT(*) FROM events
+UNION ALL SELECT 'approved_events', COUNT(*) FROM events WHERE COALESCE(is_approved, 0) = 1;
+
+DELETE FROM user_counters;
+
+WITH accepted AS (
+    SELECT user_id AS uid FROM connections WHERE status = 'accepted'
+    UNION ALL SELECT connection_id FROM connections WHERE status = 'accepted'
+)
+INSERT INTO user_counters (user_id, connections, groups, posts, events)
+SELECT u.id, COALESCE(c.n, 0), COALESCE(g.n, 0), COALESCE(p.n, 0), COALESCE(e.n, 0)
+FROM users u
+LEFT JOIN (SELECT uid, COUNT(*) AS n FROM accepted GROUP BY uid) c ON c.uid = u.id
+LEFT JOIN (SELECT user_id, COUNT(*) AS n FROM group_members GROUP BY user_id) g ON g.user_id = u.id
+LEFT JOIN (SELECT user_id, COUNT(*) AS n FROM posts GROUP BY user_id) p ON p.user_id = u.id
+LEFT JOIN (SELECT organizer_id, COUNT(*) AS n FROM events GROUP BY organizer_id) e ON e.organizer_id = u.id;
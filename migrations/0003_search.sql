@@ -0,0 +1,119 @@
+-- FTS5 indexes over users (+ profiles), groups and posts. users_fts keeps its
+-- own copy of the text because it spans two tables; groups_fts and posts_fts
+-- are external-content tables over their base tables. All three are kept in
+-- sync by the triggers below.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+    name, department, company, position, bio, skills, interests,
+    prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS groups_fts USING fts5(
+    name, description, content='groups', content_rowid='id',
+    prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+    content, content='posts', content_rowid='id',
+    prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_users_fts_insert
+AFTER INSERT ON users BEGIN
+    INSERT INTO users_fts (rowid, name, department, company, position, bio, skills, interests)
+    SELECT u.id, u.first_name || ' ' || u.last_name, u.department, u.current_company, u.position,
+           p.bio, p.skills, p.interests
+    FROM users u LEFT JOIN profiles p ON p.user_id = u.id
+    WHERE u.id IN (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_fts_update
+AFTER UPDATE OF first_name, last_name, department, current_company, position ON users BEGIN
+    DELETE FROM users_fts WHERE rowid = NEW.id;
+    INSERT INTO users_fts (rowid, name, department, company, position, bio, skills, interests)
+    SELECT u.id, u.first_name || ' ' || u.last_name, u.department, u.current_company, u.position,
+           p.bio, p.skills, p.interests
+    FROM users u LEFT JOIN profiles p ON p.user_id = u.id
+    WHERE u.id IN (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_fts_delete
+AFTER DELETE ON users BEGIN
+    DELETE FROM users_fts WHERE rowid = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_profiles_fts_insert
+AFTER INSERT ON profiles BEGIN
+    DELETE FROM users_fts WHERE rowid = NEW.user_id;
+    INSERT INTO users_fts (rowid, name, department, company, position, bio, skills, interests)
+    SELECT u.id, u.first_name || ' ' || u.last_name, u.department, u.current_company, u.position,
+           p.bio, p.skills, p.interests
+    FROM users u LEFT JOIN profiles p ON p.user_id = u.id
+    WHERE u.id IN (NEW.user_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_profiles_fts_update
+AFTER UPDATE ON profiles BEGIN
+    DELETE FROM users_fts WHERE rowid IN (OLD.user_id, NEW.user_id);
+    INSERT INTO users_fts (rowid, name, department, company, position, bio, skills, interests)
+    SELECT u.id, u.first_name || ' ' || u.last_name, u.department, u.current_company, u.position,
+           p.bio, p.skills, p.interests
+    FROM users u LEFT JOIN profiles p ON p.user_id = u.id
+    WHERE u.id IN (OLD.user_id, NEW.user_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_profiles_fts_delete
+AFTER DELETE ON profiles BEGIN
+    DELETE FROM users_fts WHERE rowid = OLD.user_id;
+    INSERT INTO users_fts (rowid, name, department, company, position, bio, skills, interests)
+    SELECT u.id, u.first_name || ' ' || u.last_name, u.department, u.current_company, u.position,
+           p.bio, p.skills, p.interests
+    FROM users u LEFT JOIN profiles p ON p.user_id = u.id
+    WHERE u.id IN (OLD.user_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_groups_fts_insert
+AFTER INSERT ON groups BEGIN
+    INSERT INTO groups_fts (rowid, name, description) VALUES (NEW.id, NEW.name, NEW.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_groups_fts_update
+AFTER UPDATE OF name, description ON groups BEGIN
+    INSERT INTO groups_fts (groups_fts, rowid, name, description)
+        VALUES ('delete', OLD.id, OLD.name, OLD.description);
+    INSERT INTO groups_fts (rowid, name, description) VALUES (NEW.id, NEW.name, NEW.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_groups_fts_delete
+AFTER DELETE ON groups BEGIN
+    INSERT INTO groups_fts (groups_fts, rowid, name, description)
+        VALUES ('delete', OLD.id, OLD.name, OLD.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_posts_fts_insert
+AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts (rowid, content) VALUES (NEW.id, NEW.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_posts_fts_update
+AFTER UPDATE OF content ON posts BEGIN
+    INSERT INTO posts_fts (posts_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+    INSERT INTO posts_fts (rowid, content) VALUES (NEW.id, NEW.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_posts_fts_delete
+AFTER DELETE ON posts BEGIN
+    INSERT INTO posts_fts (posts_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+END;
+
+-- Index existing rows
+DELETE FROM users_fts;
+
+INSERT INTO users_fts (rowid, name, department, company, position, bio, skills, interests)
+SELECT u.id, u.first_name || ' ' || u.last_name, u.department, u.current_company, u.position,
+       p.bio, p.skills, p.interests
+FROM users u LEFT JOIN profiles p ON p.user_id = u.id;
+
+INSERT INTO groups_fts (groups_fts) VALUES ('rebuild');
+
+INSERT INTO posts_fts (posts_fts) VALUES ('rebuild');
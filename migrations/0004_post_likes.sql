@@ -0,0 +1,12 @@
+-- Keyset pagination of feeds by (created_at, id) within a post type
+CREATE INDEX IF NOT EXISTS idx_posts_type_created ON posts(type, created_at DESC, id DESC);
+
+-- Post likes, one row per user so a post can't be liked twice
+CREATE TABLE IF NOT EXISTS post_likes (
+    post_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (post_id, user_id),
+    FOREIGN KEY (post_id) REFERENCES posts (id),
+    FOREIGN KEY (user_id) REFERENCES users (id)
+) WITHOUT ROWID;
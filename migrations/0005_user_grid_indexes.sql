@@ -0,0 +1,4 @@
+-- Admin user grid filters and default sort
+CREATE INDEX IF NOT EXISTS idx_users_department ON users(department);
+CREATE INDEX IF NOT EXISTS idx_users_batch_year ON users(batch_year);
+CREATE INDEX IF NOT EXISTS idx_users_created_at ON users(created_at);
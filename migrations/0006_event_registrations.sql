@@ -0,0 +1,15 @@
+-- Event registrations; waitlisted rows are promoted in id order
+CREATE TABLE IF NOT EXISTS event_registrations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    status TEXT CHECK(status IN ('registered', 'waitlisted', 'cancelled')) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (event_id) REFERENCES events (id),
+    FOREIGN KEY (user_id) REFERENCES users (id),
+    UNIQUE(event_id, user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_event_registrations_queue ON event_registrations(event_id, status, id);
+CREATE INDEX IF NOT EXISTS idx_event_registrations_user ON event_registrations(user_id, status);
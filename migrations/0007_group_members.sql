@@ -0,0 +1,18 @@
+-- Group membership: "groups for user" lookups and suggestion ranking;
+-- UNIQUE(group_id, user_id) already serves "members of group"
+CREATE INDEX IF NOT EXISTS idx_group_members_user ON group_members(user_id, group_id);
+CREATE INDEX IF NOT EXISTS idx_groups_privacy_members ON groups(privacy, member_count DESC);
+
+-- groups.member_count follows group_members inside the same transaction as
+-- every join or leave
+CREATE TRIGGER IF NOT EXISTS trg_group_members_member_count_insert
+AFTER INSERT ON group_members BEGIN
+    UPDATE groups SET member_count = member_count + 1 WHERE id = NEW.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_group_members_member_count_delete
+AFTER DELETE ON group_members BEGIN
+    UPDATE groups SET member_count = member_count - 1 WHERE id = OLD.group_id;
+END;
+
+UPDATE groups SET member_count = (SELECT COUNT(*) FROM group_members WHERE group_id = groups.id);
@@ -0,0 +1,12 @@
+-- Indexes for the remaining hot lookups; group_members(user_id) is already
+-- covered by idx_group_members_user. Each builds under the write lock only,
+-- so in WAL mode readers keep going while it runs.
+
+-- Range scans over posts of every type by time (analytics, archiving)
+CREATE INDEX IF NOT EXISTS idx_posts_created_at ON posts(created_at);
+
+-- Incoming requests: WHERE connection_id = ? AND status = 'pending'
+CREATE INDEX IF NOT EXISTS idx_connections_target_status ON connections(connection_id, status);
+
+-- Upcoming events in start order
+CREATE INDEX IF NOT EXISTS idx_events_start_time ON events(start_time);
@@ -0,0 +1,62 @@
+-- Direct messages. A conversation has one participant row per user; the
+-- row carries that user's read position, unread count and the newest
+-- message id, so the inbox and "anything new?" polls are index range scans.
+CREATE TABLE IF NOT EXISTS conversations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    -- "<lower user id>:<higher user id>" for one-to-one conversations
+    pair_key TEXT UNIQUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS conversation_participants (
+    conversation_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    last_message_id INTEGER NOT NULL DEFAULT 0,
+    last_read_id INTEGER NOT NULL DEFAULT 0,
+    unread_count INTEGER NOT NULL DEFAULT 0,
+    joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (conversation_id, user_id),
+    FOREIGN KEY (conversation_id) REFERENCES conversations (id),
+    FOREIGN KEY (user_id) REFERENCES users (id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conversation_id INTEGER NOT NULL,
+    sender_id INTEGER,
+    body TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (conversation_id) REFERENCES conversations (id),
+    FOREIGN KEY (sender_id) REFERENCES users (id)
+);
+
+-- Thread reads and "since last id" polls
+CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation_id, id);
+-- Inbox, newest conversation first
+CREATE INDEX IF NOT EXISTS idx_conversation_participants_inbox
+    ON conversation_participants(user_id, last_message_id DESC);
+
+ALTER TABLE user_counters ADD COLUMN unread_messages INTEGER NOT NULL DEFAULT 0;
+
+-- Each message bumps every participant's newest id and everyone but the
+-- sender's unread count, in the sending transaction
+CREATE TRIGGER IF NOT EXISTS trg_messages_insert
+AFTER INSERT ON messages BEGIN
+    UPDATE conversation_participants
+        SET last_message_id = NEW.id,
+            unread_count = unread_count + (user_id IS NOT NEW.sender_id)
+        WHERE conversation_id = NEW.conversation_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_conversation_participants_unread_update
+AFTER UPDATE OF unread_count ON conversation_participants
+WHEN NEW.unread_count != OLD.unread_count BEGIN
+    UPDATE user_counters SET unread_messages = unread_messages + NEW.unread_count - OLD.unread_count
+        WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_conversation_participants_unread_delete
+AFTER DELETE ON conversation_participants WHEN OLD.unread_count != 0 BEGIN
+    UPDATE user_counters SET unread_messages = unread_messages - OLD.unread_count
+        WHERE user_id = OLD.user_id;
+END;
@@ -0,0 +1,27 @@
+-- Materialised home feed. Posts in groups of up to 500 members are copied
+-- into each member's timeline when written (fan-out on write); posts in
+-- larger groups and campus-wide announcements are merged in when the feed
+-- is read. The limits mirror TIMELINE_FANOUT_LIMIT and TIMELINE_BACKFILL in
+-- database.py.
+CREATE TABLE IF NOT EXISTS timeline (
+    user_id INTEGER NOT NULL,
+    post_id INTEGER NOT NULL,
+    group_id INTEGER,
+    PRIMARY KEY (user_id, post_id),
+    FOREIGN KEY (user_id) REFERENCES users (id),
+    FOREIGN KEY (post_id) REFERENCES posts (id)
+) WITHOUT ROWID;
+
+-- Read-time merge of a large group's newest posts (announcements already
+-- range-scan idx_posts_type, which is (type, rowid))
+CREATE INDEX IF NOT EXISTS idx_posts_group ON posts(group_id, id) WHERE group_id IS NOT NULL;
+
+-- Backfill: the newest 50 posts of every small group for each member
+INSERT OR IGNORE INTO timeline (user_id, post_id, group_id)
+SELECT gm.user_id, p.id, p.group_id
+FROM group_members gm
+JOIN groups g ON g.id = gm.group_id AND g.member_count <= 500
+JOIN (
+    SELECT id, group_id, ROW_NUMBER() OVER (PARTITION BY group_id ORDER BY id DESC) AS recency
+    FROM posts WHERE group_id IS NOT NULL AND type != 'confession'
+) p ON p.group_id = gm.group_id AND p.recency <= 50;
@@ -0,0 +1,43 @@
+-- Post moderation. A post is 'visible' until reported ('flagged', still
+-- shown) or held ('held', hidden until reviewed) by enough reports or by the
+-- pre-screen; a moderator then approves or removes it. Report counts and
+-- review priority are kept on the post by trigger, so the review queue is a
+-- single scan of a partial index over the posts awaiting review.
+ALTER TABLE posts ADD COLUMN status TEXT NOT NULL DEFAULT 'visible'
+    CHECK(status IN ('visible', 'flagged', 'held', 'approved', 'removed'));
+ALTER TABLE posts ADD COLUMN report_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE posts ADD COLUMN review_priority INTEGER NOT NULL DEFAULT 0;
+-- Why the post was held, e.g. the pre-screen rule that matched
+ALTER TABLE posts ADD COLUMN hold_reason TEXT;
+
+CREATE TABLE IF NOT EXISTS post_reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    post_id INTEGER NOT NULL,
+    reporter_id INTEGER,
+    reason TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (post_id) REFERENCES posts (id),
+    FOREIGN KEY (reporter_id) REFERENCES users (id),
+    UNIQUE(post_id, reporter_id)
+);
+
+-- Review queue, highest priority first
+CREATE INDEX IF NOT EXISTS idx_posts_review_queue ON posts(review_priority DESC, id)
+    WHERE status IN ('flagged', 'held');
+
+-- Each report raises the post's count and priority; the third hides it until
+-- reviewed. Approved and removed posts keep the moderator's decision.
+CREATE TRIGGER IF NOT EXISTS trg_post_reports_insert
+AFTER INSERT ON post_reports BEGIN
+    UPDATE posts
+        SET report_count = report_count + 1,
+            review_priority = review_priority + 1,
+            status = CASE
+                WHEN status IN ('approved', 'removed', 'held') THEN status
+                WHEN report_count + 1 >= 3 THEN 'held'
+                ELSE 'flagged' END,
+            hold_reason = CASE
+                WHEN status IN ('visible', 'flagged') AND report_count + 1 >= 3 THEN 'reports'
+                ELSE hold_reason END
+        WHERE id = NEW.post_id;
+END;
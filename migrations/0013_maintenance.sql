@@ -0,0 +1,9 @@
+-- Periodic maintenance (scheduler.py). Events are archived some time after
+-- they end; archived events keep their registrations but no waitlist.
+ALTER TABLE events ADD COLUMN archived_at TIMESTAMP;
+
+-- Archiving candidates, without rescanning everything already archived
+CREATE INDEX IF NOT EXISTS idx_events_unarchived ON events(start_time) WHERE archived_at IS NULL;
+
+-- Stale connection requests, oldest first
+CREATE INDEX IF NOT EXISTS idx_connections_pending ON connections(requested_at) WHERE status = 'pending';
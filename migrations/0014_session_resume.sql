@@ -0,0 +1,11 @@
+-- Single-use, short-lived tokens that go in the URL in place of the session
+-- token, so a reload can resume the session; see SessionStore.resume_token
+CREATE TABLE IF NOT EXISTS session_resume (
+    id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    expires_at INTEGER NOT NULL,
+    FOREIGN KEY (session_id) REFERENCES sessions (id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_session_resume_session ON session_resume(session_id);
+CREATE INDEX IF NOT EXISTS idx_session_resume_expires ON session_resume(expires_at);
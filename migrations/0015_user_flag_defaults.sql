@@ -0,0 +1,4 @@
+-- Bulk imports used to write NULL flags for roster rows without them;
+-- restore the column defaults so those users can sign in
+UPDATE users SET is_active = 1 WHERE is_active IS NULL;
+UPDATE users SET is_verified = 0 WHERE is_verified IS NULL;
@@ -0,0 +1,3 @@
+-- People search ranks every match and leaves out blocked users before
+-- taking the top rows; they are few, so the lookup reads only them
+CREATE INDEX IF NOT EXISTS idx_users_inactive ON users(id) WHERE is_active = 0;
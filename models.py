@@ -0,0 +1,133 @@
+"""Compact row records for users, profiles, posts, events and groups.
+
+A record is an immutable tuple subclass, like a namedtuple: it costs one
+tuple per row instead of a dict, and is built straight from the row the
+driver returns. It reads the same way the dicts it replaces did
+(``user['email']``, ``user.get('position')``, ``dict(user)``) and also by
+attribute (``user.email``).
+
+Every entity class gets one subclass per distinct column list, and the
+subclass for a statement is looked up by its SQL text, so the cursor
+description is only read the first time a statement runs.
+"""
+import functools
+from operator import itemgetter
+
+# Statements seen per process; dynamic SQL (filters, IN lists) keeps this
+# bounded in practice, and it is simply cleared if it ever grows past this
+STATEMENT_CACHE_SIZE = 1024
+
+
+class Record(tuple):
+    """Immutable row with dict-style access by column name."""
+    __slots__ = ()
+    _fields = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if key.__class__ is str:
+            try:
+                return tuple.__getitem__(self, self._index[key])
+            except KeyError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def keys(self):
+        return self._fields
+
+    def values(self):
+        return tuple(self)
+
+    def items(self):
+        return zip(self._fields, self)
+
+    def _asdict(self):
+        return dict(zip(self._fields, self))
+
+    def _replace(self, **changes):
+        return tuple.__new__(type(self), [changes.get(name, value) for name, value in self.items()])
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{name}={value!r}' for name, value in self.items())})"
+
+    def __reduce__(self):
+        return _rebuild, (type(self).__mro__[1], self._fields, tuple(self))
+
+
+class User(Record):
+    __slots__ = ()
+
+
+class Profile(Record):
+    __slots__ = ()
+
+
+class Post(Record):
+    __slots__ = ()
+
+
+class Event(Record):
+    __slots__ = ()
+
+
+class Group(Record):
+    __slots__ = ()
+
+
+@functools.lru_cache(maxsize=None)
+def record_class(model, fields):
+    """The subclass of ``model`` for rows with columns ``fields``."""
+    namespace = {'__slots__': (), '_fields': fields, '_index': {name: i for i, name in enumerate(fields)}}
+    for i, name in enumerate(fields):
+        # Columns that shadow tuple methods (count, index) stay reachable by key
+        if not hasattr(model, name):
+            namespace[name] = property(itemgetter(i))
+    return type(model.__name__, (model,), namespace)
+
+
+def _rebuild(model, fields, values):
+    return tuple.__new__(record_class(model, fields), values)
+
+
+_statements = {}
+
+
+def _builder(model, sql, cursor):
+    key = (model, sql)
+    build = _statements.get(key)
+    if build is None:
+        if len(_statements) >= STATEMENT_CACHE_SIZE:
+            _statements.clear()
+        fields = tuple(column[0] for column in cursor.description)
+        build = _statements[key] = functools.partial(tuple.__new__, record_class(model, fields))
+    return build
+
+
+def fetch_all(conn, model, sql, params=()):
+    """Run ``sql`` and return its rows as ``model`` records."""
+    cursor = conn.execute(sql, params)
+    return list(map(_builder(model, sql, cursor), cursor.fetchall()))
+
+
+def fetch_one(conn, model, sql, params=()):
+    """Run ``sql`` and return its first row as a ``model`` record, or None."""
+    cursor = conn.execute(sql, params)
+    row = cursor.fetchone()
+    return None if row is None else _builder(model, sql, cursor)(row)
+
+
+def fetch_columns(conn, sql, params=()):
+    """Run ``sql`` and return ``{column: list of values}``, ready for ``pandas.DataFrame``."""
+    cursor = conn.execute(sql, params)
+    rows = cursor.fetchall()
+    names = [column[0] for column in cursor.description]
+    if not rows:
+        return {name: [] for name in names}
+    return dict(zip(names, map(list, zip(*rows))))
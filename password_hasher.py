@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import bcrypt
+
+DEFAULT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _verify(password, hashed):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue stays full for longer than the submit timeout."""
+
+
+class PasswordHasher:
+    """Bounded process pool for bcrypt so login/signup bursts don't hold script threads.
+
+    At most ``max_pending`` jobs may be queued or running; further submissions
+    wait up to ``submit_timeout`` seconds for a slot and then raise HasherBusy.
+    ``workers=0`` hashes inline on the calling thread.
+    """
+
+    def __init__(self, workers=None, rounds=None, max_pending=None, submit_timeout=10.0):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.rounds = rounds or DEFAULT_ROUNDS
+        self.max_pending = max_pending or max(self.workers, 1) * 4
+        self.submit_timeout = submit_timeout
+
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn rather than fork: the Streamlit server is multi-threaded
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _submit(self, fn, *args):
+        if not self.workers:
+            future = Future()
+            future.set_result(fn(*args))
+            with self._lock:
+                self._completed += 1
+            return future
+
+        if not self._slots.acquire(timeout=self.submit_timeout):
+            with self._lock:
+                self._rejected += 1
+            raise HasherBusy(f'{self.max_pending} password jobs already pending')
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+            if future is not None:
+                self._completed += 1
+        self._slots.release()
+
+    def submit_hash(self, password):
+        return self._submit(_hash, password, self.rounds)
+
+    def submit_verify(self, password, hashed):
+        return self._submit(_verify, password, hashed)
+
+    def hash(self, password):
+        return self.submit_hash(password).result()
+
+    def verify(self, password, hashed):
+        return self.submit_verify(password, hashed).result()
+
+    @property
+    def queue_depth(self):
+        return self._pending
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'rounds': self.rounds,
+                'queue_depth': self._pending,
+                'max_pending': self.max_pending,
+                'completed': self._completed,
+                'rejected': self._rejected,
+            }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,97 @@
+import atexit
+import re
+import threading
+
+# Rule name -> regular expression. Rules are matched only at the start of a
+# word and against the lowercased post, which lets the combined pattern skip
+# most positions cheaply; admins can replace the set with the
+# 'prescreen_rules' setting, which takes effect on the next pass.
+DEFAULT_RULES = {
+    'phone number': r'(?:91[\s-]?)?[6-9]\d{4}[\s-]?\d{5}\b',
+    'email address': r'@[\w-]+\.[a-z]{2,}\b',
+    'self-harm': r'(?:kill myself|end my life|want to die|suicid\w*|self[\s-]?harm)\b',
+    'harassment': r'(?:slut|whore|retard\w*|kill you)\b',
+    'doxxing': r'(?:room (?:no\.?|number) ?\d+|lives? in (?:room|flat|hostel))\b',
+}
+
+
+def compile_rules(rules):
+    """Compile every rule into one alternation, so a post is scanned once.
+
+    Each rule becomes a named group; ``match.lastgroup`` says which matched.
+    """
+    names = list(rules)
+    branches = '|'.join(f'(?P<r{i}>{rules[name]})' for i, name in enumerate(names))
+    return re.compile(rf'\b(?:{branches})'), {f'r{i}': name for i, name in enumerate(names)}
+
+
+class PreScreener:
+    """Background pre-screen of new posts against the moderation rules.
+
+    Every ``interval_s`` seconds, posts written since the last round are read
+    in batches of ``batch`` and any that match a rule are held for review,
+    together with the new high-water mark, in one transaction per batch.
+    """
+
+    def __init__(self, db, rules=None, interval_s=2.0, batch=1000):
+        self.db = db
+        self.interval = interval_s
+        self.batch = batch
+        # Rules given here are fixed; otherwise the setting is re-read every pass
+        self._fixed_rules = rules is not None
+        self.set_rules(rules or db.get_setting('prescreen_rules', DEFAULT_RULES))
+        self.screened = 0
+        self.held = 0
+
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='prescreen', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def set_rules(self, rules):
+        self.rules = dict(rules)
+        self._pattern, self._names = compile_rules(self.rules)
+
+    def check(self, content):
+        """Name of the first rule ``content`` matches, or None."""
+        match = self._pattern.search((content or '').lower())
+        return self._names[match.lastgroup] if match else None
+
+    def screen(self):
+        """Screen every post not yet screened; returns the number held."""
+        with self._lock:
+            if not self._fixed_rules:
+                rules = self.db.get_setting('prescreen_rules', DEFAULT_RULES)
+                if rules != self.rules:
+                    self.set_rules(rules)
+            held = 0
+            high_water = self.db.get_setting('prescreen_high_water', 0)
+            while True:
+                posts = self.db.get_posts_to_prescreen(high_water, self.batch)
+                if not posts:
+                    return held
+                search, names = self._pattern.search, self._names
+                holds = []
+                for post_id, content in posts:
+                    match = search((content or '').lower())
+                    if match:
+                        holds.append((post_id, names[match.lastgroup]))
+                high_water = posts[-1][0]
+                batch_held = self.db.hold_posts(holds, high_water)
+                held += batch_held
+                self.held += batch_held
+                self.screened += len(posts)
+                if len(posts) < self.batch:
+                    return held
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.screen()
+            except Exception:
+                # Unscreened posts stay past the high-water mark for next time
+                pass
+
+    def close(self):
+        self._stopped.set()
@@ -0,0 +1,152 @@
+"""Periodic database maintenance.
+
+    python scheduler.py --db mes_connect.db            # run jobs as they fall due
+    python scheduler.py --once [--job optimize ...]     # run jobs now and exit
+
+The app runs the same scheduler in-process (``get_scheduler`` in app.py);
+running it standalone as well is harmless, since every job is idempotent
+and when each job last ran is shared through the ``maintenance_jobs``
+setting. Jobs work in short write transactions, so user-facing writes
+only ever wait for one batch.
+"""
+import argparse
+import atexit
+import os
+import sys
+import threading
+import time
+
+# Job name -> seconds between runs
+DEFAULT_INTERVALS = {
+    'reconcile_counters': 3600,
+    'purge_sessions': 3600,
+    'optimize': 6 * 3600,
+    'reclaim_free_pages': 24 * 3600,
+    'purge_pending_connections': 24 * 3600,
+    'archive_events': 24 * 3600,
+}
+
+
+class JobScheduler:
+    """Runs maintenance jobs on their intervals, with per-job timings.
+
+    Every ``tick_s`` seconds the jobs that are due run one after another on
+    a background thread. A failing job is recorded and retried at its next
+    interval. With ``background=False`` no thread is started and the caller
+    drives ``run_pending()``.
+    """
+
+    def __init__(self, db, intervals=None, tick_s=60, background=True):
+        self.db = db
+        self.tick = tick_s
+        self.intervals = dict(DEFAULT_INTERVALS, **(intervals or {}))
+        self.jobs = {
+            'reconcile_counters': db.reconcile_counters,
+            'purge_sessions': self._purge_sessions,
+            'optimize': db.optimize,
+            'reclaim_free_pages': db.reclaim_free_pages,
+            'purge_pending_connections': db.purge_pending_connections,
+            'archive_events': db.archive_events,
+        }
+        self.metrics = db.get_setting('maintenance_jobs', {})
+        self._sessions = None
+
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._run, name='maintenance', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def add(self, name, fn, interval_s):
+        """Schedule ``fn()`` every ``interval_s`` seconds alongside the built-in jobs."""
+        self.jobs[name] = fn
+        self.intervals[name] = interval_s
+
+    def _purge_sessions(self):
+        if self._sessions is None:
+            from sessions import SessionStore
+            self._sessions = SessionStore(self.db)
+        return self._sessions.purge_expired()
+
+    def due(self, now=None):
+        now = time.time() if now is None else now
+        return [name for name in self.jobs
+                if now - self.metrics.get(name, {}).get('last_run', 0) >= self.intervals[name]]
+
+    def run_pending(self):
+        """Run every job that is due; returns their names."""
+        # Another process may have run some since
+        self.metrics = self.db.get_setting('maintenance_jobs', {})
+        names = self.due()
+        for name in names:
+            self.run(name)
+        return names
+
+    def run(self, name):
+        """Run one job now and record its timing; returns its result, or None if it failed."""
+        with self._lock:
+            stats = self.metrics.setdefault(name, {'runs': 0, 'failures': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            started = time.perf_counter()
+            result, error = None, None
+            try:
+                result = self.jobs[name]()
+            except Exception as e:
+                error = f'{type(e).__name__}: {e}'
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            stats.update(runs=stats['runs'] + 1, failures=stats['failures'] + (error is not None),
+                         total_ms=stats['total_ms'] + elapsed_ms, max_ms=max(stats['max_ms'], elapsed_ms),
+                         last_ms=elapsed_ms, last_run=time.time(), last_result=result, last_error=error)
+            self.db.set_settings(maintenance_jobs=self.metrics)
+            return result
+
+    def _run(self):
+        while not self._stopped.wait(self.tick):
+            try:
+                self.run_pending()
+            except Exception:
+                # Due jobs are picked up again on the next tick
+                pass
+
+    def close(self):
+        self._stopped.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run periodic database maintenance.')
+    parser.add_argument('--db', default=os.environ.get('DATABASE_URL', 'mes_connect.db'))
+    parser.add_argument('--once', action='store_true', help='run the jobs now and exit')
+    parser.add_argument('--job', action='append', choices=list(DEFAULT_INTERVALS),
+                        help='job to run with --once (default: all); may be repeated')
+    parser.add_argument('--tick', type=float, default=60, help='seconds between checks for due jobs')
+    args = parser.parse_args(argv)
+
+    from database import Database
+    db = Database(args.db, query_cache_size=0, instrument=False)
+    scheduler = JobScheduler(db, tick_s=args.tick, background=False)
+
+    def report(name):
+        stats = scheduler.metrics[name]
+        print(f"{name:<26} {stats['last_ms']:>9.1f} ms  {stats['last_error'] or stats['last_result']}", flush=True)
+        return stats['last_error'] is None
+
+    try:
+        if args.once:
+            results = []
+            for name in args.job or list(scheduler.jobs):
+                scheduler.run(name)
+                results.append(report(name))
+            return 0 if all(results) else 1
+        while True:
+            for name in scheduler.run_pending():
+                report(name)
+            time.sleep(args.tick)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import re
+
+# Ranked queries over the FTS5 indexes created by migrations/0003_search.sql:
+# users_fts (users + profiles), groups_fts and posts_fts, all kept in sync
+# with their base tables by triggers.
+
+# Column weights for bm25(); name and skills matter most when finding people
+USERS_RANK = 'bm25(users_fts, 10.0, 3.0, 3.0, 2.0, 1.0, 4.0, 2.0)'
+GROUPS_RANK = 'bm25(groups_fts, 5.0, 1.0)'
+POSTS_RANK = 'bm25(posts_fts)'
+
+# bm25 costs a docsize lookup per matching row, so a term shared by tens of
+# thousands of posts takes tens of milliseconds to rank in full. Post search
+# only scores the newest RANK_WINDOW matches, which keeps broad queries in the
+# low milliseconds; narrower queries are ranked exactly. People and groups are
+# fewer, and an older match is as good as a new one, so they are ranked in full;
+# only the top rows are joined back to their tables.
+RANK_WINDOW = 1000
+
+USER_SEARCH_SQL = f'''
+    SELECT u.id, u.first_name, u.last_name, u.role, u.department, u.batch_year,
+           u.current_company, u.position
+    FROM (SELECT rowid, {USERS_RANK} AS score FROM users_fts
+          WHERE users_fts MATCH ? AND rowid NOT IN (SELECT id FROM users WHERE is_active = 0)
+          ORDER BY score LIMIT ?) m
+    JOIN users u ON u.id = m.rowid
+    ORDER BY m.score
+'''
+
+GROUP_SEARCH_SQL = f'''
+    SELECT g.id, g.name, g.description, g.category, g.privacy, g.member_count
+    FROM (SELECT rowid, {GROUPS_RANK} AS score FROM groups_fts WHERE groups_fts MATCH ? ORDER BY score LIMIT ?) m
+    JOIN groups g ON g.id = m.rowid
+    ORDER BY m.score
+'''
+
+# Author columns are only joined for non-anonymous posts. Posts in a private
+# group are only found by its members (the viewer id is the second parameter).
+POST_SEARCH_SQL = f'''
+    SELECT p.id, p.content, p.type, p.is_anonymous, p.likes, p.created_at,
+           CASE WHEN p.is_anonymous THEN NULL ELSE p.user_id END AS user_id,
+           CASE WHEN p.is_anonymous THEN NULL ELSE u.first_name END AS first_name,
+           CASE WHEN p.is_anonymous THEN NULL ELSE u.last_name END AS last_name
+    FROM (SELECT rowid, {POSTS_RANK} AS score FROM posts_fts
+          WHERE posts_fts MATCH ? ORDER BY rowid DESC LIMIT {RANK_WINDOW}) m
+    JOIN posts p ON p.id = m.rowid AND p.status NOT IN ('held', 'removed')
+    LEFT JOIN groups g ON g.id = p.group_id
+    LEFT JOIN users u ON u.id = p.user_id AND NOT p.is_anonymous
+    WHERE p.group_id IS NULL OR g.privacy = 'public'
+       OR EXISTS (SELECT 1 FROM group_members gm WHERE gm.group_id = p.group_id AND gm.user_id = ?)
+    ORDER BY m.score LIMIT ?
+'''
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def match_expression(text, prefix=False):
+    """Turn free text into a safe FTS5 MATCH expression.
+
+    Every word is quoted so user input can't inject FTS syntax. In prefix
+    (typeahead) mode the last word matches as a prefix.
+    """
+    tokens = _TOKEN.findall(text or '')
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    if prefix:
+        terms[-1] += '*'
+    return ' '.join(terms)
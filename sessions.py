@@ -0,0 +1,142 @@
+import json
+import os
+import secrets
+import time
+
+from jose import JWTError, jwt
+
+ALGORITHM = 'HS256'
+DEFAULT_TIMEOUT_MINUTES = 30
+# Tokens stop verifying after a week however active the session is
+MAX_AGE_SECONDS = 7 * 24 * 3600
+# last_seen is only rewritten once it is this stale, so reruns don't each cost a write
+TOUCH_INTERVAL_SECONDS = 60
+# URL resume tokens expire this soon, and the app swaps in a new one this often
+RESUME_SECONDS = 10 * 60
+RESUME_REFRESH_SECONDS = 60
+
+
+class SessionStore:
+    """Server-side login sessions addressed by signed tokens.
+
+    A token is a JWT naming one row of the ``sessions`` table. Validating it
+    checks the signature, the row, the idle timeout from the
+    ``session_timeout_minutes`` setting and that the user is still active, so
+    returning users are let back in without another bcrypt verify. Revoking
+    the row ends the session even though the token itself is still signed.
+
+    The session token never goes in the URL. A reload resumes the session
+    through a resume token instead: an opaque id that expires after
+    ``RESUME_SECONDS`` and is redeemed once, server-side, for the session.
+    """
+
+    def __init__(self, db, secret=None):
+        self.db = db
+        self.secret = secret or os.environ.get('SESSION_SECRET') or self._stored_secret()
+
+    def _stored_secret(self):
+        # Generated once and kept in the database so tokens survive restarts
+        with self.db.pool.write() as conn:
+            conn.execute("INSERT OR IGNORE INTO app_settings (name, value) VALUES ('session_secret', ?)",
+                         (json.dumps(secrets.token_urlsafe(32)),))
+        return self.db.get_setting('session_secret')
+
+    def timeout_seconds(self):
+        return int(self.db.get_setting('session_timeout_minutes', DEFAULT_TIMEOUT_MINUTES)) * 60
+
+    def create(self, user_id):
+        """Open a session for ``user_id`` and return its token."""
+        session_id = secrets.token_urlsafe(16)
+        now = int(time.time())
+        with self.db.pool.write() as conn:
+            conn.execute('INSERT INTO sessions (id, user_id, created_at, last_seen) VALUES (?, ?, ?, ?)',
+                         (session_id, user_id, now, now))
+        return self._sign(session_id, user_id, now)
+
+    def _sign(self, session_id, user_id, created_at):
+        claims = {'sid': session_id, 'sub': str(user_id), 'iat': created_at, 'exp': created_at + MAX_AGE_SECONDS}
+        return jwt.encode(claims, self.secret, algorithm=ALGORITHM)
+
+    def resume_token(self, token, replaces=None):
+        """Issue a resume token for the session of ``token``, revoking ``replaces``."""
+        claims = self._claims(token)
+        if claims is None:
+            return None
+        resume_id = secrets.token_urlsafe(16)
+        with self.db.pool.write() as conn:
+            if replaces:
+                conn.execute('DELETE FROM session_resume WHERE id = ?', (replaces,))
+            conn.execute('INSERT INTO session_resume (id, session_id, expires_at) VALUES (?, ?, ?)',
+                         (resume_id, claims['sid'], int(time.time()) + RESUME_SECONDS))
+        return resume_id
+
+    def redeem(self, resume_id):
+        """Exchange a resume token for ``(user, session_token)``; None if used, expired or revoked."""
+        with self.db.pool.write() as conn:
+            row = conn.execute(
+                '''SELECT s.id, s.user_id, s.created_at FROM session_resume r JOIN sessions s ON s.id = r.session_id
+                WHERE r.id = ? AND r.expires_at >= ?''', (resume_id, int(time.time()))).fetchone()
+            conn.execute('DELETE FROM session_resume WHERE id = ?', (resume_id,))
+        if row is None:
+            return None
+        token = self._sign(*row)
+        user = self.validate(token)
+        return (user, token) if user is not None else None
+
+    def _claims(self, token, verify_exp=True):
+        try:
+            return jwt.decode(token, self.secret, algorithms=[ALGORITHM], options={'verify_exp': verify_exp})
+        except JWTError:
+            return None
+
+    def validate(self, token):
+        """Return the user record for a live session, or None if the token is no good."""
+        claims = self._claims(token)
+        if claims is None:
+            return None
+        session_id = claims.get('sid')
+        with self.db.pool.read() as conn:
+            row = conn.execute('SELECT user_id, last_seen FROM sessions WHERE id = ?', (session_id,)).fetchone()
+        if row is None or str(row[0]) != claims.get('sub'):
+            return None
+
+        user_id, last_seen = row
+        now = int(time.time())
+        if now - last_seen > self.timeout_seconds():
+            self._delete(session_id)
+            return None
+        user = self.db.get_user_by_id(user_id)
+        if user is None or not user['is_active']:
+            self._delete(session_id)
+            return None
+        if now - last_seen >= TOUCH_INTERVAL_SECONDS:
+            with self.db.pool.write() as conn:
+                conn.execute('UPDATE sessions SET last_seen = ? WHERE id = ?', (now, session_id))
+        return user
+
+    def revoke(self, token):
+        claims = self._claims(token, verify_exp=False)
+        if claims is not None:
+            self._delete(claims.get('sid'))
+
+    def revoke_user(self, user_id):
+        """End every session of ``user_id``; returns how many there were."""
+        with self.db.pool.write() as conn:
+            conn.execute('DELETE FROM session_resume WHERE session_id IN (SELECT id FROM sessions WHERE user_id = ?)',
+                         (user_id,))
+            return conn.execute('DELETE FROM sessions WHERE user_id = ?', (user_id,)).rowcount
+
+    def _delete(self, session_id):
+        with self.db.pool.write() as conn:
+            conn.execute('DELETE FROM session_resume WHERE session_id = ?', (session_id,))
+            conn.execute('DELETE FROM sessions WHERE id = ?', (session_id,))
+
+    def purge_expired(self):
+        """Delete sessions past the idle timeout or the token lifetime; returns the count."""
+        now = int(time.time())
+        with self.db.pool.write() as conn:
+            purged = conn.execute('DELETE FROM sessions WHERE last_seen < ? OR created_at < ?',
+                                  (now - self.timeout_seconds(), now - MAX_AGE_SECONDS)).rowcount
+            conn.execute('''DELETE FROM session_resume
+                         WHERE expires_at < ? OR session_id NOT IN (SELECT id FROM sessions)''', (now,))
+        return purged
@@ -0,0 +1,223 @@
+import heapq
+import threading
+from collections import Counter
+
+import numpy as np
+
+# Score weights for "people you may know"
+MUTUAL_WEIGHT = 3.0
+GROUP_WEIGHT = 2.0
+DEPARTMENT_WEIGHT = 1.0
+BATCH_WEIGHT = 1.0
+
+# Groups bigger than this are too broad to say anything about two members
+MAX_GROUP_FANOUT = 500
+
+
+class SuggestionEngine:
+    """Friend-of-friend suggestions served from an in-memory CSR adjacency index.
+
+    The accepted-connections graph is held as two numpy arrays (offsets and
+    neighbor ids). Connection changes reported by the Database are applied to a
+    small overlay of added/removed edges and folded back into fresh CSR arrays
+    once the overlay grows past ``compact_threshold`` edges.
+    """
+
+    def __init__(self, db, compact_threshold=5000):
+        self.db = db
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._built = False
+        db.on_write('connections', self._on_connection_write)
+        db.on_write('group_members', self._on_group_member_write)
+        db.on_write('users', self._on_user_write)
+
+    def rebuild(self):
+        with self.db.pool.read() as conn:
+            edges = conn.execute(
+                "SELECT user_id, connection_id, status FROM connections").fetchall()
+            users = conn.execute('SELECT id, department, batch_year FROM users').fetchall()
+            memberships = conn.execute('SELECT user_id, group_id FROM group_members').fetchall()
+
+        accepted = [(a, b) for a, b, status in edges if status == 'accepted']
+        with self._lock:
+            self._build_csr(accepted)
+            self._pending = {(a, b) for a, b, status in edges if status == 'pending'}
+            self._blocked = {frozenset((a, b)) for a, b, status in edges if status == 'blocked'}
+            self._attributes = {user_id: (department, batch) for user_id, department, batch in users}
+            self._user_groups = {}
+            self._group_members = {}
+            for user_id, group_id in memberships:
+                self._user_groups.setdefault(user_id, set()).add(group_id)
+                self._group_members.setdefault(group_id, set()).add(user_id)
+            self._built = True
+
+    def _build_csr(self, accepted):
+        if accepted:
+            pairs = np.array(accepted, dtype=np.int64)
+            # Undirected: store each edge in both directions
+            sources = np.concatenate([pairs[:, 0], pairs[:, 1]])
+            targets = np.concatenate([pairs[:, 1], pairs[:, 0]])
+        else:
+            sources = targets = np.empty(0, dtype=np.int64)
+        order = np.argsort(sources, kind='stable')
+        sources, targets = sources[order], targets[order]
+        size = int(sources.max()) + 2 if len(sources) else 1
+        self._offsets = np.searchsorted(sources, np.arange(size)).astype(np.int64)
+        self._targets = targets
+        self._added = {}
+        self._removed = set()
+        self._overlay_size = 0
+
+    def _csr_neighbors(self, user_id):
+        if user_id + 1 >= len(self._offsets):
+            return self._targets[:0]
+        return self._targets[self._offsets[user_id]:self._offsets[user_id + 1]]
+
+    def neighbors(self, user_id):
+        with self._lock:
+            self._ensure_built()
+            result = set(self._csr_neighbors(user_id).tolist())
+            if self._removed:
+                result = {other for other in result if frozenset((user_id, other)) not in self._removed}
+            result.update(self._added.get(user_id, ()))
+            return result
+
+    def _ensure_built(self):
+        if not self._built:
+            self.rebuild()
+
+    def _add_edge(self, a, b):
+        edge = frozenset((a, b))
+        if edge in self._removed:
+            self._removed.discard(edge)
+        else:
+            self._added.setdefault(a, set()).add(b)
+            self._added.setdefault(b, set()).add(a)
+        self._overlay_size += 1
+
+    def _remove_edge(self, a, b):
+        if b in self._added.get(a, ()):
+            self._added[a].discard(b)
+            self._added[b].discard(a)
+        else:
+            self._removed.add(frozenset((a, b)))
+        self._overlay_size += 1
+
+    def _compact(self):
+        sources = np.repeat(np.arange(len(self._offsets) - 1), np.diff(self._offsets))
+        keep = sources < self._targets
+        sources, targets = sources[keep], self._targets[keep]
+        if self._removed:
+            removed = np.array([sorted(edge) for edge in self._removed], dtype=np.int64)
+            width = int(max(targets.max(initial=0), removed.max())) + 1
+            keep = ~np.isin(sources * width + targets, removed[:, 0] * width + removed[:, 1])
+            sources, targets = sources[keep], targets[keep]
+        edges = list(zip(sources.tolist(), targets.tolist()))
+        for user_id, others in self._added.items():
+            edges.extend((user_id, other) for other in others if user_id < other)
+        self._build_csr(edges)
+
+    def _on_connection_write(self, table, action, user_id=None, other_id=None, **details):
+        with self._lock:
+            if not self._built:
+                return
+            if user_id is None:
+                # Bulk change without per-edge details
+                self._built = False
+                return
+            pair, reverse = (user_id, other_id), (other_id, user_id)
+            connected = other_id in self.neighbors(user_id)
+            if action == 'pending':
+                self._pending.add(pair)
+                return
+            self._pending.discard(pair)
+            self._pending.discard(reverse)
+            if action == 'accepted' and not connected:
+                self._add_edge(user_id, other_id)
+            elif action in ('removed', 'blocked') and connected:
+                self._remove_edge(user_id, other_id)
+            if action == 'blocked':
+                self._blocked.add(frozenset(pair))
+            if self._overlay_size > self.compact_threshold:
+                self._compact()
+
+    def _on_group_member_write(self, table, action, group_id=None, user_id=None, **details):
+        with self._lock:
+            if not self._built:
+                return
+            if group_id is None or user_id is None:
+                self._built = False
+            elif action == 'join':
+                self._user_groups.setdefault(user_id, set()).add(group_id)
+                self._group_members.setdefault(group_id, set()).add(user_id)
+            elif action == 'leave':
+                self._user_groups.get(user_id, set()).discard(group_id)
+                self._group_members.get(group_id, set()).discard(user_id)
+
+    def _on_user_write(self, table, action, user_ids=(), **details):
+        with self._lock:
+            if not self._built:
+                return
+            if action == 'delete':
+                # Deleting users drops their edges too; start over on next use
+                self._built = False
+                return
+            # New or edited users are (re)loaded lazily by _attributes_for
+            for user_id in user_ids:
+                self._attributes.pop(user_id, None)
+
+    def _attributes_for(self, user_ids):
+        missing = [user_id for user_id in user_ids if user_id not in self._attributes]
+        if missing:
+            placeholders = ', '.join(['?'] * len(missing))
+            with self.db.pool.read() as conn:
+                rows = conn.execute(
+                    f'SELECT id, department, batch_year FROM users WHERE id IN ({placeholders})',
+                    missing).fetchall()
+            for user_id, department, batch in rows:
+                self._attributes[user_id] = (department, batch)
+        return self._attributes
+
+    def suggest(self, user_id, k=10):
+        """Return up to ``k`` suggestion dicts ordered by score, best first."""
+        with self._lock:
+            self._ensure_built()
+            friends = self.neighbors(user_id)
+
+            mutual = Counter()
+            for friend in friends:
+                if friend in self._added or self._removed:
+                    mutual.update(self.neighbors(friend))
+                else:
+                    mutual.update(self._csr_neighbors(friend).tolist())
+
+            my_groups = self._user_groups.get(user_id, set())
+            shared_groups = Counter()
+            for group_id in my_groups:
+                members = self._group_members.get(group_id, ())
+                if len(members) <= MAX_GROUP_FANOUT:
+                    shared_groups.update(members)
+
+            candidates = (set(mutual) | set(shared_groups)) - friends
+            candidates.discard(user_id)
+            candidates = [other for other in candidates
+                          if frozenset((user_id, other)) not in self._blocked
+                          and (user_id, other) not in self._pending
+                          and (other, user_id) not in self._pending]
+
+            attributes = self._attributes_for([user_id] + candidates)
+            department, batch = attributes.get(user_id, (None, None))
+            scored = []
+            for other in candidates:
+                other_department, other_batch = attributes.get(other, (None, None))
+                same_department = department is not None and other_department == department
+                same_batch = batch is not None and other_batch == batch
+                score = (MUTUAL_WEIGHT * mutual[other] + GROUP_WEIGHT * shared_groups[other]
+                         + DEPARTMENT_WEIGHT * same_department + BATCH_WEIGHT * same_batch)
+                scored.append((score, mutual[other], shared_groups[other], other))
+
+        top = heapq.nlargest(k, scored)
+        return [{'user_id': other, 'score': score, 'mutual_connections': mutual_count,
+                 'shared_groups': group_count}
+                for score, mutual_count, group_count, other in top]
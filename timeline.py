@@ -0,0 +1,42 @@
+import atexit
+import threading
+
+
+class TimelineMaintenance:
+    """Background upkeep of the materialised home feed.
+
+    Every ``interval_s`` seconds, timelines are trimmed to their newest
+    ``TIMELINE_LENGTH`` rows. Fan-out and the backfill for a newly joined
+    group happen in the writing transaction; ``backfill()`` repairs every
+    timeline, e.g. after bulk imports or groups shrinking under the
+    fan-out limit.
+    """
+
+    def __init__(self, db, interval_s=900):
+        self.db = db
+        self.interval = interval_s
+        self.trimmed = 0
+
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='timeline-maintenance', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def trim(self):
+        removed = self.db.trim_timelines()
+        self.trimmed += removed
+        return removed
+
+    def backfill(self):
+        return self.db.backfill_timeline()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.trim()
+            except Exception:
+                # Nothing is lost by skipping a round; try again next time
+                pass
+
+    def close(self):
+        self._stopped.set()